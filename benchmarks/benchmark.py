@@ -0,0 +1,280 @@
+"""End-to-end regression benchmark of COGclassifier on bundled example genomes
+
+Run full pipeline (`CogClassifier.run()`, write & plot) on
+`example/input/{ecoli,mycoplasma,synechocystis}.faa`,
+record elapsed time & peak memory per stage, check outputs match the expected
+TSV files in `example/output/`, and compare results with the baseline file.
+
+    # Record baseline with recorded rpsblast outputs (BLAST+ not required)
+    python benchmarks/benchmark.py --recorded --update_baseline
+    # Check slowdowns beyond 20% tolerance
+    python benchmarks/benchmark.py --recorded --tolerance 0.2
+"""
+
+from __future__ import annotations
+
+import filecmp
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+from typing import Annotated, Any, Callable
+
+import typer
+from typer import Option, Typer
+
+from cogclassifier import CogClassifier, __version__, const, utils
+from cogclassifier.cog import CogClassifyStats
+from cogclassifier.output import plot_count_charts, write_classify_results
+
+Option = partial(Option, metavar="")
+
+ROOT_DIR = Path(__file__).parent.parent
+EXAMPLE_INPUT_DIR = ROOT_DIR / "example" / "input"
+EXAMPLE_OUTPUT_DIR = ROOT_DIR / "example" / "output"
+GENOMES = ("ecoli", "mycoplasma", "synechocystis")
+EXPECTED_OUTFILES = ("cog_classify.tsv", "cog_count.tsv")
+DEFAULT_BASELINE_FILE = Path(__file__).parent / "baseline.json"
+
+app = Typer(add_completion=False)
+
+
+def prepare_resources(download_dir: Path, *, recorded: bool) -> None:
+    """Download resources before benchmark (Excluded from measured stages)
+
+    Reclassification of recorded rpsblast outputs requires only `cddid.tbl.gz`,
+    so the full RPS-BLAST database is not downloaded in recorded mode.
+    """
+    if recorded:
+        utils.ftp_download(const.CDDID_TBL_FTP, download_dir)
+    else:
+        CogClassifier.download_resources(download_dir)
+
+
+def run_pipeline(
+    genome: str,
+    outdir: Path,
+    *,
+    download_dir: Path,
+    recorded: bool,
+    thread_num: int,
+    plot: bool,
+    measure: Callable[[str, Callable[[], Any]], Any],
+) -> None:
+    """Run COGclassifier pipeline of target genome by `CogClassifier.run()`"""
+    query = EXAMPLE_INPUT_DIR / f"{genome}.faa"
+    rpsblast_file = EXAMPLE_OUTPUT_DIR / genome / "rpsblast.tsv" if recorded else None
+    classifier = CogClassifier(
+        query,
+        download_dir=download_dir,
+        thread_num=thread_num,
+        rpsblast_outfile=outdir / "rpsblast.tsv",
+        rpsblast_file=rpsblast_file,
+        force=True,
+    )
+
+    def run() -> CogClassifyStats:
+        stats = classifier.run()
+        stats.query_classify_df, stats.count_summary_df
+        return stats
+
+    stats = measure("run", run)
+    measure("write", lambda: write_classify_results(stats, outdir))
+    if plot:
+        measure("plot", lambda: plot_count_charts(stats.count_summary_df, outdir))
+
+
+def benchmark_genome(
+    genome: str,
+    *,
+    download_dir: Path,
+    recorded: bool,
+    thread_num: int,
+    plot: bool,
+    repeat: int,
+) -> dict[str, Any]:
+    """Benchmark pipeline stages of target genome
+
+    Elapsed time is the minimum of `repeat` runs without memory tracing.
+    Peak memory is measured in an additional run with `tracemalloc`.
+    """
+    stage2times: dict[str, list[float]] = {}
+    stage2peak_mem: dict[str, float] = {}
+
+    def measure_time(stage: str, func: Callable[[], Any]) -> Any:
+        start_time = time.perf_counter()
+        result = func()
+        elapsed_time = time.perf_counter() - start_time
+        stage2times.setdefault(stage, []).append(elapsed_time)
+        return result
+
+    def measure_memory(stage: str, func: Callable[[], Any]) -> Any:
+        tracemalloc.start()
+        try:
+            result = func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        stage2peak_mem[stage] = peak / 1024**2
+        return result
+
+    outputs_match = True
+    for measure in [measure_time] * repeat + [measure_memory]:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outdir = Path(tmpdir)
+            run_pipeline(
+                genome,
+                outdir,
+                download_dir=download_dir,
+                recorded=recorded,
+                thread_num=thread_num,
+                plot=plot,
+                measure=measure,
+            )
+            for name in EXPECTED_OUTFILES:
+                expected_file = EXAMPLE_OUTPUT_DIR / genome / name
+                if not filecmp.cmp(outdir / name, expected_file, shallow=False):
+                    outputs_match = False
+
+    stages = {
+        stage: dict(
+            elapsed_time=round(min(times), 4),
+            peak_memory_mb=round(stage2peak_mem[stage], 2),
+        )
+        for stage, times in stage2times.items()
+    }
+    return dict(outputs_match=outputs_match, stages=stages)
+
+
+def compare_with_baseline(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float,
+    min_time: float,
+) -> list[str]:
+    """Compare benchmark results with baseline & return regression messages"""
+    regressions = []
+    for genome, result in results["genomes"].items():
+        base_stages = baseline["genomes"].get(genome, {}).get("stages", {})
+        for stage, values in result["stages"].items():
+            if stage not in base_stages:
+                continue
+            base_values = base_stages[stage]
+            base_time, time_ = base_values["elapsed_time"], values["elapsed_time"]
+            if time_ > max(base_time, min_time) * (1 + tolerance):
+                regressions.append(
+                    f"{genome}.{stage}: elapsed time {base_time:.3f}[s] -> {time_:.3f}[s]"  # noqa: E501
+                )
+            base_mem, mem = base_values["peak_memory_mb"], values["peak_memory_mb"]
+            if mem > base_mem * (1 + tolerance):
+                regressions.append(
+                    f"{genome}.{stage}: peak memory {base_mem:.2f}[MB] -> {mem:.2f}[MB]"  # noqa: E501
+                )
+    return regressions
+
+
+@app.command(context_settings=dict(help_option_names=["-h", "--help"]))
+def cli(
+    recorded: Annotated[
+        bool,
+        Option("--recorded", help="Use recorded rpsblast outputs (No BLAST+ search)"),
+    ] = False,
+    genomes: Annotated[
+        list[str],
+        Option("-g", "--genome", help="Target genomes"),
+    ] = list(GENOMES),
+    baseline_file: Annotated[
+        Path,
+        Option("-b", "--baseline", help="Baseline file"),
+    ] = DEFAULT_BASELINE_FILE,
+    update_baseline: Annotated[
+        bool,
+        Option("--update_baseline", help="Write results to baseline file"),
+    ] = False,
+    tolerance: Annotated[
+        float,
+        Option("--tolerance", help="Allowed slowdown ratio (e.g. 0.2 = 20%)"),
+    ] = 0.2,
+    min_time: Annotated[
+        float,
+        Option("--min_time", help="Ignore time regressions of faster stages [s]"),
+    ] = 0.05,
+    repeat: Annotated[
+        int,
+        Option("-r", "--repeat", help="Number of repeated runs for elapsed time"),
+    ] = 3,
+    plot: Annotated[
+        bool,
+        Option("--plot", help="Include plot stage"),
+    ] = False,
+    download_dir: Annotated[
+        Path,
+        Option("-d", "--download_dir", help="Download COG & CDD resources directory"),
+    ] = const.CACHE_DIR,
+    thread_num: Annotated[
+        int,
+        Option("-t", "--thread_num", help="RPS-BLAST num_thread parameter"),
+    ] = const.DEFAULT_CPU,
+) -> None:
+    """Run COGclassifier regression benchmark on bundled example genomes"""
+    # Exclude one-time module import cost from first measured stage
+    import pandas  # noqa: F401
+
+    results: dict[str, Any] = dict(
+        version=__version__,
+        python_version=platform.python_version(),
+        recorded=recorded,
+        genomes={},
+    )
+    prepare_resources(download_dir, recorded=recorded)
+    for genome in genomes:
+        result = benchmark_genome(
+            genome,
+            download_dir=download_dir,
+            recorded=recorded,
+            thread_num=thread_num,
+            plot=plot,
+            repeat=repeat,
+        )
+        results["genomes"][genome] = result
+        print(f"[{genome}] outputs_match={result['outputs_match']}")
+        for stage, values in result["stages"].items():
+            print(
+                f"  {stage:<20} {values['elapsed_time']:>8.3f}[s] {values['peak_memory_mb']:>9.2f}[MB]"  # noqa: E501
+            )
+
+    failed = False
+    mismatch_genomes = [
+        g for g, r in results["genomes"].items() if not r["outputs_match"]
+    ]
+    if len(mismatch_genomes) > 0:
+        print(f"Outputs differ from expected TSV files: {mismatch_genomes}")
+        failed = True
+
+    if update_baseline:
+        with open(baseline_file, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Write baseline => {baseline_file}")
+    elif baseline_file.exists():
+        with open(baseline_file, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("recorded") != recorded:
+            print("Skip baseline comparison (different search mode)")
+        else:
+            regressions = compare_with_baseline(results, baseline, tolerance, min_time)
+            for regression in regressions:
+                print(f"Regression: {regression}")
+            failed = failed or len(regressions) > 0
+    else:
+        print(f"Baseline file not found ({baseline_file})")
+
+    if failed:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    sys.exit(app())
@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import logging
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, ClassVar, Protocol
+
+from cogclassifier.blast import BlastAlignmentRecord, RpsBlast, RpsBlastProgress
+from cogclassifier.compress import xopen
+from cogclassifier.fasta import IndexedFasta, iter_fasta_records, split_fasta
+from cogclassifier.manifest import file_digest
+
+
+class SearchBackend(Protocol):
+    """Search Backend Protocol (Query fasta => RPS-BLAST outfmt 6 alignments)"""
+
+    name: ClassVar[str]
+    # If False, RPS-BLAST database is not downloaded (`db=None` in search)
+    requires_db: ClassVar[bool]
+
+    @property
+    def key(self) -> str:
+        """Key of backend (Backends of same key produce the same alignments)"""
+        ...
+
+    def is_available(self) -> bool:
+        """Check if backend is available in current environment"""
+        ...
+
+    def search(
+        self,
+        query: Path,
+        db: Path | None,
+        *,
+        outfile: Path | None = None,
+        evalue: float = 1e-2,
+        thread_num: int = 1,
+        progress_callback: Callable[[RpsBlastProgress], None] | None = None,
+    ) -> BlastAlignmentRecord:
+        """Search query against RPS-BLAST database
+
+        Parameters
+        ----------
+        query : Path
+            Query protein fasta file
+        db : Path | None
+            RPS-BLAST database (None if `requires_db=False`)
+        outfile : Path | None, optional
+            RPS-BLAST result output file (If None, written to temporary directory)
+        evalue : float, optional
+            RPS-BLAST e-value parameter
+        thread_num : int, optional
+            Number of threads
+        progress_callback : Callable[[RpsBlastProgress], None] | None, optional
+            Callback function called with search progress periodically
+
+        Returns
+        -------
+        blast_rec : BlastAlignmentRecord
+            Blast alignment record
+        """
+        ...
+
+
+SEARCH_BACKENDS: dict[str, type[SearchBackend]] = {}
+
+
+def register_backend(name: str):
+    """Register search backend class decorator"""
+
+    def register(cls):
+        if name in SEARCH_BACKENDS:
+            raise ValueError(f"Search backend '{name}' is already registered")
+        cls.name = name
+        SEARCH_BACKENDS[name] = cls
+        return cls
+
+    return register
+
+
+def get_backend(name: str, **options) -> SearchBackend:
+    """Get search backend by registered name
+
+    Parameters
+    ----------
+    name : str
+        Registered search backend name (e.g. `rpsblast`, `sharded`)
+    **options : dict, optional
+        Backend specific options (e.g. `rpsblast_file` of `precomputed`)
+
+    Returns
+    -------
+    backend : SearchBackend
+        Search backend
+    """
+    if name not in SEARCH_BACKENDS:
+        raise ValueError(f"{name=} is invalid ({list(SEARCH_BACKENDS)=})")
+    return SEARCH_BACKENDS[name](**options)
+
+
+@register_backend("rpsblast")
+class RpsBlastBackend:
+    """RPS-BLAST Subprocess Search Backend"""
+
+    requires_db = True
+
+    @property
+    def key(self) -> str:
+        """Key of backend"""
+        return "rpsblast"
+
+    def is_available(self) -> bool:
+        """Check if rpsblast is installed"""
+        return RpsBlast.check_installation(raise_error=False)
+
+    def search(
+        self,
+        query: Path,
+        db: Path | None,
+        *,
+        outfile: Path | None = None,
+        evalue: float = 1e-2,
+        thread_num: int = 1,
+        progress_callback: Callable[[RpsBlastProgress], None] | None = None,
+    ) -> BlastAlignmentRecord:
+        """Search query by a single rpsblast process"""
+        return RpsBlast(
+            query,
+            db,  # type: ignore
+            outfile=outfile,
+            evalue=evalue,
+            thread_num=thread_num,
+            progress_callback=progress_callback,
+        ).run()
+
+
+@register_backend("sharded")
+class ShardedRpsBlastBackend:
+    """Sharded RPS-BLAST Pool Search Backend
+
+    Query is split into contiguous shards of nearly equal residue count, and each
+    shard is searched by an independent rpsblast process in parallel. Shard results
+    are concatenated in query order, so alignments are the same as `rpsblast`.
+    Search progress of all shards is aggregated & reported to `progress_callback`.
+    """
+
+    requires_db = True
+
+    def __init__(self, shard_num: int | None = None):
+        """
+        Parameters
+        ----------
+        shard_num : int | None, optional
+            Number of shards (By default, `thread_num` of search)
+        """
+        self._shard_num = shard_num
+
+    @property
+    def key(self) -> str:
+        """Key of backend (Same as `rpsblast` backend)"""
+        return "rpsblast"
+
+    def is_available(self) -> bool:
+        """Check if rpsblast is installed"""
+        return RpsBlast.check_installation(raise_error=False)
+
+    def search(
+        self,
+        query: Path,
+        db: Path | None,
+        *,
+        outfile: Path | None = None,
+        evalue: float = 1e-2,
+        thread_num: int = 1,
+        progress_callback: Callable[[RpsBlastProgress], None] | None = None,
+    ) -> BlastAlignmentRecord:
+        """Search query shards by parallel rpsblast processes"""
+        RpsBlast.check_installation()
+        shard_num = thread_num if self._shard_num is None else self._shard_num
+        shard_num = max(shard_num, 1)
+        logger = logging.getLogger(__name__)
+        tmpdir = tempfile.TemporaryDirectory()
+        try:
+            shard_files = split_fasta(query, tmpdir.name, shard_num)
+            shard_thread_num = max(thread_num // max(len(shard_files), 1), 1)
+            logger.info(
+                f"Search {len(shard_files)} query shards by parallel rpsblast "
+                f"({shard_thread_num} threads per shard)"
+            )
+
+            aggregate_progress = None
+            if progress_callback is not None:
+                aggregate_progress = _ShardProgressAggregator(
+                    query, len(shard_files), progress_callback
+                )
+
+            def search_shard(idx: int, shard_file: Path) -> Path:
+                shard_outfile = shard_file.with_suffix(".rpsblast.tsv")
+                shard_progress_callback = None
+                if aggregate_progress is not None:
+                    shard_progress_callback = partial(aggregate_progress.update, idx)
+                RpsBlast(
+                    shard_file,
+                    db,  # type: ignore
+                    outfile=shard_outfile,
+                    evalue=evalue,
+                    thread_num=shard_thread_num,
+                    progress_callback=shard_progress_callback,
+                ).run()
+                return shard_outfile
+
+            with ThreadPoolExecutor(max_workers=max(len(shard_files), 1)) as executor:
+                shard_outfiles = list(
+                    executor.map(search_shard, range(len(shard_files)), shard_files)
+                )
+
+            if outfile is None:
+                merged_file = Path(tmpdir.name) / "rpsblast.tsv"
+            else:
+                merged_file = outfile
+            with xopen(merged_file, "wb", threads=thread_num) as fw:
+                for shard_outfile in shard_outfiles:
+                    with open(shard_outfile, "rb") as fr:
+                        shutil.copyfileobj(fr, fw)
+        except BaseException:
+            tmpdir.cleanup()
+            raise
+        if outfile is not None:
+            tmpdir.cleanup()
+            return BlastAlignmentRecord.bulk_load(merged_file, workers=thread_num)
+        return BlastAlignmentRecord.bulk_load(
+            merged_file, workers=thread_num, tmpdir=tmpdir
+        )
+
+
+class _ShardProgressAggregator:
+    """Aggregate search progress of parallel shards into whole query progress"""
+
+    def __init__(
+        self,
+        query: Path,
+        shard_num: int,
+        callback: Callable[[RpsBlastProgress], None],
+    ):
+        self._total_query_count, self._total_residue_count = 0, 0
+        for _, seq_lines in iter_fasta_records(query):
+            self._total_query_count += 1
+            self._total_residue_count += sum(map(len, seq_lines))
+        self._shard_progresses: list[RpsBlastProgress | None] = [None] * shard_num
+        self._callback = callback
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+
+    def update(self, idx: int, progress: RpsBlastProgress) -> None:
+        """Update progress of shard & report aggregated progress to callback"""
+        with self._lock:
+            self._shard_progresses[idx] = progress
+            progresses = [p for p in self._shard_progresses if p is not None]
+            self._callback(
+                RpsBlastProgress(
+                    completed_query_count=sum(
+                        p.completed_query_count for p in progresses
+                    ),
+                    total_query_count=self._total_query_count,
+                    completed_residue_count=sum(
+                        p.completed_residue_count for p in progresses
+                    ),
+                    total_residue_count=self._total_residue_count,
+                    elapsed_seconds=time.time() - self._start_time,
+                    idle_seconds=min(p.idle_seconds for p in progresses),
+                    finished=len(progresses) == len(self._shard_progresses)
+                    and all(p.finished for p in progresses),
+                )
+            )
+
+
+@register_backend("precomputed")
+class PrecomputedBackend:
+    """Precomputed Hits Search Backend (Existing RPS-BLAST outfmt 6 file)"""
+
+    requires_db = False
+
+    def __init__(self, rpsblast_file: str | Path):
+        """
+        Parameters
+        ----------
+        rpsblast_file : str | Path
+            Existing RPS-BLAST result file of query (outfmt 6, `.gz`/`.zst` allowed)
+        """
+        self._rpsblast_file = Path(rpsblast_file)
+
+    @property
+    def key(self) -> str:
+        """Key of backend (Content hash of RPS-BLAST result file)"""
+        return f"rpsblast_file:{file_digest(self._rpsblast_file)}"
+
+    def is_available(self) -> bool:
+        """Check if RPS-BLAST result file exists"""
+        return self._rpsblast_file.exists()
+
+    def search(
+        self,
+        query: Path,
+        db: Path | None,
+        *,
+        outfile: Path | None = None,
+        evalue: float = 1e-2,
+        thread_num: int = 1,
+        progress_callback: Callable[[RpsBlastProgress], None] | None = None,
+    ) -> BlastAlignmentRecord:
+        """Load existing RPS-BLAST result (No search)"""
+        logger = logging.getLogger(__name__)
+        logger.info(f"Load existing RPS-BLAST result from {self._rpsblast_file}")
+        blast_rec = BlastAlignmentRecord.bulk_load(
+            self._rpsblast_file, workers=thread_num
+        )
+        if outfile is not None:
+            blast_rec.write(outfile, thread_num=thread_num)
+        return blast_rec
+
+
+@register_backend("fake")
+class FakeBackend:
+    """Fake Search Backend for tests (No external tool & database)
+
+    Hits of query IDs are taken from a hits file (e.g. RPS-BLAST result of
+    a larger query set). Without hits file, no hits are returned.
+    """
+
+    requires_db = False
+
+    def __init__(self, hits_file: str | Path | None = None):
+        """
+        Parameters
+        ----------
+        hits_file : str | Path | None, optional
+            RPS-BLAST outfmt 6 file of fake hits
+        """
+        self._hits_file = None if hits_file is None else Path(hits_file)
+
+    @property
+    def key(self) -> str:
+        """Key of backend (Content hash of hits file)"""
+        if self._hits_file is None:
+            return "fake"
+        return f"fake:{file_digest(self._hits_file)}"
+
+    def is_available(self) -> bool:
+        """Return True (Always available)"""
+        return True
+
+    def search(
+        self,
+        query: Path,
+        db: Path | None,
+        *,
+        outfile: Path | None = None,
+        evalue: float = 1e-2,
+        thread_num: int = 1,
+        progress_callback: Callable[[RpsBlastProgress], None] | None = None,
+    ) -> BlastAlignmentRecord:
+        """Return fake hits of query IDs (evalue threshold is applied)"""
+        with IndexedFasta(query) as fasta:
+            query_ids = set(fasta.ids)
+        tmpdir = tempfile.TemporaryDirectory() if outfile is None else None
+        hits_file = Path(tmpdir.name) / "rpsblast.tsv" if tmpdir else outfile
+        with xopen(hits_file, "wt") as fw:  # type: ignore
+            if self._hits_file is not None:
+                with xopen(self._hits_file, "rt") as fr:
+                    for line in fr:
+                        fields = line.split("\t")
+                        if len(fields) < 11 or fields[0] not in query_ids:
+                            continue
+                        if float(fields[10]) <= evalue:
+                            fw.write(line)
+        return BlastAlignmentRecord(hits_file, tmpdir=tmpdir)  # type: ignore
@@ -1,18 +1,32 @@
 from __future__ import annotations
 
+import bisect
 import csv
+import io
 import logging
 import re
 import shlex
 import shutil
 import subprocess as sp
 import tempfile
-from functools import cached_property
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable
 
 from pydantic import BaseModel, ConfigDict
 
-from cogclassifier import const
+from cogclassifier import const, utils
+from cogclassifier.compress import compress_format, xopen
+from cogclassifier.fasta import iter_fasta_records
+from cogclassifier.metrics import RPSBLAST_SECONDS
+from cogclassifier.subset import full_db_size
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class RpsBlast:
@@ -26,32 +40,88 @@ class RpsBlast:
         outfile: str | Path | None = None,
         evalue: float = 1e-2,
         thread_num: int = 1,
+        progress_callback: Callable[[RpsBlastProgress], None] | None = None,
+        progress_interval: float = 10.0,
+        dbsize: int | None = None,
     ):
+        """
+        Parameters
+        ----------
+        query : str | Path
+            Query protein fasta file
+        db : str | Path
+            RPS-BLAST database
+        outfile : str | Path | None, optional
+            RPS-BLAST result output file (If None, written to temporary directory)
+        evalue : float, optional
+            RPS-BLAST e-value parameter
+        thread_num : int, optional
+            RPS-BLAST num_thread parameter
+        progress_callback : Callable[[RpsBlastProgress], None] | None, optional
+            Callback function called with search progress on every progress check
+        progress_interval : float, optional
+            Interval seconds of search progress check & logging
+        dbsize : int | None, optional
+            RPS-BLAST dbsize parameter. By default, full COG database size is used
+            for COG subset database (e-values same as full database search).
+        """
         self._query = query
         self._db = db
+        self._dbsize = full_db_size(db) if dbsize is None else dbsize
         self._outfile = outfile
         self._evalue = evalue
         self._thread_num = thread_num
+        self._progress_callback = progress_callback
+        self._progress_interval = progress_interval
 
     def run(self) -> BlastAlignmentRecord:
         """Run RPS-BLAST"""
         self.check_installation()
-        with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = tempfile.TemporaryDirectory()
+        try:
             outfile = self._outfile
-            if outfile is None:
-                outfile = Path(tmpdir) / "rpsblast.tsv"
+            if outfile is None or compress_format(outfile) is not None:
+                # rpsblast writes plain text, which is compressed after search
+                outfile = Path(tmpdir.name) / "rpsblast.tsv"
             cmd = f"{self.get_binary_name()} -query {self._query} -db {self._db} -outfmt 6 -out {outfile} -evalue {self._evalue} -num_threads {self._thread_num} -mt_mode 1"  # noqa: E501
+            if self._dbsize is not None:
+                cmd += f" -dbsize {self._dbsize}"
             version = self.get_version()
             logger = logging.getLogger(__name__)
             logger.info(f"{'*' * 10} Start RPS-BLAST(v{version}) Search {'*' * 10}")
-            self._run_cmd(cmd, logger)
+            # Remove previous result to monitor search progress from output file
+            Path(outfile).unlink(missing_ok=True)
+            monitor = RpsBlastProgressMonitor(
+                self._query,
+                outfile,
+                interval=self._progress_interval,
+                callback=self._progress_callback,
+            )
+            monitor.start()
+            try:
+                with RPSBLAST_SECONDS.time():
+                    self._run_cmd(cmd, logger)
+            finally:
+                monitor.stop()
             logger.info(f"{'*' * 10} Finished RPS-BLAST Search {'*' * 10}")
+            if self._outfile is not None and outfile != self._outfile:
+                with open(outfile, "rb") as fr:
+                    with xopen(self._outfile, "wb", threads=self._thread_num) as fw:
+                        shutil.copyfileobj(fr, fw)
+                outfile = self._outfile
+        except BaseException:
+            tmpdir.cleanup()
+            raise
+        if self._outfile is not None:
+            tmpdir.cleanup()
             return BlastAlignmentRecord(outfile)
+        # Result in temporary directory is kept alive while record is referenced
+        return BlastAlignmentRecord(outfile, tmpdir=tmpdir)
 
     @classmethod
     def check_installation(cls, raise_error: bool = True) -> bool:
         """Check tool installation"""
-        if shutil.which("rpsblast") is None and shutil.which("rpsblast+") is None:
+        if utils.which("rpsblast") is None and utils.which("rpsblast+") is None:
             if raise_error:
                 raise RuntimeError("rpsblast is not installed!!")
             return False
@@ -59,21 +129,13 @@ class RpsBlast:
 
     @classmethod
     def get_version(cls) -> str:
-        """Get tool version"""
-        try:
-            cmd = f"{cls.get_binary_name()} -version"
-            cmd_args = shlex.split(cmd)
-            cmd_res = sp.run(cmd_args, capture_output=True, text=True)
-            output = cmd_res.stderr if cmd_res.stdout == "" else cmd_res.stdout
-            version = re.findall(r"blast (\d+.\d+.\d+)", output, re.MULTILINE)[0]
-            return version
-        except Exception:
-            return const.UNKNOWN_VERSION
+        """Get tool version (Probed once per process & cached)"""
+        return _get_tool_version(cls.get_binary_name())
 
     @classmethod
     def get_binary_name(cls) -> str:
         """Binary name"""
-        return "rpsblast+" if shutil.which("rpsblast") is None else "rpsblast"
+        return "rpsblast+" if utils.which("rpsblast") is None else "rpsblast"
 
     def _run_cmd(
         self,
@@ -83,6 +145,8 @@ class RpsBlast:
     ) -> None:
         """Run command
 
+        Command stdout/stderr is forwarded line by line to logger as it arrives.
+
         Parameters
         ----------
         cmd : str
@@ -94,31 +158,226 @@ class RpsBlast:
         """
         logger.info(f"$ {cmd}")
         cmd_args = shlex.split(cmd)
+        # Keep only last output lines for error report
+        output_lines: deque[str] = deque(maxlen=100)
+        if stdout_file:
+            logger.info(f"> Save cmd stdout results to '{stdout_file}'")
+            stdout = open(stdout_file, "w", encoding="utf-8")
+            stderr = sp.PIPE
+        else:
+            stdout, stderr = sp.PIPE, sp.STDOUT
         try:
-            cmd_res = sp.run(cmd_args, capture_output=True, text=True, check=True)
-            # Write stdout result if stdout_file is set
+            with sp.Popen(
+                cmd_args, stdout=stdout, stderr=stderr, text=True, bufsize=1
+            ) as proc:
+                pipe = proc.stdout if proc.stdout is not None else proc.stderr
+                for line in pipe:  # type: ignore
+                    line = line.rstrip()
+                    if line == "":
+                        continue
+                    output_lines.append(line)
+                    logger.info(f"> {line}")
+                returncode = proc.wait()
+        finally:
             if stdout_file:
-                logger.info(f"> Save cmd stdout results to '{stdout_file}'")
-                with open(stdout_file, "w", encoding="utf-8") as f:
-                    f.write(cmd_res.stdout)
-        except sp.CalledProcessError as e:
-            returncode, stdout, stderr = e.returncode, str(e.stdout), str(e.stderr)
+                stdout.close()  # type: ignore
+
+        if returncode != 0:
             logger.error(f"Failed to run command below ({returncode=})")
             logger.error(f"$ {cmd}")
-            stdout_lines = stdout.splitlines()
-            if len(stdout_lines) > 0:
-                logger.error("STDOUT:")
-                for line in stdout_lines:
+            if len(output_lines) > 0:
+                logger.error("OUTPUT:")
+                for line in output_lines:
                     logger.error(f"> {line}")
-            stderr_lines = stderr.splitlines()
-            if len(stderr_lines) > 0:
-                logger.error("STDERR:")
-                for line in stderr_lines:
-                    logger.error(f"> {line}")
-                logger.error("Failed to run 'RPS-BLAST'!!")
-                raise
-        except FileNotFoundError:
-            raise
+            logger.error("Failed to run 'RPS-BLAST'!!")
+            raise sp.CalledProcessError(
+                returncode, cmd_args, stderr="\n".join(output_lines)
+            )
+
+
+class RpsBlastProgress(BaseModel):
+    """RPS-BLAST Search Progress Class"""
+
+    completed_query_count: int
+    total_query_count: int
+    completed_residue_count: int
+    total_residue_count: int
+    elapsed_seconds: float
+    idle_seconds: float  # Elapsed seconds since last progress update
+    finished: bool = False
+
+    model_config = ConfigDict(frozen=True)
+
+    @property
+    def queries_per_sec(self) -> float:
+        """Number of completed queries per second"""
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.completed_query_count / self.elapsed_seconds
+
+    @property
+    def residues_per_sec(self) -> float:
+        """Number of completed residues per second"""
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.completed_residue_count / self.elapsed_seconds
+
+    @property
+    def eta_seconds(self) -> float | None:
+        """Estimated remaining seconds (None if not estimable yet)"""
+        if self.finished:
+            return 0.0
+        if self.residues_per_sec <= 0:
+            return None
+        remaining = self.total_residue_count - self.completed_residue_count
+        return remaining / self.residues_per_sec
+
+    @property
+    def as_message(self) -> str:
+        """Progress message for logging"""
+        percent = 0.0
+        if self.total_query_count > 0:
+            percent = self.completed_query_count / self.total_query_count * 100
+        eta = "?" if self.eta_seconds is None else f"{self.eta_seconds:.0f}[s]"
+        return (
+            f"Progress: {self.completed_query_count} / {self.total_query_count} "
+            f"queries ({percent:.1f}%), {self.queries_per_sec:.2f} queries/sec, "
+            f"{self.residues_per_sec:.0f} residues/sec, ETA {eta}"
+        )
+
+
+class RpsBlastProgressMonitor:
+    """RPS-BLAST Search Progress Monitor Class
+
+    Search progress is estimated by incrementally reading the outfmt 6 output file
+    which rpsblast writes in query order. All queries before the last query found
+    in the output file are regarded as completed (including no hit queries).
+    """
+
+    def __init__(
+        self,
+        query: str | Path,
+        outfile: str | Path,
+        *,
+        interval: float = 10.0,
+        callback: Callable[[RpsBlastProgress], None] | None = None,
+    ):
+        """
+        Parameters
+        ----------
+        query : str | Path
+            Query protein fasta file
+        outfile : str | Path
+            RPS-BLAST outfmt 6 output file
+        interval : float, optional
+            Interval seconds of progress check
+        callback : Callable[[RpsBlastProgress], None] | None, optional
+            Callback function called with progress on every progress check
+        """
+        self._outfile = Path(outfile)
+        self._interval = interval
+        self._callback = callback
+
+        query_id2idx: dict[str, int] = {}
+        # Cumulative residue count until the end of each query
+        cum_residue_counts: list[int] = []
+        residue_count = 0
+        for header, seq_lines in iter_fasta_records(query):
+            fields = header[1:].decode("utf-8", errors="replace").split(maxsplit=1)
+            query_id2idx[fields[0] if fields else ""] = len(query_id2idx)
+            residue_count += sum(map(len, seq_lines))
+            cum_residue_counts.append(residue_count)
+        self._query_id2idx = query_id2idx
+        self._cum_residue_counts = cum_residue_counts
+
+        self._offset = 0
+        self._partial_line = b""
+        self._last_query_idx = -1
+        self._found_query_ids: set[str] = set()
+        self._start_time = time.time()
+        self._last_update_time = self._start_time
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        """Start progress monitoring thread"""
+        self._start_time = time.time()
+        self._last_update_time = self._start_time
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop progress monitoring thread & report final progress"""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._report(self.poll(finished=True))
+
+    def poll(self, finished: bool = False) -> RpsBlastProgress:
+        """Check current search progress from output file"""
+        if self._outfile.exists():
+            with open(self._outfile, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read()
+                self._offset = f.tell()
+            lines = (self._partial_line + chunk).split(b"\n")
+            self._partial_line = lines.pop()
+            for line in lines:
+                query_id = line.split(b"\t", 1)[0].decode("utf-8", errors="replace")
+                if query_id == "" or query_id.startswith("#"):
+                    continue
+                self._update(query_id)
+
+        now = time.time()
+        total_query_count = len(self._cum_residue_counts)
+        if finished:
+            completed_query_count = total_query_count
+        elif self._last_query_idx >= 0:
+            completed_query_count = self._last_query_idx + 1
+        else:
+            # Query IDs rewritten by rpsblast are not found in query fasta
+            completed_query_count = len(self._found_query_ids)
+        completed_query_count = min(completed_query_count, total_query_count)
+        completed_residue_count, total_residue_count = 0, 0
+        if total_query_count > 0:
+            total_residue_count = self._cum_residue_counts[-1]
+        if completed_query_count > 0:
+            cum_residue_counts = self._cum_residue_counts
+            completed_residue_count = cum_residue_counts[completed_query_count - 1]
+        return RpsBlastProgress(
+            completed_query_count=completed_query_count,
+            total_query_count=total_query_count,
+            completed_residue_count=completed_residue_count,
+            total_residue_count=total_residue_count,
+            elapsed_seconds=now - self._start_time,
+            idle_seconds=now - self._last_update_time,
+            finished=finished,
+        )
+
+    def _update(self, query_id: str) -> None:
+        """Update progress by query ID found in output file"""
+        if query_id in self._found_query_ids:
+            return
+        self._found_query_ids.add(query_id)
+        self._last_update_time = time.time()
+        idx = self._query_id2idx.get(query_id)
+        if idx is not None and idx > self._last_query_idx:
+            self._last_query_idx = idx
+
+    def _run(self) -> None:
+        """Periodically check & report search progress until stopped"""
+        while not self._stop_event.wait(self._interval):
+            try:
+                self._report(self.poll())
+            except Exception as e:
+                logger = logging.getLogger(__name__)
+                logger.debug(f"Failed to check search progress ({e})")
+
+    def _report(self, progress: RpsBlastProgress) -> None:
+        """Report search progress to logger & callback"""
+        logger = logging.getLogger(__name__)
+        logger.info(progress.as_message)
+        if self._callback is not None:
+            self._callback(progress)
 
 
 class BlastAlignment(BaseModel):
@@ -146,47 +405,347 @@ class BlastAlignment(BaseModel):
 
 
 class BlastAlignmentRecord:
-    def __init__(self, blast_outfile: str | Path):
-        """Parse tsv format blast result file
+    def __init__(
+        self,
+        blast_outfile: str | Path,
+        *,
+        tmpdir: tempfile.TemporaryDirectory | None = None,
+    ):
+        """Tsv format blast result file record
+
+        Record is a view over the blast result file. Alignments are parsed lazily
+        on first access, and the file is used as is on writing the record
+        to avoid re-formatting all alignments.
+        For large blast result files, use `BlastAlignmentRecord.bulk_load()`.
+
+        Parameters
+        ----------
+        blast_outfile : str | Path
+            TSV format blast result file
+        tmpdir : tempfile.TemporaryDirectory | None, optional
+            Temporary directory of blast result file, which is kept alive for
+            the lifetime of record (Removed when record is garbage collected)
+        """
+        self._blast_outfile = Path(blast_outfile)
+        self._blast_alns: list[BlastAlignment] | None = None
+        self._columns: pd.DataFrame | None = None
+        self._tmpdir = tmpdir
+
+    @classmethod
+    def bulk_load(
+        cls,
+        blast_outfile: str | Path,
+        *,
+        workers: int | None = None,
+        min_chunk_bytes: int = 8 * 1024 * 1024,
+        tmpdir: tempfile.TemporaryDirectory | None = None,
+    ) -> BlastAlignmentRecord:
+        """Load large tsv format blast result file in parallel
+
+        Blast result file is split into byte ranges aligned to line boundaries,
+        and each range is parsed in parallel by pandas C parser.
+        Compressed (`.gz`, `.zst`) file is decompressed into memory before split.
+        Alignments are kept in columnar form, and `BlastAlignment` objects are
+        built lazily only for selected (top hit or domain hit) alignments.
 
         Parameters
         ----------
         blast_outfile : str | Path
             TSV format blast result file
+        workers : int | None, optional
+            Max number of parallel parse workers (By default, `DEFAULT_CPU`)
+        min_chunk_bytes : int, optional
+            Min byte size of a single parse range
+        tmpdir : tempfile.TemporaryDirectory | None, optional
+            Temporary directory of blast result file, which is kept alive for
+            the lifetime of record (Removed when record is garbage collected)
 
         Returns
         -------
-        blast_results : list[BlastResult]
-            List of BlastResult
+        blast_rec : BlastAlignmentRecord
+            Blast alignment record (Columnar form)
         """
-        blast_alns: list[BlastAlignment] = []
-        with open(blast_outfile, encoding="utf-8") as f:
-            reader = csv.reader(f, delimiter="\t")
-            for row in reader:
-                # Ignore header line
-                if row[0].startswith("#"):
-                    continue
-                keys = BlastAlignment.model_fields
-                blast_alns.append(BlastAlignment(**dict(zip(keys, row))))  # type: ignore
+        import pandas as pd
+
+        blast_outfile = Path(blast_outfile)
+        workers = const.DEFAULT_CPU if workers is None else workers
+        if compress_format(blast_outfile) is None:
+            data: bytes | None = None
+            file_size = blast_outfile.stat().st_size
+        else:
+            with xopen(blast_outfile, "rb") as f:
+                data = f.read()
+            file_size = len(data)
+        range_num = max(1, min(workers, file_size // max(min_chunk_bytes, 1)))
+        if data is None:
+            ranges = _split_line_aligned_ranges(blast_outfile, range_num)
+        else:
+            ranges = _split_line_aligned_data_ranges(data, range_num)
+
+        def read_range(r: tuple[int, int]) -> pd.DataFrame:
+            if data is None:
+                return _read_tsv_range(blast_outfile, *r)
+            return _parse_tsv_data(data[r[0] : r[1]])
+
+        if len(ranges) == 1:
+            dfs = [read_range(ranges[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                dfs = list(executor.map(read_range, ranges))
+        df = pd.concat(dfs, ignore_index=True)
 
-        self._blast_alns = blast_alns
+        logger = logging.getLogger(__name__)
+        logger.debug(f"Bulk load {len(df)} alignments in {len(ranges)} ranges")
+
+        blast_rec = cls.__new__(cls)
+        blast_rec._blast_outfile = blast_outfile
+        blast_rec._blast_alns = None
+        blast_rec._columns = df
+        blast_rec._tmpdir = tmpdir
+        return blast_rec
+
+    @property
+    def blast_outfile(self) -> Path:
+        """TSV format blast result file of record"""
+        return self._blast_outfile
 
     @property
     def alignments(self) -> list[BlastAlignment]:
         """Blast alignment results"""
+        if self._blast_alns is None:
+            if self._columns is None:
+                self._blast_alns = self._parse_alignments()
+            else:
+                self._blast_alns = self._build_alignments()
         return self._blast_alns
 
     @cached_property
     def top_hit_alignments(self) -> list[BlastAlignment]:
         """Top hit blast alignment results"""
-        top_hits = []
+        if self._columns is not None:
+            is_top_hit = ~self._columns["qaccver"].duplicated(keep="first")
+            return self._build_alignments(is_top_hit.to_numpy().nonzero()[0])
+
+        top_hits = set()
         top_hit_blast_results = []
-        for br in self._blast_alns:
+        for br in self.alignments:
             if br.qaccver in top_hits:
                 continue
-            top_hits.append(br.qaccver)
+            top_hits.add(br.qaccver)
             top_hit_blast_results.append(br)
         return top_hit_blast_results
 
+    @cached_property
+    def domain_hit_alignments(self) -> list[BlastAlignment]:
+        """Non-overlapping domain hit blast alignment results
+
+        For each query, hits are selected greedily in blast output order
+        (best hit first), skipping any hit whose query region (`qstart`-`qend`)
+        overlaps with already selected hits. Top hit is therefore always selected.
+        Selected regions are kept sorted by start position, so each overlap check
+        is a binary search (O(log K), K = number of selected hits per query).
+        Inserting a selected region into the sorted lists is O(K), which is cheap
+        since K (number of domains per query) is small in practice.
+        """
+        if self._columns is not None:
+            df = self._columns
+            hits = zip(
+                df["qaccver"].tolist(), df["qstart"].tolist(), df["qend"].tolist()
+            )
+            return self._build_alignments(_select_domain_hits(hits))
+
+        alns = self.alignments
+        hits = ((aln.qaccver, aln.qstart, aln.qend) for aln in alns)
+        return [alns[idx] for idx in _select_domain_hits(hits)]
+
+    def _parse_alignments(self) -> list[BlastAlignment]:
+        """Parse all alignments of blast result file"""
+        blast_alns: list[BlastAlignment] = []
+        keys = list(BlastAlignment.model_fields)
+        with xopen(self._blast_outfile, "rt") as f:
+            reader = csv.reader(f, delimiter="\t")
+            for row in reader:
+                # Ignore header line
+                if row[0].startswith("#"):
+                    continue
+                blast_alns.append(BlastAlignment(**dict(zip(keys, row))))  # type: ignore
+        return blast_alns
+
+    def _build_alignments(self, indices=None) -> list[BlastAlignment]:
+        """Build alignment objects from columnar alignments (No re-validation)"""
+        if self._columns is None:
+            raise ValueError("Columnar alignments are not loaded")
+        df = self._columns if indices is None else self._columns.iloc[indices]
+        fields = list(BlastAlignment.model_fields)
+        rows = zip(*(df[field].tolist() for field in fields))
+        return [
+            BlastAlignment.model_construct(**dict(zip(fields, row))) for row in rows
+        ]
+
+    def write(
+        self,
+        outfile: str | Path,
+        *,
+        top_hit_only: bool = False,
+        thread_num: int = 1,
+    ) -> None:
+        """Write blast alignment results as tsv format
+
+        If the original blast result file still exists, its lines are copied
+        as is (Keep rpsblast float format & no conversion of all alignments).
+        Otherwise, alignment results are streamed line by line to the output file.
+
+        Parameters
+        ----------
+        outfile : str | Path
+            Output tsv file (Compressed if suffix is `.gz` or `.zst`)
+        top_hit_only : bool, optional
+            If True, write only top hit alignment results
+        thread_num : int, optional
+            Number of zstd compression threads
+        """
+        outfile = Path(outfile)
+        src_file = self._blast_outfile
+        if src_file.exists():
+            is_same_file = outfile.exists() and outfile.samefile(src_file)
+            if not top_hit_only:
+                if is_same_file:
+                    return
+                if compress_format(outfile) == compress_format(src_file):
+                    shutil.copyfile(src_file, outfile)
+                else:
+                    with xopen(src_file, "rb") as fr:
+                        with xopen(outfile, "wb", threads=thread_num) as fw:
+                            shutil.copyfileobj(fr, fw)
+                return
+            if is_same_file:
+                raise ValueError(f"Can't overwrite source blast result ({outfile=})")
+            top_hit_queries = set()
+            with xopen(outfile, "wt", threads=thread_num) as fw:
+                with xopen(src_file, "rt") as fr:
+                    for line in fr:
+                        if line.startswith("#"):
+                            continue
+                        query = line.split("\t", 1)[0]
+                        if query in top_hit_queries:
+                            continue
+                        top_hit_queries.add(query)
+                        fw.write(line)
+            return
+
+        alns = self.top_hit_alignments if top_hit_only else self.alignments
+        with xopen(outfile, "wt", threads=thread_num) as f:
+            for aln in alns:
+                f.write(f"{aln.as_tsv}\n")
+
+    def __len__(self) -> int:
+        if self._columns is not None:
+            return len(self._columns)
+        return len(self.alignments)
+
     def __str__(self) -> str:
         return "\n".join([aln.as_tsv for aln in self.alignments])
+
+
+def _select_domain_hits(hits: Iterable[tuple[str, int, int]]) -> list[int]:
+    """Select non-overlapping domain hit indices from (query, qstart, qend) hits"""
+    query2hits: dict[str, list[tuple[int, int, int]]] = {}
+    for idx, (query, qstart, qend) in enumerate(hits):
+        query2hits.setdefault(query, []).append((idx, qstart, qend))
+
+    selected_indices = []
+    for query_hits in query2hits.values():
+        starts: list[int] = []
+        ends: list[int] = []
+        for idx, qstart, qend in query_hits:
+            start, end = sorted((qstart, qend))
+            pos = bisect.bisect_left(starts, start)
+            # Check overlap with previous and next selected regions
+            if pos > 0 and ends[pos - 1] >= start:
+                continue
+            if pos < len(starts) and starts[pos] <= end:
+                continue
+            starts.insert(pos, start)
+            ends.insert(pos, end)
+            selected_indices.append(idx)
+    return selected_indices
+
+
+@lru_cache(maxsize=None)
+def _get_tool_version(binary_name: str) -> str:
+    """Get BLAST+ tool version"""
+    try:
+        cmd = f"{binary_name} -version"
+        cmd_args = shlex.split(cmd)
+        cmd_res = sp.run(cmd_args, capture_output=True, text=True)
+        output = cmd_res.stderr if cmd_res.stdout == "" else cmd_res.stdout
+        version = re.findall(r"blast (\d+.\d+.\d+)", output, re.MULTILINE)[0]
+        return version
+    except Exception:
+        return const.UNKNOWN_VERSION
+
+
+def _split_line_aligned_ranges(file: Path, range_num: int) -> list[tuple[int, int]]:
+    """Split file into byte ranges (start, end) aligned to line boundaries"""
+    file_size = file.stat().st_size
+    bounds = [0]
+    with open(file, "rb") as f:
+        for i in range(1, range_num):
+            pos = file_size * i // range_num
+            if pos <= bounds[-1]:
+                continue
+            # Move to the start of the next line (pos itself if pos - 1 is newline)
+            f.seek(pos - 1)
+            end = pos - 1 + len(f.readline())
+            if bounds[-1] < end < file_size:
+                bounds.append(end)
+    bounds.append(file_size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _split_line_aligned_data_ranges(
+    data: bytes, range_num: int
+) -> list[tuple[int, int]]:
+    """Split in-memory data into byte ranges (start, end) aligned to line boundaries"""
+    bounds = [0]
+    for i in range(1, range_num):
+        pos = len(data) * i // range_num
+        if pos <= bounds[-1]:
+            continue
+        newline_pos = data.find(b"\n", pos - 1)
+        end = len(data) if newline_pos == -1 else newline_pos + 1
+        if bounds[-1] < end < len(data):
+            bounds.append(end)
+    bounds.append(len(data))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _read_tsv_range(file: Path, start: int, end: int) -> pd.DataFrame:
+    """Read byte range of tsv format blast result file as dataframe"""
+    with open(file, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return _parse_tsv_data(data)
+
+
+def _parse_tsv_data(data: bytes) -> pd.DataFrame:
+    """Parse tsv format blast result data as dataframe"""
+    import pandas as pd
+
+    # Ignore header lines
+    if b"#" in data:
+        data = re.sub(rb"(?m)^#.*(?:\n|$)", b"", data)
+
+    fields = BlastAlignment.model_fields
+    dtype = {name: field.annotation for name, field in fields.items()}
+    if data.strip() == b"":
+        return pd.DataFrame({name: pd.Series(dtype=t) for name, t in dtype.items()})
+    return pd.read_csv(
+        io.BytesIO(data),
+        sep="\t",
+        header=None,
+        names=list(fields),
+        dtype=dtype,
+        float_precision="round_trip",
+        encoding="utf-8",
+    )
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import csv
-import gzip
 import logging
+import tempfile
 from functools import cached_property
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, NamedTuple
 
-import pandas as pd
 from pydantic import BaseModel, ConfigDict
 
 from cogclassifier.blast import BlastAlignmentRecord
+from cogclassifier.compress import xopen
+from cogclassifier.fasta import IndexedFasta
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
 
 
 class CogFuncCategory(BaseModel):
@@ -146,6 +152,51 @@ class CogDefinitionRecord:
         """Get all COG ID"""
         return self._id_list
 
+    def get_unique_values(self, field: str) -> list[str]:
+        """Get unique values of COG definition field in definition order
+
+        Parameters
+        ----------
+        field : str
+            COG definition field name (e.g. `id`, `cog_name`, `gene_name`)
+
+        Returns
+        -------
+        values : list[str]
+            Unique field values
+        """
+        return list(dict.fromkeys(getattr(cd, field) for cd in self._cog_defs))
+
+    def select_ids(
+        self,
+        *,
+        letters: list[str] | None = None,
+        cog_ids: list[str] | None = None,
+    ) -> list[str]:
+        """Select COG IDs by COG letters and/or COG IDs
+
+        COG letter is matched with `one_letter` (Same as classification).
+
+        Parameters
+        ----------
+        letters : list[str] | None, optional
+            Target COG letters (e.g. `["V", "L", "X"]`)
+        cog_ids : list[str] | None, optional
+            Target COG IDs (IDs not found in COG definition are ignored)
+
+        Returns
+        -------
+        selected_ids : list[str]
+            Selected COG IDs (Union of letters & COG IDs selection)
+        """
+        target_letters = set() if letters is None else set(letters)
+        target_ids = set() if cog_ids is None else set(cog_ids)
+        return [
+            cd.id
+            for cd in self._cog_defs
+            if cd.one_letter in target_letters or cd.id in target_ids
+        ]
+
     def __str__(self) -> str:
         return "\n".join([cd.as_tsv for cd in self.get_all()])
 
@@ -161,8 +212,7 @@ class CogCddIdTable:
 
     def __init__(self, cddid_table_file: str | Path):
         cdd_id2cog_id, cog_id2cdd_id = dict(), dict()
-        xopen = gzip.open if Path(cddid_table_file).suffix == ".gz" else open
-        with xopen(cddid_table_file, mode="rt", encoding="utf-8") as f:
+        with xopen(cddid_table_file, "rt") as f:
             reader = csv.reader(f, delimiter="\t")
             for row in reader:
                 cdd_id, acc_id = row[0], row[1]
@@ -181,6 +231,37 @@ class CogCddIdTable:
         return self._cog_id2cdd_id[cogid]
 
 
+class CogClassification(NamedTuple):
+    """COG Classification Result Class (Compact tuple-backed record)"""
+
+    query_id: str
+    cog_id: str
+    cdd_id: str
+    evalue: float
+    identity: float
+    gene_name: str
+    cog_name: str
+    cog_letter: str
+    cog_description: str
+    qstart: int
+    qend: int
+
+
+CLASSIFY_COLUMNS = (
+    "QUERY_ID",
+    "COG_ID",
+    "CDD_ID",
+    "EVALUE",
+    "IDENTITY",
+    "GENE_NAME",
+    "COG_NAME",
+    "COG_LETTER",
+    "COG_DESCRIPTION",
+    "QSTART",
+    "QEND",
+)
+
+
 class CogClassifyStats:
     """COG Classify Result Statistics Class"""
 
@@ -191,34 +272,56 @@ class CogClassifyStats:
         cog_fc_rec: CogFuncCategoryRecord,
         cog_def_rec: CogDefinitionRecord,
         cog_cdd_id_table: CogCddIdTable,
+        *,
+        multi_domain: bool = False,
+        skipped_query_count: int = 0,
+        tmpdir: tempfile.TemporaryDirectory | None = None,
     ):
+        """
+        Parameters
+        ----------
+        query : str | Path
+            Query protein fasta file (Processed queries only if partial result)
+        blast_rec : BlastAlignmentRecord
+            RPS-BLAST alignment record
+        cog_fc_rec : CogFuncCategoryRecord
+            COG functional category record
+        cog_def_rec : CogDefinitionRecord
+            COG definition record
+        cog_cdd_id_table : CogCddIdTable
+            COG ID & CDD ID conversion table
+        multi_domain : bool, optional
+            If True, classify all non-overlapping domain hits per query
+            instead of top hit only
+        skipped_query_count : int, optional
+            Number of queries skipped without search (e.g. by time limit)
+        tmpdir : tempfile.TemporaryDirectory | None, optional
+            Temporary directory of query fasta (e.g. fixed query), which is kept
+            alive for the lifetime of stats
+        """
         self._query = query
         self.blast_rec = blast_rec
         self.cog_fc_rec = cog_fc_rec
         self.cog_def_rec = cog_def_rec
         self.cog_cdd_id_table = cog_cdd_id_table
+        self.multi_domain = multi_domain
+        self.skipped_query_count = skipped_query_count
+        self._tmpdir = tmpdir
 
     @cached_property
-    def classify_count(self) -> int:
-        """Number of COG classified sequence"""
-        return len(self.query_classify_df)
+    def classifications(self) -> list[CogClassification]:
+        """COG classification results (pandas-free core result)
 
-    @cached_property
-    def query_count(self) -> int:
-        """Number of query fasta sequence"""
-        with open(self._query) as f:
-            return len(list(filter(lambda line: line.startswith(">"), f.readlines())))
-
-    @cached_property
-    def classify_ratio(self) -> float:
-        """Ratio of COG classified sequence"""
-        return self.classify_count / self.query_count
+        If `multi_domain=True`, each non-overlapping domain hit of a query is
+        a classification result, otherwise top hit only.
+        """
+        if self.multi_domain:
+            alns = self.blast_rec.domain_hit_alignments
+        else:
+            alns = self.blast_rec.top_hit_alignments
 
-    @cached_property
-    def query_classify_df(self) -> pd.DataFrame:
-        """COG classified query dataframe"""
-        df_rows = []
-        for aln in self.blast_rec.top_hit_alignments:
+        classifications = []
+        for aln in alns:
             # Get query & CDD ID from rpsblast hits
             query_id, cdd_id = aln.qaccver, aln.saccver.replace("CDD:", "")
             # Convert CDD ID to COG ID
@@ -233,8 +336,8 @@ class CogClassifyStats:
                 continue
             # Get COG functional category by COG letter
             cog_fc = self.cog_fc_rec[cog_def.one_letter]
-            df_rows.append(
-                (
+            classifications.append(
+                CogClassification(
                     query_id,
                     cog_id,
                     cdd_id,
@@ -244,49 +347,248 @@ class CogClassifyStats:
                     cog_def.cog_name,
                     cog_def.one_letter,
                     cog_fc.desc,
-                ),
+                    aln.qstart,
+                    aln.qend,
+                )
             )
-        return pd.DataFrame(
-            df_rows,
-            columns=[
-                "QUERY_ID",
-                "COG_ID",
-                "CDD_ID",
-                "EVALUE",
-                "IDENTITY",
-                "GENE_NAME",
-                "COG_NAME",
-                "COG_LETTER",
-                "COG_DESCRIPTION",
-            ],
-        )
+        return classifications
+
+    @cached_property
+    def letter_counts(self) -> dict[str, int]:
+        """Number of COG classified sequence per letter (All letters included)
+
+        If `multi_domain=True`, a sequence with multiple domains of different
+        letters is counted in each letter.
+        """
+        letter2count = {letter: 0 for letter in self.cog_fc_rec.get_letters()}
+        query_letter_pairs = {(c.query_id, c.cog_letter) for c in self.classifications}
+        for _, letter in query_letter_pairs:
+            letter2count[letter] += 1
+        return letter2count
+
+    @cached_property
+    def letter_domain_counts(self) -> dict[str, int]:
+        """Number of COG classified domain per letter (All letters included)"""
+        letter2count = {letter: 0 for letter in self.cog_fc_rec.get_letters()}
+        for c in self.classifications:
+            letter2count[c.cog_letter] += 1
+        return letter2count
+
+    @cached_property
+    def classify_count(self) -> int:
+        """Number of COG classified sequence"""
+        return len({c.query_id for c in self.classifications})
+
+    @property
+    def query_file(self) -> Path:
+        """Query fasta file (Processed queries only if partial result)"""
+        return Path(self._query)
+
+    @cached_property
+    def query_fasta(self) -> IndexedFasta:
+        """Indexed query fasta (Built once & shared by count and sequence export)
+
+        Memory-mapped query fasta is kept open until `close()` is called.
+        """
+        return IndexedFasta(self._query)
+
+    def close(self) -> None:
+        """Close indexed query fasta (Re-opened on next access)"""
+        query_fasta: IndexedFasta | None = self.__dict__.pop("query_fasta", None)
+        if query_fasta is not None:
+            query_fasta.close()
+
+    @cached_property
+    def query_count(self) -> int:
+        """Number of query fasta sequence (Processed queries only if partial)"""
+        return self.query_fasta.record_count
+
+    @property
+    def is_partial(self) -> bool:
+        """Partial result or not (Some queries are skipped without search)"""
+        return self.skipped_query_count > 0
+
+    @cached_property
+    def classify_ratio(self) -> float:
+        """Ratio of COG classified sequence (0 if no query is processed)"""
+        if self.query_count == 0:
+            return 0.0
+        return self.classify_count / self.query_count
+
+    @cached_property
+    def query_classify_df(self) -> pd.DataFrame:
+        """COG classified query dataframe (Lazy conversion of `classifications`)
+
+        Repeated string columns are built as categoricals to reduce memory usage.
+        Categories are fixed by definition tables, so dtypes are the same between
+        runs (e.g. for `pd.concat`). `COG_LETTER` & `COG_DESCRIPTION` categories are
+        all COG functional categories (in `CogFuncCategoryRecord` order), and
+        `COG_ID`, `COG_NAME` & `GENE_NAME` categories are all COG definition values
+        (in `CogDefinitionRecord` order).
+        Output of `to_csv` is the same as plain object string columns.
+
+        If `multi_domain=True`, each non-overlapping domain hit of a query is
+        a row, and `QSTART` & `QEND` columns of the domain region are appended.
+        """
+        import pandas as pd
+
+        columns = list(CLASSIFY_COLUMNS)
+        if not self.multi_domain:
+            columns = columns[:-2]
+        if len(self.classifications) == 0:
+            return pd.DataFrame([], columns=columns)
+
+        name2values = dict(zip(CLASSIFY_COLUMNS, zip(*self.classifications)))
+        cog_fcs = self.cog_fc_rec.get_all()
+        name2dtype = {
+            "COG_LETTER": pd.CategoricalDtype([fc.letter for fc in cog_fcs]),
+            "COG_DESCRIPTION": pd.CategoricalDtype([fc.desc for fc in cog_fcs]),
+        }
+        for name, field in (
+            ("COG_ID", "id"),
+            ("COG_NAME", "cog_name"),
+            ("GENE_NAME", "gene_name"),
+        ):
+            categories = self.cog_def_rec.get_unique_values(field)
+            name2dtype[name] = pd.CategoricalDtype(categories)
+        data = {}
+        for name in columns:
+            values = name2values[name]
+            if name in name2dtype:
+                data[name] = pd.Categorical(values, dtype=name2dtype[name])
+            else:
+                data[name] = values
+        return pd.DataFrame(data, columns=columns)
 
     @cached_property
     def count_summary_df(self) -> pd.DataFrame:
-        """Summary COG classification count result dataframe"""
+        """Summary COG classification count result dataframe
+
+        If `multi_domain=True`, `COUNT` is number of sequences with at least one
+        domain classified into each letter, and `DOMAIN_COUNT` column
+        (number of classified domains) is appended.
+        """
+        import pandas as pd
+
         df_rows = []
         for cog_fc in self.cog_fc_rec.get_all():
-            count = (
-                self.query_classify_df["COG_LETTER"]
-                .value_counts()
-                .get(cog_fc.letter, 0)
-            )
-            df_rows.append(
-                (
-                    cog_fc.letter,
-                    count,
-                    cog_fc.group,
-                    cog_fc.color,
-                    cog_fc.desc,
-                )
+            df_row = (
+                cog_fc.letter,
+                self.letter_counts[cog_fc.letter],
+                cog_fc.group,
+                cog_fc.color,
+                cog_fc.desc,
             )
+            if self.multi_domain:
+                df_row = (*df_row, self.letter_domain_counts[cog_fc.letter])
+            df_rows.append(df_row)
+
+        columns = ["LETTER", "COUNT", "GROUP", "COLOR", "DESCRIPTION"]
+        if self.multi_domain:
+            columns.append("DOMAIN_COUNT")
+        return pd.DataFrame(df_rows, columns=columns)
+
+    def estimate_proportions(
+        self,
+        *,
+        bootstrap_num: int = 1000,
+        confidence: float = 0.95,
+        seed: int = 0,
+    ) -> pd.DataFrame:
+        """Estimate COG letter proportions with bootstrap confidence intervals
+
+        Proportion of each letter is letter count / total letter count (Same as
+        ratio of count charts). Query sequences (including unclassified ones)
+        are resampled with replacement by multinomial bootstrap, and percentile
+        confidence interval of each letter proportion is calculated.
+        This is mainly used to estimate whole genome COG profile from sampled
+        query sequences (`CogClassifier` sampling mode).
+
+        Parameters
+        ----------
+        bootstrap_num : int, optional
+            Number of bootstrap replicates
+        confidence : float, optional
+            Confidence level of interval (`0 < confidence < 1`)
+        seed : int, optional
+            Random seed of bootstrap
+
+        Returns
+        -------
+        df : pd.DataFrame
+            COG letter proportion dataframe
+            (`LETTER`, `COUNT`, `PROPORTION`, `CI_LOWER`, `CI_UPPER`, `DESCRIPTION`)
+        """
+        import numpy as np
+        import pandas as pd
+
+        if bootstrap_num < 1:
+            raise ValueError(f"{bootstrap_num=} is invalid (bootstrap_num >= 1)")
+        if not 0 < confidence < 1:
+            raise ValueError(f"{confidence=} is invalid (0 < confidence < 1)")
+
+        # Classified query x letter indicator matrix
+        letters = self.cog_fc_rec.get_letters()
+        letter2idx = {letter: idx for idx, letter in enumerate(letters)}
+        query2row: dict[str, int] = {}
+        for c in self.classifications:
+            query2row.setdefault(c.query_id, len(query2row))
+        indicator = np.zeros((len(query2row), len(letters)), dtype=np.int64)
+        for c in self.classifications:
+            indicator[query2row[c.query_id], letter2idx[c.cog_letter]] = 1
+        counts = indicator.sum(axis=0)
+
+        # Resampled weights of classified queries & all unclassified queries
+        query_count = max(self.query_count, len(query2row))
+        classified_count = len(query2row)
+        pvals = np.full(classified_count + 1, 1 / max(query_count, 1))
+        pvals[-1] = (query_count - classified_count) / max(query_count, 1)
+        rng = np.random.default_rng(seed)
+        boot_proportions = []
+        for batch_start in range(0, bootstrap_num, 100):
+            batch_size = min(100, bootstrap_num - batch_start)
+            weights = rng.multinomial(query_count, pvals, size=batch_size)
+            boot_counts = weights[:, :classified_count] @ indicator
+            totals = boot_counts.sum(axis=1, keepdims=True)
+            boot_proportions.append(boot_counts / np.where(totals == 0, 1, totals))
+        alpha = (1 - confidence) / 2
+        ci_lower, ci_upper = np.quantile(
+            np.vstack(boot_proportions), [alpha, 1 - alpha], axis=0
+        )
+
+        total = counts.sum()
         return pd.DataFrame(
-            df_rows,
-            columns=[
-                "LETTER",
-                "COUNT",
-                "GROUP",
-                "COLOR",
-                "DESCRIPTION",
-            ],
+            {
+                "LETTER": letters,
+                "COUNT": counts,
+                "PROPORTION": counts / total if total > 0 else np.zeros(len(letters)),
+                "CI_LOWER": ci_lower,
+                "CI_UPPER": ci_upper,
+                "DESCRIPTION": [self.cog_fc_rec[letter].desc for letter in letters],
+            }
         )
+
+    def to_arrow(self) -> pa.Table:
+        """Convert COG classification results to Arrow table (`pyarrow` required)"""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("pyarrow is required to convert to Arrow table") from e
+
+        columns = list(CLASSIFY_COLUMNS)
+        if not self.multi_domain:
+            columns = columns[:-2]
+        arrays = {
+            name: [c[idx] for c in self.classifications]
+            for idx, name in enumerate(columns)
+        }
+        return pa.table(arrays)
+
+    def __iter__(self) -> Iterator[CogClassification]:
+        return iter(self.classifications)
+
+    def __enter__(self) -> CogClassifyStats:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import gzip
+import io
+import queue
+import threading
+from pathlib import Path
+from typing import IO, Any
+
+COMPRESS_FORMATS = ("gz", "zst")
+
+
+def compressed_name(name: str, compress: str | None) -> str:
+    """Output file name with compression suffix (e.g. `cog_classify.tsv.gz`)"""
+    if compress is None:
+        return name
+    if compress not in COMPRESS_FORMATS:
+        raise ValueError(f"{compress=} is invalid ({COMPRESS_FORMATS=})")
+    return f"{name}.{compress}"
+
+
+def compress_format(file: str | Path) -> str | None:
+    """Compression format of file inferred from suffix (None if not compressed)"""
+    suffix = Path(file).suffix.lstrip(".")
+    return suffix if suffix in COMPRESS_FORMATS else None
+
+
+def xopen(
+    file: str | Path,
+    mode: str = "rt",
+    *,
+    encoding: str | None = "utf-8",
+    level: int | None = None,
+    threads: int = 1,
+) -> IO[Any]:
+    """Open plain, gzip (`.gz`) or zstd (`.zst`) file transparently by suffix
+
+    On writing compressed file, compression is done in a background thread,
+    so that the caller is not blocked by compression. Zstd compression is
+    additionally multi-threaded by `threads` (`zstandard` package is required).
+
+    Parameters
+    ----------
+    file : str | Path
+        Target file
+    mode : str, optional
+        Open mode (`rt`|`rb`|`wt`|`wb`)
+    encoding : str | None, optional
+        Text encoding (Only used in text mode)
+    level : int | None, optional
+        Compression level (By default, gzip=6, zstd=3)
+    threads : int, optional
+        Number of zstd compression threads (If -1, all CPUs are used)
+
+    Returns
+    -------
+    f : IO[Any]
+        File object
+    """
+    if mode not in ("r", "rt", "rb", "w", "wt", "wb"):
+        raise ValueError(f"{mode=} is invalid")
+    is_text = "b" not in mode
+    is_write = mode.startswith("w")
+    encoding = encoding if is_text else None
+    fmt = compress_format(file)
+    if fmt is None:
+        return open(file, mode, encoding=encoding)
+
+    if not is_write:
+        if fmt == "gz":
+            fr: IO[Any] = gzip.open(file, "rb")
+        else:
+            fr = _import_zstandard().open(file, "rb")
+        return io.TextIOWrapper(fr, encoding=encoding) if is_text else fr
+
+    fw = io.BufferedWriter(
+        _BackgroundCompressWriter(file, fmt, level=level, threads=threads),
+        buffer_size=1024 * 1024,
+    )
+    return io.TextIOWrapper(fw, encoding=encoding) if is_text else fw
+
+
+class _BackgroundCompressWriter(io.RawIOBase):
+    """Writable binary stream compressed & written by background thread"""
+
+    def __init__(
+        self,
+        file: str | Path,
+        fmt: str,
+        *,
+        level: int | None = None,
+        threads: int = 1,
+        max_queue_size: int = 16,
+    ):
+        self._file = open(file, "wb")
+        if fmt == "gz":
+            level = 6 if level is None else level
+            self._writer: IO[bytes] = gzip.GzipFile(
+                fileobj=self._file, mode="wb", compresslevel=level
+            )
+        else:
+            zstd = _import_zstandard()
+            level = 3 if level is None else level
+            cctx = zstd.ZstdCompressor(level=level, threads=threads)
+            self._writer = cctx.stream_writer(self._file, closefd=False)
+        self._queue: queue.Queue[bytes | None] = queue.Queue(maxsize=max_queue_size)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def writable(self) -> bool:
+        """Return True (Writable stream)"""
+        return True
+
+    def write(self, b) -> int:
+        """Queue bytes to be compressed by background thread"""
+        self._raise_if_error()
+        data = bytes(b)
+        self._queue.put(data)
+        return len(data)
+
+    def close(self) -> None:
+        """Wait for background compression & close file"""
+        if self.closed:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        try:
+            self._writer.close()
+        finally:
+            self._file.close()
+            super().close()
+        self._raise_if_error()
+
+    def _run(self) -> None:
+        while True:
+            data = self._queue.get()
+            if data is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self._writer.write(data)
+            except BaseException as e:
+                self._error = e
+
+    def _raise_if_error(self) -> None:
+        if self._error is not None:
+            raise OSError(f"Failed to compress {self._file.name}") from self._error
+
+
+def _import_zstandard():
+    """Import optional `zstandard` package for zstd compression"""
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "zstd compression requires 'zstandard' package "
+            "(pip install cogclassifier[zstd])"
+        ) from e
+    return zstandard
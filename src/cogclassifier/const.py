@@ -6,6 +6,7 @@ COG_DEF_FTP = "https://ftp.ncbi.nih.gov/pub/COG/COG2024/data/cog-24.def.tab"
 
 CDDID_TBL_FTP = "https://ftp.ncbi.nih.gov/pub/mmdb/cdd/cddid.tbl.gz"
 COG_LE_FTP = "https://ftp.ncbi.nih.gov/pub/mmdb/cdd/little_endian/Cog_LE.tar.gz"
+CDD_FTP = "https://ftp.ncbi.nih.gov/pub/mmdb/cdd/cdd.tar.gz"
 
 RESOURCES_DIR = Path(__file__).parent / "resources"
 COG_FUNC_CATEGORY_FILE = RESOURCES_DIR / "cog_func_category.tsv"
@@ -0,0 +1,472 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import random
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from cogclassifier.cog import CogClassifyStats
+
+EXPORT_KEYS = ("letter", "cog_id")
+
+# IUPAC amino acid letters (including J, U, O), stop codon `*` & gap `-`
+PROTEIN_CHARS = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz*-"
+NON_PROTEIN_CHARS = bytes(c for c in range(256) if c not in PROTEIN_CHARS)
+NUCLEOTIDE_CHARS = b"ACGTUNacgtun"
+# Min length of nucleotide-like sequence (Short peptides of ACGTN letters are valid)
+MIN_NUCLEOTIDE_LIKE_LENGTH = 100
+FASTA_ISSUES = (
+    "empty_record",
+    "duplicate_id",
+    "pipe_header",
+    "invalid_residue",
+    "nucleotide_like",
+)
+# Issues tolerated by rpsblast (Records are skipped or rewritten with warning)
+TOLERATED_FASTA_ISSUES = ("empty_record", "pipe_header", "invalid_residue")
+
+
+class FastaValidation(BaseModel):
+    """Fasta Validation Result Class"""
+
+    record_count: int = 0  # Number of all records
+    seq_count: int = 0  # Number of valid (or fixed) records
+    residue_count: int = 0  # Number of residues of valid (or fixed) records
+    max_seq_length: int = 0
+    issue_counts: dict[str, int] = {}
+    issue_examples: dict[str, list[str]] = {}  # Example IDs (Max 5) of each issue
+    fixed: bool = False
+
+    @property
+    def is_valid(self) -> bool:
+        """If True, no issues are found"""
+        return len(self.issue_counts) == 0
+
+    @property
+    def fatal_issues(self) -> list[str]:
+        """Issues not tolerated by rpsblast (or results of records are merged)"""
+        return [i for i in self.issue_counts if i not in TOLERATED_FASTA_ISSUES]
+
+    @property
+    def as_message(self) -> str:
+        """Validation result message for logging"""
+        msg = f"{self.seq_count} sequences ({self.residue_count} residues)"
+        if self.is_valid:
+            return f"{msg}, no issues are found"
+        action = "fixed" if self.fixed else "found"
+        issues = ", ".join(
+            f"{issue}={self.issue_counts[issue]} (e.g. {self.issue_examples[issue]})"
+            for issue in FASTA_ISSUES
+            if issue in self.issue_counts
+        )
+        return f"{msg}, issues are {action}: {issues}"
+
+    def _add_issue(self, issue: str, seq_id: str) -> None:
+        self.issue_counts[issue] = self.issue_counts.get(issue, 0) + 1
+        examples = self.issue_examples.setdefault(issue, [])
+        if len(examples) < 5:
+            examples.append(seq_id)
+
+
+def validate_fasta(
+    fasta_file: str | Path,
+    *,
+    fix_outfile: str | Path | None = None,
+) -> FastaValidation:
+    """Validate (& fix) query protein fasta file in a single streaming pass
+
+    Sequences are streamed record by record, and only the set of seen IDs grows
+    with the number of records (for duplicate ID check). Issues are below.
+    `duplicate_id` & `nucleotide_like` are fatal issues (`fatal_issues`),
+    and the others are tolerated by rpsblast.
+
+    - `empty_record`: No sequence or no ID record (Fix: removed)
+    - `duplicate_id`: Second or later record of same ID (Fix: removed)
+    - `pipe_header`: ID contains `|`, which rpsblast rewrites (Fix: `|` => `_`)
+    - `invalid_residue`: Non amino acid characters (Fix: characters removed)
+    - `nucleotide_like`: Sequence of `MIN_NUCLEOTIDE_LIKE_LENGTH` or more residues
+      consists of nucleotide letters only (Fix: removed)
+
+    Duplicate IDs are checked against original IDs, or rewritten IDs if fixed.
+
+    Sequence & residue counts are used for scheduling of time limited search.
+
+    Parameters
+    ----------
+    fasta_file : str | Path
+        Query protein fasta file
+    fix_outfile : str | Path | None, optional
+        If set, write fixed fasta file (Written atomically)
+
+    Returns
+    -------
+    validation : FastaValidation
+        Fasta validation result
+    """
+    result = FastaValidation(fixed=fix_outfile is not None)
+    seen_ids: set[str] = set()
+
+    def check_record(header: bytes, seq_lines: list[bytes]) -> bytes | None:
+        """Check record & return fixed record (None if record is removed)"""
+        result.record_count += 1
+        fields = header[1:].split(maxsplit=1)
+        seq_id = fields[0].decode("utf-8", errors="replace") if fields else ""
+        seq = b"".join(seq_lines)
+        if seq_id == "" or len(seq) == 0:
+            result._add_issue("empty_record", seq_id)
+            return None
+        if "|" in seq_id:
+            result._add_issue("pipe_header", seq_id)
+            if result.fixed:
+                seq_id = seq_id.replace("|", "_")
+                header = b">" + b" ".join([fields[0].replace(b"|", b"_"), *fields[1:]])
+        if seq_id in seen_ids:
+            result._add_issue("duplicate_id", seq_id)
+            return None
+        seen_ids.add(seq_id)
+        if len(seq) >= MIN_NUCLEOTIDE_LIKE_LENGTH and (
+            len(seq.translate(None, NUCLEOTIDE_CHARS)) == 0
+        ):
+            result._add_issue("nucleotide_like", seq_id)
+            return None
+        if len(seq.translate(None, PROTEIN_CHARS)) > 0:
+            result._add_issue("invalid_residue", seq_id)
+            seq_lines = [line.translate(None, NON_PROTEIN_CHARS) for line in seq_lines]
+            seq = b"".join(seq_lines)
+            if len(seq) == 0:
+                return None
+        result.seq_count += 1
+        result.residue_count += len(seq)
+        result.max_seq_length = max(result.max_seq_length, len(seq))
+        return format_fasta_record(header, seq_lines)
+
+    fix_outfile = None if fix_outfile is None else Path(fix_outfile)
+    fw = None
+    if fix_outfile is not None:
+        tmp_file = fix_outfile.with_name(f".{fix_outfile.name}.{os.getpid()}.tmp")
+        fw = open(tmp_file, "wb")
+    try:
+        for header, seq_lines in iter_fasta_records(fasta_file):
+            record = check_record(header, seq_lines)
+            if fw is not None and record is not None:
+                fw.write(record)
+        if fw is not None:
+            fw.close()
+            os.replace(tmp_file, fix_outfile)  # type: ignore
+    finally:
+        if fw is not None:
+            fw.close()
+            Path(tmp_file).unlink(missing_ok=True)
+    return result
+
+
+def split_fasta(
+    fasta_file: str | Path,
+    outdir: str | Path,
+    chunk_num: int,
+) -> list[Path]:
+    """Split fasta file into contiguous chunks of nearly equal residue count
+
+    Record order is kept (Concatenated chunks are the same records as input).
+
+    Parameters
+    ----------
+    fasta_file : str | Path
+        Input fasta file
+    outdir : str | Path
+        Output directory (`chunk_{index}.faa` files are written)
+    chunk_num : int
+        Max number of chunks
+
+    Returns
+    -------
+    chunk_files : list[Path]
+        Chunk fasta files (Fewer than `chunk_num` if records are few)
+    """
+    total_residue_count = sum(
+        sum(map(len, seq_lines)) for _, seq_lines in iter_fasta_records(fasta_file)
+    )
+    chunk_residue_count = max(total_residue_count / max(chunk_num, 1), 1)
+
+    os.makedirs(outdir, exist_ok=True)
+    chunk_files: list[Path] = []
+    residue_count, chunk_idx = 0, -1
+    fw = None
+    try:
+        for header, seq_lines in iter_fasta_records(fasta_file):
+            idx = min(int(residue_count / chunk_residue_count), chunk_num - 1)
+            if fw is None or idx > chunk_idx:
+                if fw is not None:
+                    fw.close()
+                chunk_idx = idx
+                chunk_file = Path(outdir) / f"chunk_{len(chunk_files)}.faa"
+                chunk_files.append(chunk_file)
+                fw = open(chunk_file, "wb")
+            fw.write(format_fasta_record(header, seq_lines))
+            residue_count += sum(map(len, seq_lines))
+    finally:
+        if fw is not None:
+            fw.close()
+    return chunk_files
+
+
+def sample_fasta(
+    fasta_file: str | Path,
+    outfile: str | Path,
+    *,
+    size: int | None = None,
+    fraction: float | None = None,
+    seed: int = 0,
+) -> tuple[int, int]:
+    """Sample fasta records randomly in a single streaming pass (Reproducible by seed)
+
+    If `size` is set, fixed number of records are sampled by reservoir sampling
+    (Only sampled records are kept in memory). If `fraction` is set, each record
+    is sampled independently with probability `fraction`.
+    Sampled records are written in input order (Written atomically).
+
+    Parameters
+    ----------
+    fasta_file : str | Path
+        Input fasta file
+    outfile : str | Path
+        Output sampled fasta file
+    size : int | None, optional
+        Number of sampled records (All records if fewer than `size`)
+    fraction : float | None, optional
+        Fraction of sampled records (`0 < fraction <= 1`)
+    seed : int, optional
+        Random seed
+
+    Returns
+    -------
+    sample_count : int
+        Number of sampled records
+    record_count : int
+        Number of input records
+    """
+    if (size is None) == (fraction is None):
+        raise ValueError("Either size or fraction must be set")
+    if size is not None and size <= 0:
+        raise ValueError(f"{size=} is invalid (size > 0)")
+    if fraction is not None and not 0 < fraction <= 1:
+        raise ValueError(f"{fraction=} is invalid (0 < fraction <= 1)")
+
+    rng = random.Random(seed)
+    reservoir: list[tuple[int, bytes]] = []
+    record_count, sample_count = 0, 0
+    outfile = Path(outfile)
+    tmp_file = outfile.with_name(f".{outfile.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_file, "wb") as fw:
+            records = iter_fasta_records(fasta_file)
+            for idx, (header, seq_lines) in enumerate(records):
+                record_count += 1
+                if fraction is not None:
+                    if rng.random() < fraction:
+                        fw.write(format_fasta_record(header, seq_lines))
+                        sample_count += 1
+                elif idx < size:  # type: ignore
+                    reservoir.append((idx, format_fasta_record(header, seq_lines)))
+                else:
+                    replace_idx = rng.randint(0, idx)
+                    if replace_idx < size:  # type: ignore
+                        reservoir[replace_idx] = (
+                            idx,
+                            format_fasta_record(header, seq_lines),
+                        )
+            for _, record in sorted(reservoir):
+                fw.write(record)
+                sample_count += 1
+        os.replace(tmp_file, outfile)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+    return sample_count, record_count
+
+
+class IndexedFasta:
+    """Indexed Fasta Reader Class
+
+    Byte-offset index (ID -> record start/end offset) is built in a single pass
+    over the memory-mapped fasta file. Records are then sliced directly from
+    the memory-mapped file without rescanning it.
+    """
+
+    def __init__(self, fasta_file: str | Path):
+        """
+        Parameters
+        ----------
+        fasta_file : str | Path
+            Fasta file
+        """
+        self._fasta_file = Path(fasta_file)
+        self._file = open(self._fasta_file, "rb")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._mm: mmap.mmap | bytes = b""
+        else:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        id2offsets: dict[str, tuple[int, int]] = {}
+        record_count = 0
+        mm, size = self._mm, len(self._mm)
+        start = 0 if mm[:1] == b">" else mm.find(b"\n>")
+        if start > 0:
+            start += 1
+        while start != -1 and start < size:
+            end = mm.find(b"\n>", start)
+            end = size if end == -1 else end + 1
+            header_end = mm.find(b"\n", start, end)
+            header_end = end if header_end == -1 else header_end
+            header = mm[start + 1 : header_end].decode("utf-8", errors="replace")
+            header = header.strip()
+            seq_id = header.split(maxsplit=1)[0] if header != "" else ""
+            # Duplicate ID record is counted, but only first record is indexed
+            if seq_id not in id2offsets:
+                id2offsets[seq_id] = (start, end)
+            else:
+                logger = logging.getLogger(__name__)
+                logger.debug(f"Duplicate ID '{seq_id}' is found in {fasta_file}")
+            record_count += 1
+            start = end if end < size else -1
+
+        self._id2offsets = id2offsets
+        self._record_count = record_count
+
+    @property
+    def fasta_file(self) -> Path:
+        """Fasta file"""
+        return self._fasta_file
+
+    @property
+    def record_count(self) -> int:
+        """Number of fasta records (including duplicate ID records)"""
+        return self._record_count
+
+    @property
+    def ids(self) -> list[str]:
+        """Fasta record IDs"""
+        return list(self._id2offsets.keys())
+
+    def get_record(self, seq_id: str) -> bytes:
+        """Get target ID fasta record (header & sequence lines) as is"""
+        start, end = self._id2offsets[seq_id]
+        record = self._mm[start:end]
+        return record if record.endswith(b"\n") else record + b"\n"
+
+    def get_seq(self, seq_id: str) -> str:
+        """Get target ID sequence"""
+        record = self.get_record(seq_id)
+        seq_lines = record.decode("utf-8", errors="replace").splitlines()[1:]
+        return "".join(line.strip() for line in seq_lines)
+
+    def close(self) -> None:
+        """Close memory-mapped fasta file"""
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> IndexedFasta:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._id2offsets)
+
+    def __contains__(self, seq_id: str) -> bool:
+        return seq_id in self._id2offsets
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._id2offsets)
+
+
+def export_cog_fasta(
+    stats: CogClassifyStats,
+    outdir: str | Path,
+    *,
+    by: str = "letter",
+) -> list[Path]:
+    """Export classified query sequences per COG letter or COG ID
+
+    Output files are written as `{outdir}/{letter or COG ID}.faa`.
+    Query sequences are sliced from indexed query fasta (no rescan of query fasta).
+
+    Parameters
+    ----------
+    stats : CogClassifyStats
+        COG classification result statistics
+    outdir : str | Path
+        Output directory
+    by : str, optional
+        Export key (`letter`|`cog_id`)
+
+    Returns
+    -------
+    outfiles : list[Path]
+        Exported fasta files
+    """
+    if by not in EXPORT_KEYS:
+        raise ValueError(f"{by=} is invalid ({EXPORT_KEYS=})")
+
+    # Group query IDs by export key (Ignore duplicates in multi-domain mode)
+    key2query_ids: dict[str, dict[str, None]] = {}
+    for c in stats.classifications:
+        key = c.cog_letter if by == "letter" else c.cog_id
+        key2query_ids.setdefault(key, {})[c.query_id] = None
+
+    os.makedirs(outdir, exist_ok=True)
+    fasta = stats.query_fasta
+    outfiles = []
+    for key, query_ids in key2query_ids.items():
+        outfile = Path(outdir) / f"{key}.faa"
+        with open(outfile, "wb") as f:
+            for query_id in query_ids:
+                f.write(fasta.get_record(query_id))
+        outfiles.append(outfile)
+    return outfiles
+
+
+def iter_fasta_records(fasta_file: str | Path) -> Iterator[tuple[bytes, list[bytes]]]:
+    """Iterate fasta records as (header line, stripped sequence lines) in file order
+
+    Streaming fasta parser shared by validation, split, sampling, chunking and
+    search progress monitoring (Only the current record is kept in memory).
+    """
+    header: bytes | None = None
+    seq_lines: list[bytes] = []
+    with open(fasta_file, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith(b">"):
+                if header is not None:
+                    yield header, seq_lines
+                header, seq_lines = line, []
+            elif header is not None:
+                seq_lines.append(line)
+    if header is not None:
+        yield header, seq_lines
+
+
+def format_fasta_record(header: bytes, seq_lines: list[bytes]) -> bytes:
+    """Format fasta record bytes (Empty sequence lines are removed)"""
+    return b"\n".join([header, *(line for line in seq_lines if line)]) + b"\n"
+
+
+def chunk_fasta_records(
+    fasta_file: str | Path, chunk_size: int
+) -> Iterator[list[tuple[bytes, list[bytes]]]]:
+    """Iterate chunks of `chunk_size` fasta records in file order"""
+    records: list[tuple[bytes, list[bytes]]] = []
+    for record in iter_fasta_records(fasta_file):
+        records.append(record)
+        if len(records) == chunk_size:
+            yield records
+            records = []
+    if records:
+        yield records
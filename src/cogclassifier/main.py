@@ -2,16 +2,45 @@ from __future__ import annotations
 
 import logging
 import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from pathlib import Path
+from typing import Callable
 
 from cogclassifier import const, utils
-from cogclassifier.blast import RpsBlast
+from cogclassifier.backend import SearchBackend, get_backend
+from cogclassifier.blast import BlastAlignmentRecord, RpsBlastProgress
 from cogclassifier.cog import (
     CogCddIdTable,
     CogClassifyStats,
     CogDefinitionRecord,
     CogFuncCategoryRecord,
 )
+from cogclassifier.compress import xopen
+from cogclassifier.fasta import (
+    FastaValidation,
+    chunk_fasta_records,
+    format_fasta_record,
+    iter_fasta_records,
+    sample_fasta,
+    validate_fasta,
+)
+from cogclassifier.manifest import (
+    RunManifest,
+    file_digest,
+    fingerprint,
+    stat_fingerprint,
+)
+from cogclassifier.metrics import (
+    CACHE_HITS,
+    RESOURCE_LOAD_SECONDS,
+    record_classify_stats,
+)
+from cogclassifier.subset import build_subset_db
+from cogclassifier.utils import StageProfiler, profile_stage
 
 
 class CogClassifier:
@@ -24,7 +53,85 @@ class CogClassifier:
         download_dir: str | Path | None = None,
         thread_num: int | None = None,
         evalue: float = 1e-2,
+        rpsblast_outfile: str | Path | None = None,
+        multi_domain: bool = False,
+        progress_callback: Callable[[RpsBlastProgress], None] | None = None,
+        rpsblast_file: str | Path | None = None,
+        force: bool = False,
+        subset_letters: list[str] | None = None,
+        subset_cog_ids: list[str] | None = None,
+        fix_query: bool = False,
+        profile_dir: str | Path | None = None,
+        backend: str | SearchBackend = "rpsblast",
+        update_resources: bool = False,
+        keep_archive: bool = False,
+        sample_size: int | None = None,
+        sample_fraction: float | None = None,
+        sample_seed: int = 0,
+        time_limit: float | None = None,
+        chunk_size: int = 500,
     ):
+        """
+        Parameters
+        ----------
+        query : str | Path
+            Query protein fasta file
+        download_dir : str | Path | None, optional
+            Download COG & CDD resources directory
+        thread_num : int | None, optional
+            RPS-BLAST num_thread parameter
+        evalue : float, optional
+            RPS-BLAST e-value parameter
+        rpsblast_outfile : str | Path | None, optional
+            RPS-BLAST result output file (If None, written to temporary directory)
+        multi_domain : bool, optional
+            If True, classify all non-overlapping domain hits per query
+        progress_callback : Callable[[RpsBlastProgress], None] | None, optional
+            Callback function called with RPS-BLAST search progress periodically
+        rpsblast_file : str | Path | None, optional
+            Existing RPS-BLAST result file of query. If set, RPS-BLAST search is
+            skipped & existing hits are reclassified (Only `cddid.tbl.gz` is downloaded)
+        force : bool, optional
+            If `rpsblast_outfile` is set, RPS-BLAST search is skipped when the run
+            manifest in its directory is up to date. If True, always re-run search.
+        subset_letters : list[str] | None, optional
+            If set, search against subset database of target COG letters profiles
+            (`makeprofiledb` & CDD profiles `cdd.tar.gz` download are required)
+        subset_cog_ids : list[str] | None, optional
+            If set, search against subset database of target COG IDs profiles
+        fix_query : bool, optional
+            Query fasta is validated before RPS-BLAST search, and query with fatal
+            issues (e.g. duplicate IDs) raises ValueError. Issues tolerated by
+            rpsblast (e.g. `|` in IDs) are warned only. If True, search fixed
+            query fasta instead (`query_fixed.faa` in `rpsblast_outfile` directory)
+        profile_dir : str | Path | None, optional
+            If set, profile each stage by cProfile & tracemalloc, and write
+            `{stage}.pstats` & `{stage}.alloc.txt` in profile directory
+        backend : str | SearchBackend, optional
+            Search backend or registered backend name (`rpsblast`|`sharded`|...).
+            If `rpsblast_file` is set, `precomputed` backend is always used.
+        update_resources : bool, optional
+            If True, check freshness of downloaded NCBI resources by HTTP HEAD
+            request, and re-download & re-build only changed resources
+        keep_archive : bool, optional
+            If True, keep downloaded `Cog_LE.tar.gz` archive after extraction
+        sample_size : int | None, optional
+            If set, search only randomly sampled query sequences of fixed number
+            (Reservoir sampling, `query_sample.faa` in `rpsblast_outfile` directory).
+            Whole genome COG profile is estimated by `stats.estimate_proportions()`.
+        sample_fraction : float | None, optional
+            If set, search only randomly sampled query sequences of fraction
+        sample_seed : int, optional
+            Random seed of query sampling
+        time_limit : float | None, optional
+            If set, query is searched in chunks and no new chunk is dispatched
+            when the time limit (seconds from start of run) is expected to be
+            exceeded. Result of completed chunks is returned as partial result
+            (`stats.is_partial`, `stats.skipped_query_count`). Processed query
+            fasta (`stats.query_file`) is kept in temporary directory of stats.
+        chunk_size : int, optional
+            Number of query sequences per search chunk of time limited run
+        """
         download_dir = const.CACHE_DIR if download_dir is None else download_dir
         thread_num = const.DEFAULT_CPU if thread_num is None else thread_num
 
@@ -32,48 +139,515 @@ class CogClassifier:
         self._download_dir = Path(download_dir)
         self._thread_num = thread_num
         self._evalue = evalue
+        self._rpsblast_outfile = rpsblast_outfile
+        self._multi_domain = multi_domain
+        self._progress_callback = progress_callback
+        self._rpsblast_file = rpsblast_file
+        if rpsblast_file is not None:
+            backend = get_backend("precomputed", rpsblast_file=rpsblast_file)
+        elif isinstance(backend, str):
+            backend = get_backend(backend)
+        self._backend: SearchBackend = backend
+        self._force = force
+        self._subset_letters = subset_letters
+        self._subset_cog_ids = subset_cog_ids
+        self._fix_query = fix_query
+        self._query_validation: FastaValidation | None = None
+        self._profiler = None if profile_dir is None else StageProfiler(profile_dir)
+        self._update_resources = update_resources
+        self._keep_archive = keep_archive
+        if sample_size is not None and sample_fraction is not None:
+            raise ValueError("Either sample_size or sample_fraction can be set")
+        self._is_sampling = sample_size is not None or sample_fraction is not None
+        if self._is_sampling and rpsblast_file is not None:
+            raise ValueError("Query sampling cannot be used with rpsblast_file")
+        self._sample_size = sample_size
+        self._sample_fraction = sample_fraction
+        self._sample_seed = sample_seed
+        self._sample_counts: tuple[int, int] | None = None
+        if time_limit is not None and time_limit <= 0:
+            raise ValueError(f"{time_limit=} is invalid (time_limit > 0)")
+        if time_limit is not None and rpsblast_file is not None:
+            raise ValueError("time_limit cannot be used with rpsblast_file")
+        self._time_limit = time_limit
+        if chunk_size <= 0:
+            raise ValueError(f"{chunk_size=} is invalid (chunk_size > 0)")
+        self._chunk_size = chunk_size
+
+    @property
+    def profiler(self) -> StageProfiler | None:
+        """Stage profiler (None if profiling is disabled)"""
+        return self._profiler
+
+    @property
+    def query_validation(self) -> FastaValidation | None:
+        """Query fasta validation result of last run (Sequence & residue counts)"""
+        return self._query_validation
+
+    @property
+    def sample_counts(self) -> tuple[int, int] | None:
+        """Sampled & total query sequence counts of last run (None if not sampled)"""
+        return self._sample_counts
 
     def run(self) -> CogClassifyStats:
         """Run COGclassifier"""
+        deadline = None
+        if self._time_limit is not None:
+            deadline = time.monotonic() + self._time_limit
+
+        outfile = self._rpsblast_outfile
+        outfile = None if outfile is None else Path(outfile)
+        # Intermediate files (e.g. fixed query fasta) are written in output file
+        # directory, or in temporary directory kept alive while stats are referenced
+        tmpdir = tempfile.TemporaryDirectory()
+        workdir = Path(tmpdir.name) if outfile is None else outfile.parent
+        try:
+            return self._run(outfile, workdir, deadline, tmpdir)
+        except BaseException:
+            tmpdir.cleanup()
+            raise
+
+    def _run(
+        self,
+        outfile: Path | None,
+        workdir: Path,
+        deadline: float | None,
+        tmpdir: tempfile.TemporaryDirectory,
+    ) -> CogClassifyStats:
+        """Run COGclassifier (See `run`)"""
         logger = logging.getLogger(__name__)
+        # Validate (& fix) query fasta before downloads & RPS-BLAST search
+        with profile_stage(self._profiler, "validate"):
+            query = self._validate_query(workdir)
+            if self._is_sampling:
+                query = self._sample_query(query, workdir)
 
         # Download NCBI COG & CDD resources
+        cddid_tbl_gzfile, rpsblast_db = self._resource_files
+
+        # Load resources in background thread while RPS-BLAST search
+        # (Sequentially loaded if profiled, since profilers cannot be overlapped)
+        if self._profiler is None:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                future = executor.submit(self.load_resources, cddid_tbl_gzfile)
+                search_result = self._search(
+                    query, rpsblast_db, outfile, Path(tmpdir.name), deadline
+                )
+                resources = future.result()
+        else:
+            with profile_stage(self._profiler, "load_resources"):
+                resources = self.load_resources(cddid_tbl_gzfile)
+            search_result = self._search(
+                query, rpsblast_db, outfile, Path(tmpdir.name), deadline
+            )
+        blast_rec, query, skipped_query_count = search_result
+        cog_fc_rec, cog_def_rec, cog_cdd_id_table = resources
+
+        # Partial search result is not memoized
+        if outfile is not None and skipped_query_count == 0:
+            manifest = RunManifest.load(outfile.parent)
+            manifest.record("search", self.search_key, outfile.parent, [outfile.name])
+            manifest.save(outfile.parent)
+
+        with profile_stage(self._profiler, "classify"):
+            stats = CogClassifyStats(
+                query,
+                blast_rec,
+                cog_fc_rec,
+                cog_def_rec,
+                cog_cdd_id_table,
+                multi_domain=self._multi_domain,
+                skipped_query_count=skipped_query_count,
+                tmpdir=tmpdir,
+            )
+            logger.info(
+                f"{stats.classify_ratio * 100:.2f}% ({stats.classify_count} / {stats.query_count}) sequences are classified into COG functional category"  # noqa: E501
+            )
+            if stats.is_partial:
+                processed_count, skipped_count = (
+                    stats.query_count,
+                    stats.skipped_query_count,
+                )
+                logger.warning(
+                    f"Partial result by time limit ({processed_count} / "
+                    f"{processed_count + skipped_count} sequences are processed, "
+                    f"{skipped_count} are skipped)"
+                )
+        record_classify_stats(stats)
+
+        return stats
+
+    def _search(
+        self,
+        query: Path,
+        rpsblast_db: Path | None,
+        outfile: Path | None,
+        tmpdir: Path,
+        deadline: float | None = None,
+    ) -> tuple[BlastAlignmentRecord, Path, int]:
+        """Run RPS-BLAST search (Skipped if up-to-date result exists)
+
+        Returns
+        -------
+        blast_rec : BlastAlignmentRecord
+            Blast alignment record
+        query : Path
+            Searched query fasta file (Processed queries only if partial)
+        skipped_query_count : int
+            Number of queries skipped by time limit
+        """
+        logger = logging.getLogger(__name__)
+        # RPS-BLAST search is memoized by run manifest in output file directory
+        with profile_stage(self._profiler, "search"):
+            if outfile is not None and not self._force and self._is_search_up_to_date():
+                # Reuse up-to-date RPS-BLAST result (Skip RPS-BLAST search)
+                logger.info(f"Skip RPS-BLAST search ({outfile} is up to date)")
+                CACHE_HITS.inc(cache="search")
+                blast_rec = BlastAlignmentRecord.bulk_load(
+                    outfile, workers=self._thread_num
+                )
+            elif deadline is not None:
+                # Search query chunks until deadline
+                return self._search_until_deadline(
+                    query, rpsblast_db, outfile, tmpdir, deadline
+                )
+            else:
+                # Run search backend (e.g. RPS-BLAST)
+                blast_rec = self._backend.search(
+                    query,
+                    rpsblast_db,
+                    outfile=outfile,
+                    evalue=self._evalue,
+                    thread_num=self._thread_num,
+                    progress_callback=self._progress_callback,
+                )
+        return blast_rec, query, 0
+
+    def _search_until_deadline(
+        self,
+        query: Path,
+        rpsblast_db: Path | None,
+        outfile: Path | None,
+        tmpdir: Path,
+        deadline: float,
+    ) -> tuple[BlastAlignmentRecord, Path, int]:
+        """Search query chunks in order until deadline (See `_search`)
+
+        Next chunk is not dispatched if no time remains or the mean elapsed time
+        of searched chunks exceeds the remaining time. Search progress is reported
+        across chunks. Processed queries fasta of partial result is written in
+        run temporary directory `tmpdir`.
+        """
+        logger = logging.getLogger(__name__)
+        query_count, residue_count = self._search_query_counts(query)
+        with tempfile.TemporaryDirectory() as chunk_dir:
+            chunk_files: list[Path] = []
+            chunk_counts: list[tuple[int, int]] = []
+            for records in chunk_fasta_records(query, self._chunk_size):
+                chunk_file = Path(chunk_dir) / f"chunk_{len(chunk_files)}.faa"
+                with open(chunk_file, "wb") as fw:
+                    for header, seq_lines in records:
+                        fw.write(format_fasta_record(header, seq_lines))
+                chunk_files.append(chunk_file)
+                residue_num = sum(sum(map(len, seq_lines)) for _, seq_lines in records)
+                chunk_counts.append((len(records), residue_num))
+            logger.info(
+                f"Search {len(chunk_files)} query chunks until time limit "
+                f"({self._time_limit}[s])"
+            )
+            start_time = time.monotonic()
+            # Completed query & residue counts of searched chunks
+            offsets = [0, 0]
+
+            def aggregate_progress(progress: RpsBlastProgress) -> None:
+                assert self._progress_callback is not None
+                completed_query_count = offsets[0] + progress.completed_query_count
+                self._progress_callback(
+                    RpsBlastProgress(
+                        completed_query_count=completed_query_count,
+                        total_query_count=query_count,
+                        completed_residue_count=(
+                            offsets[1] + progress.completed_residue_count
+                        ),
+                        total_residue_count=residue_count,
+                        elapsed_seconds=time.monotonic() - start_time,
+                        idle_seconds=progress.idle_seconds,
+                        finished=progress.finished
+                        and completed_query_count >= query_count,
+                    )
+                )
+
+            progress_callback = None
+            if self._progress_callback is not None:
+                progress_callback = aggregate_progress
+
+            searched_chunk_files: list[Path] = []
+            elapsed_times: list[float] = []
+            for chunk_file, (chunk_query_count, chunk_residue_count) in zip(
+                chunk_files, chunk_counts
+            ):
+                remaining_time = deadline - time.monotonic()
+                if remaining_time <= 0:
+                    break
+                expected_time = statistics.mean(elapsed_times) if elapsed_times else 0
+                if remaining_time <= expected_time:
+                    break
+                chunk_start_time = time.monotonic()
+                self._backend.search(
+                    chunk_file,
+                    rpsblast_db,
+                    outfile=chunk_file.with_suffix(".rpsblast.tsv"),
+                    evalue=self._evalue,
+                    thread_num=self._thread_num,
+                    progress_callback=progress_callback,
+                )
+                elapsed_times.append(time.monotonic() - chunk_start_time)
+                searched_chunk_files.append(chunk_file)
+                offsets[0] += chunk_query_count
+                offsets[1] += chunk_residue_count
+
+            merged_file = tmpdir / "rpsblast.tsv" if outfile is None else outfile
+            with xopen(merged_file, "wb", threads=self._thread_num) as fw:
+                for chunk_file in searched_chunk_files:
+                    with open(chunk_file.with_suffix(".rpsblast.tsv"), "rb") as fr:
+                        shutil.copyfileobj(fr, fw)
+            blast_rec = BlastAlignmentRecord.bulk_load(
+                merged_file, workers=self._thread_num
+            )
+            if len(searched_chunk_files) == len(chunk_files):
+                return blast_rec, query, 0
+
+            # Processed queries fasta of partial result
+            processed_query = tmpdir / "query_processed.faa"
+            with open(processed_query, "wb") as fw:
+                for chunk_file in searched_chunk_files:
+                    with open(chunk_file, "rb") as fr:
+                        shutil.copyfileobj(fr, fw)
+            return blast_rec, processed_query, query_count - offsets[0]
+
+    @cached_property
+    def search_key(self) -> str:
+        """Key of RPS-BLAST search stage (Query, database & search parameters)"""
+        query_digest = file_digest(self._query)
+        if self._fix_query:
+            query_digest = fingerprint(query_digest, "fix_query")
+        if self._is_sampling:
+            query_digest = fingerprint(
+                query_digest,
+                "sample",
+                self._sample_size,
+                self._sample_fraction,
+                self._sample_seed,
+            )
+        backend_key = self._backend.key
+        if self._backend.requires_db:
+            _, rpsblast_db = self._resource_files
+            db_version = stat_fingerprint(Path(rpsblast_db).parent)  # type: ignore
+            return fingerprint(backend_key, query_digest, db_version, self._evalue)
+        return fingerprint(backend_key, query_digest)
+
+    @cached_property
+    def classify_key(self) -> str:
+        """Key of classify stage (Search key, resources & classify parameters)"""
+        from cogclassifier import __version__
+
+        cddid_tbl_gzfile, _ = self._resource_files
+        return fingerprint(
+            self.search_key,
+            file_digest(cddid_tbl_gzfile),
+            file_digest(const.COG_DEFINITION_FILE),
+            file_digest(const.COG_FUNC_CATEGORY_FILE),
+            self._multi_domain,
+            __version__,
+        )
+
+    def _validate_query(self, workdir: Path) -> Path:
+        """Validate (& fix) query fasta & return query fasta file for search"""
+        logger = logging.getLogger(__name__)
+        logger.info(f"Validate query fasta {self._query}")
+        query = self._query
+        if self._fix_query and self._rpsblast_file is None:
+            query = workdir / "query_fixed.faa"
+            validation = validate_fasta(self._query, fix_outfile=query)
+            logger.info(f"Write fixed query fasta => {query}")
+        else:
+            validation = validate_fasta(self._query)
+        self._query_validation = validation
+        logger.info(f"=> {validation.as_message}")
+
+        if self._rpsblast_file is not None:
+            # Query IDs must be kept as is to match existing RPS-BLAST result
+            if not validation.is_valid:
+                logger.warning("Invalid query fasta is used for reclassification")
+        elif len(validation.fatal_issues) > 0 and not validation.fixed:
+            raise ValueError(
+                f"Invalid query fasta {self._query} ({validation.as_message}). "
+                "Fix query fasta or enable fix_query option."
+            )
+        elif validation.seq_count == 0:
+            raise ValueError(f"No valid sequences in query fasta {self._query}")
+        elif not validation.is_valid and not validation.fixed:
+            logger.warning(
+                "Query fasta issues tolerated by rpsblast are found "
+                "(Enable fix_query option to fix them before search)"
+            )
+        return query
+
+    def _sample_query(self, query: Path, workdir: Path) -> Path:
+        """Sample query fasta & return sampled query fasta file for search"""
+        logger = logging.getLogger(__name__)
+        sample_query = workdir / "query_sample.faa"
+        sample_count, record_count = sample_fasta(
+            query,
+            sample_query,
+            size=self._sample_size,
+            fraction=self._sample_fraction,
+            seed=self._sample_seed,
+        )
+        self._sample_counts = (sample_count, record_count)
+        logger.info(f"Sample {sample_count} / {record_count} query sequences")
+        logger.info(f"=> {sample_query}")
+        if sample_count == 0:
+            raise ValueError(f"No query sequences are sampled from {query}")
+        return sample_query
+
+    def _search_query_counts(self, query: Path) -> tuple[int, int]:
+        """Number of query fasta records & residues for search
+
+        Counts of validation are used if search query is the validated
+        (or fixed) query, otherwise search query fasta is counted.
+        """
+        validation = self._query_validation
+        if (
+            validation is not None
+            and self._sample_counts is None
+            and (validation.is_valid or validation.fixed)
+        ):
+            return validation.seq_count, validation.residue_count
+        query_count, residue_count = 0, 0
+        for _, seq_lines in iter_fasta_records(query):
+            query_count += 1
+            residue_count += sum(map(len, seq_lines))
+        return query_count, residue_count
+
+    def _is_search_up_to_date(self) -> bool:
+        """Check if RPS-BLAST result output file is up to date"""
+        outfile = Path(self._rpsblast_outfile)  # type: ignore
+        manifest = RunManifest.load(outfile.parent)
+        return manifest.is_up_to_date(
+            "search", self.search_key, outfile.parent, [outfile.name]
+        )
+
+    @cached_property
+    def _resource_files(self) -> tuple[Path, Path | None]:
+        """Downloaded resource files (`cddid.tbl.gz`, RPS-BLAST database)"""
+        is_subset = self._subset_letters is not None or self._subset_cog_ids is not None
+        if self._backend.requires_db and not is_subset:
+            return self.download_resources(
+                self._download_dir,
+                update=self._update_resources,
+                keep_archive=self._keep_archive,
+            )
+        # Full RPS-BLAST database is not required for reclassify & subset search
+        logger = logging.getLogger(__name__)
+        logger.info("Download CDD ID table in NCBI FTP site")
+        cddid_tbl_gzfile = utils.ftp_download(
+            const.CDDID_TBL_FTP, self._download_dir, update=self._update_resources
+        )
+        if not self._backend.requires_db:
+            return cddid_tbl_gzfile, None
+        cog_ids = CogDefinitionRecord(const.COG_DEFINITION_FILE).select_ids(
+            letters=self._subset_letters, cog_ids=self._subset_cog_ids
+        )
+        subset_db = build_subset_db(
+            cog_ids, self._download_dir, update=self._update_resources
+        )
+        return cddid_tbl_gzfile, subset_db
+
+    @staticmethod
+    def download_resources(
+        download_dir: str | Path,
+        *,
+        update: bool = False,
+        keep_archive: bool = False,
+    ) -> tuple[Path, Path]:
+        """Download NCBI COG & CDD resources (Skip if already downloaded)
+
+        Parameters
+        ----------
+        download_dir : str | Path
+            Download COG & CDD resources directory
+        update : bool, optional
+            If True, re-download changed resources (by HTTP HEAD request) and
+            remove unpacked RPS-BLAST database of changed `Cog_LE.tar.gz`
+        keep_archive : bool, optional
+            If True, keep `Cog_LE.tar.gz` archive in download directory.
+            Archive is extracted while downloading, so it is not kept by default.
+
+        Returns
+        -------
+        cddid_tbl_gzfile : Path
+            CDD ID table file (`cddid.tbl.gz`)
+        rpsblast_db : Path
+            RPS-BLAST COG database (`Cog_LE/Cog`)
+        """
+        logger = logging.getLogger(__name__)
+        download_dir = Path(download_dir)
+
         logger.info("Download COG & CDD resources in NCBI FTP site")
-        cddid_tbl_gzfile = utils.ftp_download(const.CDDID_TBL_FTP, self._download_dir)
+        cddid_tbl_gzfile = utils.ftp_download(
+            const.CDDID_TBL_FTP, download_dir, update=update
+        )
 
-        cog_le_targz_file = utils.ftp_download(const.COG_LE_FTP, self._download_dir)
-        cog_le_dir = self._download_dir / "Cog_LE"
-        if not cog_le_dir.exists():
+        cog_le_dir = download_dir / "Cog_LE"
+        cog_le_targz_file = download_dir / Path(const.COG_LE_FTP).name
+        if update and utils.is_remote_updated(const.COG_LE_FTP, cog_le_targz_file):
+            logger.info(f"Remote {cog_le_targz_file.name} is updated")
+            utils.remove_derived(
+                download_dir, (cog_le_dir.name, cog_le_targz_file.name)
+            )
+        if cog_le_dir.exists():
+            logger.info(f"=> Already unpacked {cog_le_dir}")
+            CACHE_HITS.inc(cache="download")
+        elif cog_le_targz_file.exists():
             logger.info(f"Unpack {cog_le_targz_file} => {cog_le_dir}")
             shutil.unpack_archive(cog_le_targz_file, cog_le_dir)
+        else:
+            # Stream-extract archive during download (No archive disk write & re-read)
+            utils.download_extract(
+                const.COG_LE_FTP, cog_le_dir, keep_archive=keep_archive
+            )
 
-        # Load NCBI COG & CDD resources
-        logger.info(f"Load COG Functional Category from {const.COG_FUNC_CATEGORY_FILE}")
-        cog_fc_rec = CogFuncCategoryRecord(const.COG_FUNC_CATEGORY_FILE)
-        logger.info(f"Load COG Definition from {const.COG_DEFINITION_FILE}")
-        cog_def_rec = CogDefinitionRecord(const.COG_DEFINITION_FILE)
-        logger.info(f"Load COG <=> CDD ID Conversion Table from {cddid_tbl_gzfile}")
-        cog_cdd_id_table = CogCddIdTable(cddid_tbl_gzfile)
-
-        # Run RPS-BLAST
-        rpsblast_db = cog_le_dir / "Cog"
-        blast_rec = RpsBlast(
-            self._query,
-            rpsblast_db,
-            outfile=None,
-            evalue=self._evalue,
-            thread_num=self._thread_num,
-        ).run()
-
-        stats = CogClassifyStats(
-            self._query,
-            blast_rec,
-            cog_fc_rec,
-            cog_def_rec,
-            cog_cdd_id_table,
-        )
-        logger.info(
-            f"{stats.classify_ratio * 100:.2f}% ({stats.classify_count} / {stats.query_count}) sequences are classified into COG functional category"  # noqa: E501
-        )
+        return cddid_tbl_gzfile, cog_le_dir / "Cog"
 
-        return stats
+    @staticmethod
+    def load_resources(
+        cddid_tbl_file: str | Path,
+    ) -> tuple[CogFuncCategoryRecord, CogDefinitionRecord, CogCddIdTable]:
+        """Load NCBI COG & CDD resources
+
+        Parameters
+        ----------
+        cddid_tbl_file : str | Path
+            CDD ID table file (`cddid.tbl.gz`)
+
+        Returns
+        -------
+        cog_fc_rec : CogFuncCategoryRecord
+            COG functional category record
+        cog_def_rec : CogDefinitionRecord
+            COG definition record
+        cog_cdd_id_table : CogCddIdTable
+            COG ID & CDD ID conversion table
+        """
+        logger = logging.getLogger(__name__)
+        with RESOURCE_LOAD_SECONDS.time():
+            logger.info(
+                f"Load COG Functional Category from {const.COG_FUNC_CATEGORY_FILE}"
+            )
+            cog_fc_rec = CogFuncCategoryRecord(const.COG_FUNC_CATEGORY_FILE)
+            logger.info(f"Load COG Definition from {const.COG_DEFINITION_FILE}")
+            cog_def_rec = CogDefinitionRecord(const.COG_DEFINITION_FILE)
+            logger.info(f"Load COG <=> CDD ID Conversion Table from {cddid_tbl_file}")
+            cog_cdd_id_table = CogCddIdTable(cddid_tbl_file)
+        return cog_fc_rec, cog_def_rec, cog_cdd_id_table
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from pydantic import BaseModel, ValidationError
+
+RUN_MANIFEST_FILENAME = "run_manifest.json"
+
+
+class RunStage(BaseModel):
+    """Run Stage Class"""
+
+    key: str
+    outputs: dict[str, str] = {}
+
+
+class RunManifest(BaseModel):
+    """Run Manifest Class
+
+    Run manifest is written in output directory to memoize each stage of a run.
+    Inputs of each stage are recorded as a key (content hashes of input files &
+    parameters, including key of upstream stage), and outputs are recorded as
+    stat fingerprint (size & mtime), so that up-to-date check of outputs is cheap.
+    """
+
+    stages: dict[str, RunStage] = {}
+
+    @classmethod
+    def load(cls, outdir: str | Path) -> RunManifest:
+        """Load run manifest in output directory (Empty manifest if not exists)"""
+        manifest_file = Path(outdir) / RUN_MANIFEST_FILENAME
+        if not manifest_file.exists():
+            return cls()
+        try:
+            with open(manifest_file, encoding="utf-8") as f:
+                return cls.model_validate_json(f.read())
+        except (OSError, ValidationError) as e:
+            logger = logging.getLogger(__name__)
+            logger.warning(f"Ignore invalid run manifest {manifest_file} ({e})")
+            return cls()
+
+    def save(self, outdir: str | Path) -> None:
+        """Save run manifest in output directory"""
+        manifest_file = Path(outdir) / RUN_MANIFEST_FILENAME
+        tmp_file = manifest_file.with_name(f".{manifest_file.name}.{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(self.model_dump_json(indent=2))
+        os.replace(tmp_file, manifest_file)
+
+    def is_up_to_date(
+        self,
+        stage: str,
+        key: str,
+        outdir: str | Path,
+        names: list[str],
+    ) -> bool:
+        """Check if stage key is unchanged & output files (or dirs) are unchanged
+
+        Parameters
+        ----------
+        stage : str
+            Stage name
+        key : str
+            Current stage key
+        outdir : str | Path
+            Output directory
+        names : list[str]
+            Output file (or directory) names of stage
+
+        Returns
+        -------
+        up_to_date : bool
+            If True, stage is up to date
+        """
+        run_stage = self.stages.get(stage)
+        if run_stage is None or run_stage.key != key:
+            return False
+        for name in names:
+            output = Path(outdir) / name
+            if name not in run_stage.outputs or not output.exists():
+                return False
+            if run_stage.outputs[name] != stat_fingerprint(output):
+                return False
+        return True
+
+    def record(
+        self,
+        stage: str,
+        key: str,
+        outdir: str | Path,
+        names: list[str],
+    ) -> None:
+        """Record stage key & stat fingerprint of output files (or dirs)
+
+        Parameters
+        ----------
+        stage : str
+            Stage name
+        key : str
+            Current stage key
+        outdir : str | Path
+            Output directory
+        names : list[str]
+            Output file (or directory) names of stage
+        """
+        outputs = {name: stat_fingerprint(Path(outdir) / name) for name in names}
+        self.stages[stage] = RunStage(key=key, outputs=outputs)
+
+
+def file_digest(file: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA256 content hash of file"""
+    sha256 = hashlib.sha256()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def stat_fingerprint(path: str | Path) -> str:
+    """Stat fingerprint (size & mtime) of file or all files in directory"""
+    path = Path(path)
+    files = (
+        sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    )
+    stats = []
+    for file in files:
+        st = file.stat()
+        stats.append([str(file.relative_to(path.parent)), st.st_size, st.st_mtime_ns])
+    return fingerprint(stats)
+
+
+def fingerprint(*items) -> str:
+    """SHA256 hash of JSON serializable items"""
+    text = json.dumps(items, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
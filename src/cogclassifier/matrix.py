@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import csv
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from cogclassifier import const
+from cogclassifier.cog import CogClassifyStats, CogFuncCategoryRecord
+
+NORMALIZE_METHODS = ("count", "ratio", "zscore")
+
+
+class CogCountMatrix:
+    """Genome x COG Functional Category Count Matrix Class
+
+    Matrix state is kept in a TSV file (`GENOME` column + one column per letter).
+    Each added genome is appended to the file as a single row, so adding a genome
+    never rescans the count files of previously added genomes.
+    If the same genome is added more than once, the last row wins.
+    """
+
+    def __init__(
+        self,
+        matrix_file: str | Path,
+        *,
+        letters: list[str] | None = None,
+    ):
+        """
+        Parameters
+        ----------
+        matrix_file : str | Path
+            Count matrix file (Loaded if already exists)
+        letters : list[str] | None, optional
+            COG letters of matrix columns (By default, all package COG letters)
+        """
+        if letters is None:
+            cog_fc_rec = CogFuncCategoryRecord(const.COG_FUNC_CATEGORY_FILE)
+            letters = cog_fc_rec.get_letters()
+
+        self._matrix_file = Path(matrix_file)
+        self._letters = list(letters)
+        self._genome2counts: dict[str, list[int]] = {}
+        self._row_count = 0
+
+        if self._matrix_file.exists() and self._matrix_file.stat().st_size > 0:
+            self._load()
+
+    @property
+    def matrix_file(self) -> Path:
+        """Count matrix file"""
+        return self._matrix_file
+
+    @property
+    def letters(self) -> list[str]:
+        """COG letters of matrix columns"""
+        return self._letters
+
+    @property
+    def genomes(self) -> list[str]:
+        """Genome names of matrix rows"""
+        return list(self._genome2counts.keys())
+
+    def add(
+        self,
+        genome: str,
+        data: str | Path | pd.DataFrame | CogClassifyStats,
+        *,
+        overwrite: bool = False,
+    ) -> bool:
+        """Add genome COG count to matrix (Appended to matrix file immediately)
+
+        Parameters
+        ----------
+        genome : str
+            Genome name
+        data : str | Path | pd.DataFrame | CogClassifyStats
+            COG count file (`cog_count.tsv`), COG count dataframe or classify stats
+        overwrite : bool, optional
+            If True, overwrite already added genome count
+
+        Returns
+        -------
+        added : bool
+            If False, genome is already added and skipped
+        """
+        if genome in self._genome2counts and not overwrite:
+            return False
+
+        if isinstance(data, CogClassifyStats):
+            df = data.count_summary_df
+        elif isinstance(data, pd.DataFrame):
+            df = data
+        else:
+            df = pd.read_csv(data, sep="\t", encoding="utf-8")
+        letter2count = dict(zip(df["LETTER"], df["COUNT"]))
+        counts = [int(letter2count.get(letter, 0)) for letter in self._letters]
+
+        write_header = (
+            not self._matrix_file.exists() or self._matrix_file.stat().st_size == 0
+        )
+        os.makedirs(self._matrix_file.parent, exist_ok=True)
+        with open(self._matrix_file, "a", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+            if write_header:
+                writer.writerow(["GENOME", *self._letters])
+            writer.writerow([genome, *counts])
+
+        self._genome2counts[genome] = counts
+        self._row_count += 1
+        return True
+
+    def add_files(
+        self,
+        count_files: list[str | Path],
+        *,
+        overwrite: bool = False,
+    ) -> list[str]:
+        """Add multiple COG count files to matrix
+
+        Genome name is taken from the output directory name of `cog_count.tsv`
+        (e.g. `ecoli/cog_count.tsv` -> `ecoli`), otherwise from the file stem.
+
+        Parameters
+        ----------
+        count_files : list[str | Path]
+            COG count files
+        overwrite : bool, optional
+            If True, overwrite already added genome count
+
+        Returns
+        -------
+        added_genomes : list[str]
+            Newly added genome names
+        """
+        added_genomes = []
+        for count_file in count_files:
+            genome = self.genome_name(count_file)
+            if self.add(genome, count_file, overwrite=overwrite):
+                added_genomes.append(genome)
+        return added_genomes
+
+    def compact(self) -> None:
+        """Rewrite matrix file to remove overwritten genome rows"""
+        if self._row_count == len(self._genome2counts):
+            return
+        tmp_file = self._matrix_file.with_name(self._matrix_file.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+            writer.writerow(["GENOME", *self._letters])
+            for genome, counts in self._genome2counts.items():
+                writer.writerow([genome, *counts])
+        os.replace(tmp_file, self._matrix_file)
+        self._row_count = len(self._genome2counts)
+
+    def to_dataframe(self, normalize: str = "count") -> pd.DataFrame:
+        """Convert to genome x COG letter dataframe
+
+        Parameters
+        ----------
+        normalize : str, optional
+            Normalize method (`count`|`ratio`|`zscore`)
+            `count`: raw count, `ratio`: count / total count of each genome,
+            `zscore`: z-score of ratio of each COG letter across genomes
+
+        Returns
+        -------
+        df : pd.DataFrame
+            Genome x COG letter dataframe (index=`GENOME`)
+        """
+        if normalize not in NORMALIZE_METHODS:
+            raise ValueError(f"{normalize=} is invalid ({NORMALIZE_METHODS=})")
+
+        df = pd.DataFrame.from_dict(
+            self._genome2counts, orient="index", columns=self._letters
+        ).astype("int64")
+        df.index.name = "GENOME"
+        if normalize == "count":
+            return df
+
+        total = df.sum(axis=1)
+        ratio_df = df.div(total.where(total != 0), axis=0).fillna(0.0)
+        if normalize == "ratio":
+            return ratio_df
+
+        std = ratio_df.std(axis=0, ddof=0)
+        zscore_df = (ratio_df - ratio_df.mean(axis=0)) / std.where(std != 0)
+        return zscore_df.fillna(0.0)
+
+    @staticmethod
+    def genome_name(count_file: str | Path) -> str:
+        """Genome name of COG count file"""
+        count_file = Path(count_file)
+        is_count_file = count_file.name.split(".")[:2] == ["cog_count", "tsv"]
+        if is_count_file and count_file.parent.name != "":
+            return count_file.resolve().parent.name
+        return count_file.name.split(".")[0]
+
+    def _load(self) -> None:
+        """Load matrix file"""
+        with open(self._matrix_file, encoding="utf-8") as f:
+            reader = csv.reader(f, delimiter="\t")
+            header = next(reader)
+            if header[1:] != self._letters:
+                raise ValueError(
+                    f"COG letters of {self._matrix_file} are different from {self._letters}"  # noqa: E501
+                )
+            for row in reader:
+                if len(row) == 0:
+                    continue
+                self._genome2counts[row[0]] = [int(c) for c in row[1:]]
+                self._row_count += 1
+        logger = logging.getLogger(__name__)
+        logger.debug(f"Load {len(self)} genomes from {self._matrix_file}")
+
+    def __len__(self) -> int:
+        return len(self._genome2counts)
+
+    def __contains__(self, genome: str) -> bool:
+        return genome in self._genome2counts
+
+
+def load_cog_count_files(
+    count_files: list[str | Path],
+    *,
+    genomes: list[str] | None = None,
+    letters: list[str] | None = None,
+) -> pd.DataFrame:
+    """Load multiple COG count files into genome x COG letter count dataframe
+
+    Only `LETTER` & `COUNT` columns of each file are read, and all files are
+    concatenated & pivoted at once (No per genome row building).
+    If the same genome is loaded more than once, the last file wins.
+
+    Parameters
+    ----------
+    count_files : list[str | Path]
+        COG count files (`cog_count.tsv`, `.gz`/`.zst` allowed)
+    genomes : list[str] | None, optional
+        Genome names of count files (By default, `CogCountMatrix.genome_name`)
+    letters : list[str] | None, optional
+        COG letters of dataframe columns (By default, all package COG letters)
+
+    Returns
+    -------
+    df : pd.DataFrame
+        Genome x COG letter count dataframe (index=`GENOME`)
+    """
+    if genomes is None:
+        genomes = [CogCountMatrix.genome_name(f) for f in count_files]
+    if len(genomes) != len(count_files):
+        raise ValueError(f"{len(genomes)=} is not equal to {len(count_files)=}")
+    if len(count_files) == 0:
+        raise ValueError("No COG count files are set")
+    if letters is None:
+        cog_fc_rec = CogFuncCategoryRecord(const.COG_FUNC_CATEGORY_FILE)
+        letters = cog_fc_rec.get_letters()
+
+    dfs = [
+        pd.read_csv(
+            count_file,
+            sep="\t",
+            encoding="utf-8",
+            usecols=["LETTER", "COUNT"],
+            dtype={"LETTER": str, "COUNT": "int64"},
+        )
+        for count_file in count_files
+    ]
+    long_df = pd.concat(dfs, keys=range(len(dfs)), names=["FILE_INDEX", None])
+    long_df = long_df.reset_index(level=0)
+    long_df["GENOME"] = pd.Series(genomes).to_numpy()[long_df["FILE_INDEX"]]
+    # Keep only last file of duplicated genome
+    last_index = long_df.groupby("GENOME", sort=False)["FILE_INDEX"].transform("max")
+    long_df = long_df[long_df["FILE_INDEX"] == last_index]
+
+    df = long_df.pivot(index="GENOME", columns="LETTER", values="COUNT")
+    df = df.reindex(index=list(dict.fromkeys(genomes)), columns=letters)
+    df = df.fillna(0).astype("int64")
+    df.columns.name = None
+    return df
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    from cogclassifier.cog import CogClassifyStats
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_BUCKETS = (1, 5, 10, 30, 60, 300, 600, 1800, 3600, 10800, 36000, math.inf)
+
+
+class _Metric:
+    """Metric Base Class (Thread-safe value per label set)"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values: dict[tuple[tuple[str, str], ...], float] = {}
+
+    def get(self, **labels: str) -> float:
+        """Get current metric value of label set"""
+        return self._values.get(_label_key(labels), 0.0)
+
+    def reset(self) -> None:
+        """Reset all metric values"""
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> Iterator[tuple[str, tuple[tuple[str, str], ...], float]]:
+        """Yield (sample name, label set, value) for exposition"""
+        with self._lock:
+            items = list(self._values.items())
+        for label_key, value in items:
+            yield self.name, label_key, value
+
+
+class Counter(_Metric):
+    """Counter Metric Class (Monotonically increasing value)"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increment counter"""
+        if amount < 0:
+            raise ValueError(f"Counter can't be decreased ({amount=})")
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[tuple[str, tuple[tuple[str, str], ...], float]]:
+        """Yield (sample name, label set, value) for exposition (`_total` suffix)"""
+        for _, label_key, value in super().samples():
+            yield f"{self.name}_total", label_key, value
+
+
+class Gauge(_Metric):
+    """Gauge Metric Class (Arbitrary value)"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set gauge value"""
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Histogram Metric Class (Bucketed observations)"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation)
+        buckets = tuple(sorted(buckets))
+        self._buckets = buckets if buckets[-1] == math.inf else (*buckets, math.inf)
+        self._observations: dict[tuple[tuple[str, str], ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Observe value (Stored as bucket counts, count & sum)"""
+        key = _label_key(labels)
+        with self._lock:
+            # [bucket counts..., count, sum]
+            stats = self._observations.setdefault(key, [0.0] * (len(self._buckets) + 2))
+            for idx, bound in enumerate(self._buckets):
+                if value <= bound:
+                    stats[idx] += 1
+            stats[-2] += 1
+            stats[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        """Observe elapsed seconds of `with` block"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def get(self, **labels: str) -> float:
+        """Get number of observations of label set"""
+        stats = self._observations.get(_label_key(labels))
+        return 0.0 if stats is None else stats[-2]
+
+    def reset(self) -> None:
+        """Reset all observations"""
+        with self._lock:
+            self._observations.clear()
+
+    def samples(self) -> Iterator[tuple[str, tuple[tuple[str, str], ...], float]]:
+        """Yield (sample name, label set, value) for exposition (bucket, count, sum)"""
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._observations.items()]
+        for label_key, stats in items:
+            for bound, count in zip(self._buckets, stats):
+                le = "+Inf" if bound == math.inf else _format_value(bound)
+                yield f"{self.name}_bucket", (*label_key, ("le", le)), count
+            yield f"{self.name}_count", label_key, stats[-2]
+            yield f"{self.name}_sum", label_key, stats[-1]
+
+
+class MetricsRegistry:
+    """Metrics Registry Class (OpenMetrics text exposition)"""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._is_exported = False
+
+    @property
+    def is_exported(self) -> bool:
+        """Metrics exporter (text file or HTTP endpoint) is configured or not"""
+        return self._is_exported
+
+    def enable_export(self) -> None:
+        """Enable export (Costly metrics are recorded only if exported)"""
+        self._is_exported = True
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        """Register counter metric"""
+        return self._register(Counter(name, documentation))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        """Register gauge metric"""
+        return self._register(Gauge(name, documentation))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Register histogram metric"""
+        return self._register(Histogram(name, documentation, buckets))
+
+    def reset(self) -> None:
+        """Reset all metric values"""
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self) -> str:
+        """Render all metrics in OpenMetrics text format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            for sample_name, label_key, value in metric.samples():
+                labels = ",".join(f'{k}="{_escape(v)}"' for k, v in label_key)
+                labels = f"{{{labels}}}" if labels else ""
+                lines.append(f"{sample_name}{labels} {_format_value(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, outfile: str | Path) -> None:
+        """Write metrics as OpenMetrics text file (Atomic write for textfile collector)
+
+        Parameters
+        ----------
+        outfile : str | Path
+            Output metrics text file (e.g. `cogclassifier.prom`)
+        """
+        self.enable_export()
+        outfile = Path(outfile)
+        outfile.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = outfile.with_name(f".{outfile.name}.{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_file, outfile)
+
+    def start_http_server(self, port: int, addr: str = "") -> ThreadingHTTPServer:
+        """Start HTTP server exposing metrics at `/metrics` in daemon thread
+
+        Parameters
+        ----------
+        port : int
+            Listen port (If 0, arbitrary free port is used)
+        addr : str, optional
+            Listen address (By default, all interfaces)
+
+        Returns
+        -------
+        server : ThreadingHTTPServer
+            Running HTTP server (Stop by `server.shutdown()`)
+        """
+        self.enable_export()
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((addr, port), MetricsHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = MetricsRegistry()
+
+QUERY_SEQUENCES = REGISTRY.counter(
+    "cogclassifier_query_sequences", "Number of processed query sequences"
+)
+CLASSIFIED_SEQUENCES = REGISTRY.counter(
+    "cogclassifier_classified_sequences", "Number of COG classified sequences"
+)
+BLAST_HITS = REGISTRY.counter(
+    "cogclassifier_blast_hits", "Number of parsed RPS-BLAST hits"
+)
+CLASSIFY_RATIO = REGISTRY.gauge(
+    "cogclassifier_classify_ratio", "Ratio of COG classified sequences of last run"
+)
+RPSBLAST_SECONDS = REGISTRY.histogram(
+    "cogclassifier_rpsblast_seconds", "Elapsed seconds of RPS-BLAST search"
+)
+RESOURCE_LOAD_SECONDS = REGISTRY.histogram(
+    "cogclassifier_resource_load_seconds",
+    "Elapsed seconds of loading COG & CDD resources",
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60),
+)
+CACHE_HITS = REGISTRY.counter(
+    "cogclassifier_cache_hits",
+    "Number of reused cached results (cache=download|search|classify|plot...)",
+)
+DOWNLOAD_BYTES = REGISTRY.counter(
+    "cogclassifier_download_bytes", "Number of downloaded bytes"
+)
+SHARDS_COMPLETED = REGISTRY.counter(
+    "cogclassifier_shards_completed", "Number of completed shards"
+)
+
+
+def record_classify_stats(stats: CogClassifyStats) -> None:
+    """Record COG classification result statistics metrics
+
+    Recorded only if metrics are exported (`REGISTRY.enable_export()`), since
+    counting query sequences & hits requires parsing the whole result.
+    """
+    if not REGISTRY.is_exported:
+        return
+    QUERY_SEQUENCES.inc(stats.query_count)
+    CLASSIFIED_SEQUENCES.inc(stats.classify_count)
+    BLAST_HITS.inc(len(stats.blast_rec))
+    CLASSIFY_RATIO.set(stats.classify_ratio)
+
+
+def _label_key(labels: dict[str, str]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
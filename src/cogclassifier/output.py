@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from cogclassifier.cog import CogClassifyStats
+from cogclassifier.compress import compressed_name, xopen
+from cogclassifier.fasta import export_cog_fasta
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from cogclassifier.plot import ChartRenderer
+
+CLASSIFY_RESULT_FILENAMES = ("cog_count.tsv", "cog_classify.tsv")
+PROPORTION_FILENAME = "cog_proportion.tsv"
+COUNT_CHART_FILENAMES = (
+    "cog_count_barchart.html",
+    "cog_count_barchart.png",
+    "cog_count_piechart.html",
+    "cog_count_piechart.png",
+)
+
+
+def write_classify_results(
+    stats: CogClassifyStats,
+    outdir: str | Path,
+    *,
+    compress: str | None = None,
+    thread_num: int = 1,
+) -> list[Path]:
+    """Write COG classification results (`cog_count.tsv`, `cog_classify.tsv`)
+
+    Parameters
+    ----------
+    stats : CogClassifyStats
+        COG classification result statistics
+    outdir : str | Path
+        Output directory
+    compress : str | None, optional
+        Compression format (`gz`|`zst`). Compressed in background thread.
+    thread_num : int, optional
+        Number of zstd compression threads
+
+    Returns
+    -------
+    outfiles : list[Path]
+        COG count & COG classification result files
+    """
+    logger = logging.getLogger(__name__)
+    outdir = Path(outdir)
+    os.makedirs(outdir, exist_ok=True)
+    cog_count_file, cog_classify_file = [
+        outdir / name for name in classify_result_filenames(compress)
+    ]
+
+    # Write COG count summary
+    with xopen(cog_count_file, "wt", threads=thread_num) as f:
+        stats.count_summary_df.to_csv(f, sep="\t", index=False)
+    logger.info("Write summary of COG functional category count")
+    logger.info(f"=> {cog_count_file}")
+    # Write COG classification result
+    with xopen(cog_classify_file, "wt", threads=thread_num) as f:
+        stats.query_classify_df.to_csv(f, sep="\t", index=False)
+    logger.info("Write result of COG classification per query")
+    logger.info(f"=> {cog_classify_file}")
+    return [cog_count_file, cog_classify_file]
+
+
+def write_proportion_estimates(
+    stats: CogClassifyStats,
+    outdir: str | Path,
+    *,
+    bootstrap_num: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> Path:
+    """Write COG letter proportions with bootstrap confidence intervals
+
+    Parameters
+    ----------
+    stats : CogClassifyStats
+        COG classification result statistics (e.g. of sampled query)
+    outdir : str | Path
+        Output directory
+    bootstrap_num : int, optional
+        Number of bootstrap replicates
+    confidence : float, optional
+        Confidence level of interval
+    seed : int, optional
+        Random seed of bootstrap
+
+    Returns
+    -------
+    outfile : Path
+        COG proportion estimate file (`cog_proportion.tsv`)
+    """
+    logger = logging.getLogger(__name__)
+    outfile = Path(outdir) / PROPORTION_FILENAME
+    df = stats.estimate_proportions(
+        bootstrap_num=bootstrap_num, confidence=confidence, seed=seed
+    )
+    df.to_csv(outfile, sep="\t", index=False)
+    logger.info(
+        f"Write COG proportion estimates with {confidence:.0%} bootstrap CI "
+        f"({bootstrap_num} replicates)"
+    )
+    logger.info(f"=> {outfile}")
+    return outfile
+
+
+def classify_result_filenames(compress: str | None = None) -> list[str]:
+    """COG classification result file names (with compression suffix)"""
+    return [compressed_name(name, compress) for name in CLASSIFY_RESULT_FILENAMES]
+
+
+def export_classify_fasta(
+    stats: CogClassifyStats,
+    outdir: str | Path,
+    *,
+    by: str = "letter",
+) -> list[Path]:
+    """Export classified query sequences (`fasta_by_{letter|cog_id}/*.faa`)
+
+    Existing export directory is replaced, so no stale fasta file is left.
+
+    Parameters
+    ----------
+    stats : CogClassifyStats
+        COG classification result statistics
+    outdir : str | Path
+        Output directory
+    by : str, optional
+        Export key (`letter`|`cog_id`)
+
+    Returns
+    -------
+    outfiles : list[Path]
+        Exported fasta files
+    """
+    logger = logging.getLogger(__name__)
+    fasta_outdir = Path(outdir) / f"fasta_by_{by}"
+    if fasta_outdir.exists():
+        shutil.rmtree(fasta_outdir)
+    outfiles = export_cog_fasta(stats, fasta_outdir, by=by)
+    logger.info(
+        f"Export COG classified query sequences by {by} ({len(outfiles)} files)"
+    )
+    logger.info(f"=> {fasta_outdir}")
+    return outfiles
+
+
+def plot_count_charts(
+    count_summary_df: pd.DataFrame,
+    outdir: str | Path,
+    *,
+    renderer: ChartRenderer | None = None,
+) -> None:
+    """Plot COG count barchart & piechart (`*.html`, `*.png`)
+
+    Plot module (altair) is imported only when this function is called.
+
+    Parameters
+    ----------
+    count_summary_df : pd.DataFrame
+        COG count summary dataframe
+    outdir : str | Path
+        Output directory
+    renderer : ChartRenderer | None, optional
+        Reusable chart renderer for batch plotting
+    """
+    from cogclassifier.plot import (
+        ChartRenderer,
+        plot_cog_count_barchart,
+        plot_cog_count_piechart,
+    )
+
+    if renderer is None:
+        with ChartRenderer() as tmp_renderer:
+            return plot_count_charts(count_summary_df, outdir, renderer=tmp_renderer)
+
+    logger = logging.getLogger(__name__)
+    outdir = Path(outdir)
+    barchart_html_file = outdir / "cog_count_barchart.html"
+    barchart_files = [barchart_html_file, barchart_html_file.with_suffix(".png")]
+    piechart_html_file = outdir / "cog_count_piechart.html"
+    piechart_files = [piechart_html_file, piechart_html_file.with_suffix(".png")]
+    logger.info("Plot COG count barchart & piechart figure")
+    # Plot barchart & piechart concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(
+                plot_cog_count_barchart,
+                count_summary_df.copy(),
+                barchart_files,
+                renderer=renderer,
+            ),
+            executor.submit(
+                plot_cog_count_piechart,
+                count_summary_df.copy(),
+                piechart_files,
+                show_letter=True,
+                sort=True,
+                renderer=renderer,
+            ),
+        ]
+        for future in futures:
+            future.result()
+    for chart_file in barchart_files + piechart_files:
+        logger.info(f"=> {chart_file}")
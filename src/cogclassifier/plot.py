@@ -1,14 +1,24 @@
 from __future__ import annotations
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any
 
 import altair as alt
 import pandas as pd
+from altair.utils.mimebundle import spec_to_mimebundle
+
+from cogclassifier import const
+from cogclassifier.cog import CogFuncCategoryRecord
+
+COMPARATIVE_STYLES = ("stacked", "faceted")
 
 
 def plot_cog_count_barchart(
     data: str | Path | pd.DataFrame,
-    outfile: str | Path | None = None,
+    outfile: str | Path | list[str | Path] | None = None,
     *,
     fig_width: int = 440,
     fig_height: int = 340,
@@ -17,6 +27,7 @@ def plot_cog_count_barchart(
     percent_style: bool = False,
     sort: bool = False,
     dpi: int = 100,
+    renderer: ChartRenderer | None = None,
 ) -> alt.Chart:
     """Plot altair barchart from COG count dataframe
 
@@ -24,8 +35,9 @@ def plot_cog_count_barchart(
     ----------
     data : str | Path | pd.DataFrame
         COG count file or dataframe
-    outfile : str | Path | None, optional
+    outfile : str | Path | list[str | Path] | None, optional
         Barchart output file (`*.png`|`*.svg`|`*.html`)
+        If multiple files are set, chart spec is built once and exported to each file
     fig_width : int, optional
         Figure pixel width
     fig_height : int, optional
@@ -40,6 +52,8 @@ def plot_cog_count_barchart(
         Enable descending sort by count
     dpi : int, option
         Figure DPI
+    renderer : ChartRenderer | None, optional
+        Reusable chart renderer for batch plotting
 
     Returns
     -------
@@ -103,23 +117,21 @@ def plot_cog_count_barchart(
         )
     )
     if outfile is not None:
-        if Path(outfile).suffix == ".png":
-            barchart.save(outfile, ppi=dpi)
-        else:
-            barchart.save(outfile)
+        save_chart(barchart, outfile, dpi=dpi, renderer=renderer)
 
     return barchart
 
 
 def plot_cog_count_piechart(
     data: str | Path | pd.DataFrame,
-    outfile: str | Path | None = None,
+    outfile: str | Path | list[str | Path] | None = None,
     *,
     fig_width: int = 380,
     fig_height: int = 380,
     show_letter: bool = False,
     sort: bool = False,
     dpi: int = 100,
+    renderer: ChartRenderer | None = None,
 ) -> alt.LayerChart:
     """Plot altair piechart from COG count dataframe
 
@@ -127,8 +139,9 @@ def plot_cog_count_piechart(
     ----------
     df : str | Path | pd.DataFrame
         COG count file or dataframe
-    outfile : str | Path | None, optional
+    outfile : str | Path | list[str | Path] | None, optional
         Piechart output file (`*.png`|`*.svg`|`*.html`)
+        If multiple files are set, chart spec is built once and exported to each file
     fig_width : int, optional
         Figure pixel width
     fig_height : int, optional
@@ -139,6 +152,8 @@ def plot_cog_count_piechart(
         Enable count descending sort
     dpi : int, optional
         Figure DPI
+    renderer : ChartRenderer | None, optional
+        Reusable chart renderer for batch plotting
 
     Returns
     -------
@@ -213,9 +228,294 @@ def plot_cog_count_piechart(
         .configure_mark(stroke="white", strokeWidth=1.0, strokeOpacity=1.0)
     )
     if outfile is not None:
-        if Path(outfile).suffix == ".png":
-            piechart_with_text.save(outfile, ppi=dpi)
-        else:
-            piechart_with_text.save(outfile)
+        save_chart(piechart_with_text, outfile, dpi=dpi, renderer=renderer)
 
     return piechart_with_text
+
+
+def plot_cog_count_comparative_chart(
+    data: str | Path | pd.DataFrame,
+    outfile: str | Path | list[str | Path] | None = None,
+    *,
+    style: str = "stacked",
+    fig_width: int | None = None,
+    fig_height: int | None = None,
+    columns: int = 4,
+    percent_style: bool = False,
+    dpi: int = 100,
+    renderer: ChartRenderer | None = None,
+) -> alt.Chart | alt.FacetChart:
+    """Plot altair comparative chart of multiple genomes from COG count matrix
+
+    All genomes are plotted in a single chart, so chart spec is built & rendered
+    only once regardless of the number of genomes.
+
+    Parameters
+    ----------
+    data : str | Path | pd.DataFrame
+        COG count matrix file (`cog_count_matrix`) or genome x COG letter count
+        dataframe (e.g. `load_cog_count_files`, `CogCountMatrix.to_dataframe`)
+    outfile : str | Path | list[str | Path] | None, optional
+        Chart output file (`*.png`|`*.svg`|`*.html`)
+        If multiple files are set, chart spec is built once and exported to each file
+    style : str, optional
+        Chart style (`stacked`|`faceted`)
+        `stacked`: one stacked bar per genome,
+        `faceted`: one COG count barchart panel per genome
+    fig_width : int | None, optional
+        Figure pixel width (Panel width if `faceted`)
+        By default, 30 pixels per genome if `stacked`, 300 if `faceted`
+    fig_height : int | None, optional
+        Figure pixel height (Panel height if `faceted`)
+        By default, 340 if `stacked`, 200 if `faceted`
+    columns : int, optional
+        Number of panel columns (Only applied to `faceted`)
+    percent_style : bool, optional
+        Plot y-axis as percent(%) of each genome instead of count number
+    dpi : int, optional
+        Figure DPI
+    renderer : ChartRenderer | None, optional
+        Reusable chart renderer for batch plotting
+
+    Returns
+    -------
+    chart : alt.Chart | alt.FacetChart
+        Altair comparative chart
+    """
+    if style not in COMPARATIVE_STYLES:
+        raise ValueError(f"{style=} is invalid ({COMPARATIVE_STYLES=})")
+    if isinstance(data, pd.DataFrame):
+        matrix_df = data
+    else:
+        matrix_df = pd.read_csv(data, sep="\t", encoding="utf-8", index_col=0)
+    genomes = [str(genome) for genome in matrix_df.index]
+
+    # Genome x COG letter matrix => Long format dataframe with category info
+    cog_fc_rec = CogFuncCategoryRecord(const.COG_FUNC_CATEGORY_FILE)
+    category_df = pd.DataFrame(
+        [(c.letter, c.color, c.desc) for c in cog_fc_rec.get_all()],
+        columns=["LETTER", "COLOR", "DESCRIPTION"],
+    )
+    category_df = category_df[category_df["LETTER"].isin(matrix_df.columns)].copy()
+    category_df["LETTER_INDEX"] = range(len(category_df))
+    df = (
+        matrix_df[category_df["LETTER"]]
+        .set_axis(genomes, axis=0)
+        .rename_axis(index="GENOME", columns="LETTER")
+        .stack()
+        .rename("COUNT")
+        .reset_index()
+        .merge(category_df, on="LETTER", how="left")
+    )
+    total = df.groupby("GENOME", sort=False)["COUNT"].transform("sum")
+    df["RATIO"] = (df["COUNT"] / total.where(total != 0)).fillna(0.0)
+    df["RATIO(%)"] = df["RATIO"].map("{:.2%}".format)
+    df["L_DESCRIPTION"] = df["LETTER"] + " : " + df["DESCRIPTION"]
+
+    if percent_style:
+        yfield, ytitle, yformat = "RATIO", "Percent of Sequences", ".0%"
+    else:
+        yfield, ytitle, yformat = "COUNT", "Number of Sequences", "c"
+    l_descriptions = category_df["LETTER"] + " : " + category_df["DESCRIPTION"]
+    color = alt.Color(
+        "L_DESCRIPTION",
+        title="",
+        scale=alt.Scale(
+            domain=l_descriptions.to_list(),
+            range=category_df["COLOR"].to_list(),
+        ),
+    )
+    tooltip = ["GENOME", "DESCRIPTION", "LETTER", "COUNT", "RATIO(%)"]
+    title = "COG Functional Classification"
+
+    if style == "stacked":
+        fig_width = 30 * len(genomes) if fig_width is None else fig_width
+        fig_height = 340 if fig_height is None else fig_height
+        chart = (
+            alt.Chart(df, title=title)
+            .mark_bar(stroke="black", strokeWidth=0.2)
+            .encode(
+                x=alt.X("GENOME", title="Genome", sort=genomes),
+                y=alt.Y(yfield, title=ytitle, axis=alt.Axis(format=yformat)),
+                color=color,
+                order=alt.Order("LETTER_INDEX"),
+                tooltip=tooltip,
+            )
+            .properties(width=fig_width, height=fig_height)
+            .configure_axisX(labelAngle=-45)
+        )
+    else:
+        fig_width = 300 if fig_width is None else fig_width
+        fig_height = 200 if fig_height is None else fig_height
+        chart = (
+            alt.Chart(df)
+            .mark_bar(stroke="black", strokeWidth=0.2)
+            .encode(
+                x=alt.X("LETTER", title="Functional Category", sort=None),
+                y=alt.Y(yfield, title=ytitle, axis=alt.Axis(format=yformat)),
+                color=color,
+                tooltip=tooltip,
+            )
+            .properties(width=fig_width, height=fig_height)
+            .facet(
+                facet=alt.Facet("GENOME", title=None, sort=genomes),
+                columns=columns,
+                title=title,
+            )
+            .configure_axisX(labelAngle=0, tickSize=0)
+        )
+    chart = chart.configure_title(fontSize=15).configure_legend(labelLimit=0)
+    if outfile is not None:
+        save_chart(chart, outfile, dpi=dpi, renderer=renderer)
+
+    return chart
+
+
+_SPEC_LOCK = threading.Lock()
+
+
+class ChartRenderer:
+    """Altair Chart Renderer Class
+
+    Chart spec is built only once per chart and exported to all output files
+    (`*.png`|`*.svg`|`*.html`) in parallel using thread pool.
+    Renderer can be reused across multiple charts (e.g. batch mode of many genomes)
+    and shared by multiple threads (e.g. charts saved concurrently).
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        """
+        Parameters
+        ----------
+        max_workers : int | None, optional
+            Max number of export worker threads
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def save(
+        self,
+        chart: alt.TopLevelMixin,
+        outfiles: str | Path | list[str | Path],
+        *,
+        dpi: int = 100,
+    ) -> list[Path]:
+        """Save chart to output files
+
+        Parameters
+        ----------
+        chart : alt.TopLevelMixin
+            Altair chart
+        outfiles : str | Path | list[str | Path]
+            Chart output files (`*.png`|`*.svg`|`*.html`)
+        dpi : int, optional
+            Figure DPI (Only applied to `*.png`)
+
+        Returns
+        -------
+        outfiles : list[Path]
+            Chart output files
+        """
+        if isinstance(outfiles, (str, Path)):
+            outfiles = [outfiles]
+        outfiles = [Path(f) for f in outfiles]
+
+        # Temporarily turn off data transformers so that all data is inlined
+        # (Data transformers are global state, so spec is built under lock)
+        with _SPEC_LOCK:
+            with alt.data_transformers.enable("default"):
+                with alt.data_transformers.disable_max_rows():
+                    spec = chart.to_dict(context={"pre_transform": False})
+
+        futures = [
+            self._executor.submit(_export_spec, spec, outfile, dpi)
+            for outfile in outfiles
+        ]
+        for future in futures:
+            future.result()
+        return outfiles
+
+    def warm_up(self) -> None:
+        """Initialize chart converter (vl-convert) in background export thread
+
+        First chart export of a process initializes the converter engine, which is
+        often slower than the export itself. Warm-up overlaps it with other work
+        (e.g. RPS-BLAST search) before charts are saved.
+        """
+        self._executor.submit(_warm_up_converter)
+
+    def close(self) -> None:
+        """Shutdown export worker threads"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> ChartRenderer:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def _warm_up_converter() -> None:
+    """Export minimal vega-lite spec to initialize chart converter engine"""
+    spec = {"data": {"values": [{"x": 0}]}, "mark": "point"}
+    spec_to_mimebundle(spec, "png", mode="vega-lite")
+
+
+def _export_spec(spec: dict[str, Any], outfile: Path, dpi: int) -> None:
+    """Export vega-lite spec to output file (`*.png`|`*.svg`|`*.html`)"""
+    fmt = outfile.suffix.lstrip(".")
+    if fmt == "html":
+        bundle = spec_to_mimebundle(
+            spec,
+            "html",
+            mode="vega-lite",
+            vega_version=alt.VEGA_VERSION,
+            vegalite_version=alt.VEGALITE_VERSION,
+            vegaembed_version=alt.VEGAEMBED_VERSION,
+        )
+        content = bundle["text/html"]
+    elif fmt == "svg":
+        content = spec_to_mimebundle(spec, "svg", mode="vega-lite")["image/svg+xml"]
+    elif fmt == "png":
+        bundle, _ = spec_to_mimebundle(spec, "png", mode="vega-lite", ppi=dpi)
+        content = bundle["image/png"]
+    else:
+        raise ValueError(f"{outfile=} is unsupported format (*.png|*.svg|*.html)")
+
+    # Write to temporary file & rename to avoid partially written output
+    tmp_file = outfile.with_name(f".{outfile.name}.tmp")
+    if isinstance(content, bytes):
+        tmp_file.write_bytes(content)
+    else:
+        tmp_file.write_text(content, encoding="utf-8")
+    os.replace(tmp_file, outfile)
+
+
+def save_chart(
+    chart: alt.TopLevelMixin,
+    outfiles: str | Path | list[str | Path],
+    *,
+    dpi: int = 100,
+    renderer: ChartRenderer | None = None,
+) -> list[Path]:
+    """Save chart to output files with chart renderer
+
+    Parameters
+    ----------
+    chart : alt.TopLevelMixin
+        Altair chart
+    outfiles : str | Path | list[str | Path]
+        Chart output files (`*.png`|`*.svg`|`*.html`)
+    dpi : int, optional
+        Figure DPI (Only applied to `*.png`)
+    renderer : ChartRenderer | None, optional
+        Reusable chart renderer (If None, temporary renderer is used)
+
+    Returns
+    -------
+    outfiles : list[Path]
+        Chart output files
+    """
+    if renderer is not None:
+        return renderer.save(chart, outfiles, dpi=dpi)
+    with ChartRenderer() as tmp_renderer:
+        return tmp_renderer.save(chart, outfiles, dpi=dpi)
@@ -0,0 +1,68 @@
+from functools import partial
+from pathlib import Path
+from typing import Annotated, Optional
+
+import typer
+from typer import Argument, Option, Typer
+
+from cogclassifier.matrix import NORMALIZE_METHODS, CogCountMatrix
+
+Option = partial(Option, metavar="")
+
+app = Typer(add_completion=False)
+
+
+@app.command(
+    no_args_is_help=True,
+    epilog=None,
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+def cli(
+    infiles: Annotated[
+        list[Path],
+        Argument(
+            help="Input COG count result files ('cog_count.tsv')",
+            show_default=False,
+        ),
+    ],
+    outfile: Annotated[
+        Path,
+        Option(
+            "-o",
+            "--outfile",
+            help="Output count matrix file (Updated incrementally if exists)",
+            show_default=False,
+        ),
+    ],
+    overwrite: Annotated[
+        bool,
+        Option("--overwrite", help="Overwrite count of already added genomes"),
+    ] = False,
+    norm_outfile: Annotated[
+        Optional[Path],
+        Option(
+            "--norm_outfile",
+            help="Output normalized matrix file",
+            show_default=False,
+        ),
+    ] = None,
+    norm_method: Annotated[
+        str,
+        Option("--norm_method", help="Normalize method (count|ratio|zscore)"),
+    ] = "ratio",
+) -> None:
+    """Build genome x COG functional category count matrix"""
+    if norm_method not in NORMALIZE_METHODS:
+        raise typer.BadParameter(f"--norm_method must be one of {NORMALIZE_METHODS}")
+    matrix = CogCountMatrix(outfile)
+    added_genomes = matrix.add_files(infiles, overwrite=overwrite)  # type: ignore
+    matrix.compact()
+    typer.echo(f"Add {len(added_genomes)} genomes ({len(matrix)} genomes in {outfile})")
+
+    if norm_outfile is not None:
+        df = matrix.to_dataframe(normalize=norm_method)
+        df.to_csv(norm_outfile, sep="\t")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,105 @@
+import csv
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Annotated, Optional
+
+import typer
+from typer import Argument, Option, Typer
+
+from cogclassifier.cog import CLASSIFY_COLUMNS
+from cogclassifier.store import CogResultStore
+
+Option = partial(Option, metavar="")
+
+app = Typer(
+    add_completion=False,
+    no_args_is_help=True,
+    context_settings=dict(help_option_names=["-h", "--help"]),
+    help="Store & query COG classification results across genomes (SQLite)",
+)
+
+
+@app.command(no_args_is_help=True)
+def add(
+    infiles: Annotated[
+        list[Path],
+        Argument(
+            help="Input COG classification result files ('cog_classify.tsv')",
+            show_default=False,
+        ),
+    ],
+    store_file: Annotated[
+        Path,
+        Option(
+            "-s",
+            "--store",
+            help="Result store file (Created if not exists)",
+            show_default=False,
+        ),
+    ],
+    overwrite: Annotated[
+        bool,
+        Option("--overwrite", help="Overwrite results of already stored genomes"),
+    ] = False,
+) -> None:
+    """Add COG classification result files to result store"""
+    with CogResultStore(store_file) as store:
+        added_genomes = store.add_files(infiles, overwrite=overwrite)  # type: ignore
+        typer.echo(
+            f"Add {len(added_genomes)} genomes ({len(store)} genomes in {store_file})"
+        )
+
+
+@app.command(no_args_is_help=True)
+def query(
+    store_file: Annotated[
+        Path,
+        Option("-s", "--store", help="Result store file", show_default=False),
+    ],
+    genome: Annotated[
+        Optional[str],
+        Option("--genome", help="Target genome name", show_default=False),
+    ] = None,
+    query_id: Annotated[
+        Optional[str],
+        Option("--query_id", help="Target query ID", show_default=False),
+    ] = None,
+    cog_id: Annotated[
+        Optional[str],
+        Option("--cog_id", help="Target COG ID", show_default=False),
+    ] = None,
+    letter: Annotated[
+        Optional[str],
+        Option("--letter", help="Target COG letter", show_default=False),
+    ] = None,
+    genome_only: Annotated[
+        bool,
+        Option(
+            "--genome_only",
+            help="Print genome names & classified query count only",
+        ),
+    ] = False,
+) -> None:
+    """Query COG classification results in result store (Output TSV to stdout)"""
+    if not store_file.exists():
+        raise FileNotFoundError(f"{store_file=} is not found")
+    writer = csv.writer(sys.stdout, delimiter="\t", lineterminator="\n")
+    with CogResultStore(store_file) as store:
+        if genome_only:
+            writer.writerow(["GENOME", "QUERY_COUNT"])
+            genome2count = store.find_genomes(
+                genome=genome, query_id=query_id, cog_id=cog_id, letter=letter
+            )
+            writer.writerows(genome2count.items())
+            return
+        writer.writerow(["GENOME", *CLASSIFY_COLUMNS])
+        results = store.find(
+            genome=genome, query_id=query_id, cog_id=cog_id, letter=letter
+        )
+        for genome_name, c in results:
+            writer.writerow([genome_name, *c])
+
+
+if __name__ == "__main__":
+    app()
@@ -3,24 +3,40 @@
 import logging
 import os
 import platform
+import shutil
+import socket
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Any, Callable, Optional
 
 import typer
 from typer import Option, Typer
 
 from cogclassifier import CogClassifier, __version__, const
+from cogclassifier.compress import COMPRESS_FORMATS, compressed_name
+from cogclassifier.fasta import EXPORT_KEYS
 from cogclassifier.logger import init_logger
-from cogclassifier.plot import (
-    plot_cog_count_barchart,
-    plot_cog_count_piechart,
+from cogclassifier.manifest import RunManifest, fingerprint
+from cogclassifier.metrics import CACHE_HITS, REGISTRY
+from cogclassifier.output import (
+    COUNT_CHART_FILENAMES,
+    PROPORTION_FILENAME,
+    classify_result_filenames,
+    export_classify_fasta,
+    plot_count_charts,
+    write_classify_results,
+    write_proportion_estimates,
 )
-from cogclassifier.utils import exit_handler, logging_timeit
+from cogclassifier.store import CogResultStore
+from cogclassifier.utils import exit_handler, logging_timeit, profile_stage
 
 Option = partial(Option, metavar="")
 
+CLI_BACKENDS = ("rpsblast", "sharded")
+
 app = Typer(add_completion=False)
 
 
@@ -61,6 +77,20 @@ def cli(
         Path,
         Option("-d", "--download_dir", help="Download COG & CDD resources directory"),
     ] = const.CACHE_DIR,
+    update_resources: Annotated[
+        bool,
+        Option(
+            "--update_resources",
+            help="Re-download changed COG & CDD resources (Checked by HTTP HEAD)",
+        ),
+    ] = False,
+    keep_archive: Annotated[
+        bool,
+        Option(
+            "--keep_archive",
+            help="Keep 'Cog_LE.tar.gz' archive (Extracted while downloading)",
+        ),
+    ] = False,
     thread_num: Annotated[
         int,
         Option("-t", "--thread_num", help="RPS-BLAST num_thread parameter"),
@@ -69,6 +99,131 @@ def cli(
         float,
         Option("-e", "--evalue", help="RPS-BLAST e-value parameter"),
     ] = 1e-2,
+    backend: Annotated[
+        str,
+        Option("--backend", help="Search backend ('rpsblast'|'sharded')"),
+    ] = "rpsblast",
+    multi_domain: Annotated[
+        bool,
+        Option(
+            "--multi_domain",
+            help="Classify all non-overlapping domain hits per query (Default: top hit only)",  # noqa: E501
+        ),
+    ] = False,
+    no_plot: Annotated[
+        bool,
+        Option("--no_plot", help="No plot COG count barchart & piechart figures"),
+    ] = False,
+    subset_letters: Annotated[
+        Optional[str],
+        Option(
+            "--subset_letters",
+            help="Search only COG profiles of target letters (e.g. 'V,L,X')",
+            show_default=False,
+        ),
+    ] = None,
+    subset_cog_ids: Annotated[
+        Optional[str],
+        Option(
+            "--subset_cog_ids",
+            help="Search only target COG ID profiles (e.g. 'COG0001,COG0002')",
+            show_default=False,
+        ),
+    ] = None,
+    rpsblast_file: Annotated[
+        Optional[Path],
+        Option(
+            "--rpsblast_file",
+            help="Existing RPS-BLAST result file of query (Skip RPS-BLAST search & reclassify)",  # noqa: E501
+            show_default=False,
+        ),
+    ] = None,
+    compress: Annotated[
+        Optional[str],
+        Option(
+            "--compress",
+            help="Compress tsv outputs in 'gz' or 'zst' format",
+            show_default=False,
+        ),
+    ] = None,
+    export_fasta: Annotated[
+        Optional[str],
+        Option(
+            "--export_fasta",
+            help="Export classified query sequences per 'letter' or 'cog_id'",
+            show_default=False,
+        ),
+    ] = None,
+    store_file: Annotated[
+        Optional[Path],
+        Option(
+            "--store",
+            help="Result store file to add classification results (Genome name = outdir name)",  # noqa: E501
+            show_default=False,
+        ),
+    ] = None,
+    metrics_file: Annotated[
+        Optional[Path],
+        Option(
+            "--metrics_file",
+            help="Output OpenMetrics text file of run metrics (e.g. 'cogclassifier.prom')",  # noqa: E501
+            show_default=False,
+        ),
+    ] = None,
+    metrics_port: Annotated[
+        Optional[int],
+        Option(
+            "--metrics_port",
+            help="Expose run metrics by HTTP endpoint ('/metrics') on this port",
+            show_default=False,
+        ),
+    ] = None,
+    fix_query: Annotated[
+        bool,
+        Option(
+            "--fix_query",
+            help="Fix invalid query fasta (e.g. duplicate ID, empty sequence) before search",  # noqa: E501
+        ),
+    ] = False,
+    sample_size: Annotated[
+        Optional[int],
+        Option(
+            "--sample_size",
+            help="Search only N randomly sampled queries & estimate COG proportions",
+            show_default=False,
+        ),
+    ] = None,
+    sample_fraction: Annotated[
+        Optional[float],
+        Option(
+            "--sample_fraction",
+            help="Search only randomly sampled fraction of queries (0 < F <= 1)",
+            show_default=False,
+        ),
+    ] = None,
+    sample_seed: Annotated[
+        int,
+        Option("--sample_seed", help="Random seed of query sampling & bootstrap"),
+    ] = 0,
+    time_limit: Annotated[
+        Optional[float],
+        Option(
+            "--time_limit",
+            help="Time limit seconds of search (Partial result of processed queries)",
+            show_default=False,
+        ),
+    ] = None,
+    profile: Annotated[
+        bool,
+        Option(
+            "--profile",
+            help="Profile each stage by cProfile & tracemalloc (Output in 'outdir/profile')",  # noqa: E501
+        ),
+    ] = False,
+    force: Annotated[
+        bool,
+        Option("--force", help="Re-run all stages even if outputs are up to date"),
+    ] = False,
     quiet: Annotated[
         bool,
         Option("-q", "--quiet", help="No print log on screen"),
@@ -90,6 +245,24 @@ def cli(
 ) -> None:
     """A tool for classifying prokaryote protein sequences into COG functional category"""  # noqa: E501
     args = locals()
+    if export_fasta is not None and export_fasta not in EXPORT_KEYS:
+        raise typer.BadParameter(f"--export_fasta must be one of {EXPORT_KEYS}")
+    if backend not in CLI_BACKENDS:
+        raise typer.BadParameter(f"--backend must be one of {CLI_BACKENDS}")
+    if compress is not None and compress not in COMPRESS_FORMATS:
+        raise typer.BadParameter(f"--compress must be one of {COMPRESS_FORMATS}")
+    if sample_size is not None and sample_fraction is not None:
+        raise typer.BadParameter("--sample_size & --sample_fraction are exclusive")
+    if sample_size is not None and sample_size <= 0:
+        raise typer.BadParameter("--sample_size must be positive")
+    if sample_fraction is not None and not 0 < sample_fraction <= 1:
+        raise typer.BadParameter("--sample_fraction must be in (0, 1]")
+    if (sample_size or sample_fraction) and rpsblast_file is not None:
+        raise typer.BadParameter("Query sampling cannot be used with --rpsblast_file")
+    if time_limit is not None and time_limit <= 0:
+        raise typer.BadParameter("--time_limit must be positive")
+    if time_limit is not None and rpsblast_file is not None:
+        raise typer.BadParameter("--time_limit cannot be used with --rpsblast_file")
     os.makedirs(outdir, exist_ok=True)
 
     # Initialize logger
@@ -105,48 +278,176 @@ def cli(
     for name, value in args.items():
         if name not in ("quiet", "debug", "_"):
             logger.info(f"Parameter: {name}={value}")
-    cog_stats = CogClassifier(
-        infile,
-        download_dir=download_dir,
-        thread_num=thread_num,
-        evalue=evalue,
-    ).run()
-
-    # Write RPS-BLAST result
-    rpsblast_file = outdir / "rpsblast.tsv"
-    with open(rpsblast_file, "w") as f:
-        f.write(str(cog_stats.blast_rec))
-    logger.info("Write rpsblast search result")
-    logger.info(f"=> {rpsblast_file}")
-
-    # Write COG count summary
-    cog_count_file = outdir / "cog_count.tsv"
-    cog_stats.count_summary_df.to_csv(cog_count_file, sep="\t", index=False)
-    logger.info("Write summary of COG functional category count")
-    logger.info(f"=> {cog_count_file}")
-    # Write COG classification result
-    cog_classify_file = outdir / "cog_classify.tsv"
-    cog_stats.query_classify_df.to_csv(cog_classify_file, sep="\t", index=False)
-    logger.info("Write result of COG classification per query")
-    logger.info(f"=> {cog_classify_file}")
-
-    # Plot barchart
-    barchart_html_file = outdir / "cog_count_barchart.html"
-    barchart_png_file = barchart_html_file.with_suffix(".png")
-    logger.info("Plot COG count barchart figure")
-    plot_cog_count_barchart(cog_stats.count_summary_df, barchart_html_file)
-    logger.info(f"=> {barchart_html_file}")
-    plot_cog_count_barchart(cog_stats.count_summary_df, barchart_png_file)
-    logger.info(f"=> {barchart_png_file}")
-    # Plot piechart
-    piechart_html_file = outdir / "cog_count_piechart.html"
-    piechart_png_file = piechart_html_file.with_suffix(".png")
-    props = dict(show_letter=True, sort=True)
-    logger.info("Plot COG count piechart figure")
-    plot_cog_count_piechart(cog_stats.count_summary_df, piechart_html_file, **props)  # type: ignore
-    logger.info(f"=> {piechart_html_file}")
-    plot_cog_count_piechart(cog_stats.count_summary_df, piechart_png_file, **props)  # type: ignore
-    logger.info(f"=> {piechart_png_file}")
+    if metrics_file is not None:
+        REGISTRY.enable_export()
+    server = None
+    if metrics_port is not None:
+        server = REGISTRY.start_http_server(metrics_port)
+        logger.info(
+            f"Expose run metrics => http://{socket.getfqdn()}:{server.server_address[1]}/metrics"  # noqa: E501
+        )
+    renderer = None
+    try:
+        # RPS-BLAST result is directly written to output directory
+        rpsblast_outfile = outdir / compressed_name("rpsblast.tsv", compress)
+        classifier = CogClassifier(
+            infile,
+            download_dir=download_dir,
+            thread_num=thread_num,
+            evalue=evalue,
+            rpsblast_outfile=rpsblast_outfile,
+            multi_domain=multi_domain,
+            rpsblast_file=rpsblast_file,
+            force=force,
+            subset_letters=_split_csv(subset_letters),
+            subset_cog_ids=_split_csv(subset_cog_ids),
+            fix_query=fix_query,
+            profile_dir=outdir / "profile" if profile else None,
+            backend=backend,
+            update_resources=update_resources,
+            keep_archive=keep_archive,
+            sample_size=sample_size,
+            sample_fraction=sample_fraction,
+            sample_seed=sample_seed,
+            time_limit=time_limit,
+        )
+
+        # Each stage is memoized by run manifest (stage => key & output names)
+        classify_key = classifier.classify_key
+        stage2outputs = {
+            "search": (classifier.search_key, [rpsblast_outfile.name]),
+            "classify": (classify_key, classify_result_filenames(compress)),
+        }
+        if export_fasta is not None:
+            export_key = fingerprint(classify_key, export_fasta)
+            stage2outputs["export_fasta"] = (export_key, [f"fasta_by_{export_fasta}"])
+        is_sampling = sample_size is not None or sample_fraction is not None
+        if is_sampling:
+            proportion_key = fingerprint(classify_key, "proportion")
+            stage2outputs["proportion"] = (proportion_key, [PROPORTION_FILENAME])
+        if not no_plot:
+            stage2outputs["plot"] = (classify_key, list(COUNT_CHART_FILENAMES))
+        genome = outdir.resolve().name
+        manifest = RunManifest.load(outdir)
+        if (
+            not force
+            and _is_stored(store_file, genome)
+            and all(
+                manifest.is_up_to_date(stage, key, outdir, names)
+                for stage, (key, names) in stage2outputs.items()
+            )
+        ):
+            logger.info("All outputs are up to date (Use --force option to re-run)")
+            CACHE_HITS.inc(cache="run")
+            return
+
+        if not no_plot:
+            plot_key, plot_names = stage2outputs["plot"]
+            if force or not manifest.is_up_to_date(
+                "plot", plot_key, outdir, plot_names
+            ):
+                # Single chart renderer is shared by all charts, and chart converter
+                # startup is overlapped with search (No warm-up if profiled)
+                from cogclassifier.plot import ChartRenderer
+
+                renderer = ChartRenderer()
+                if classifier.profiler is None:
+                    renderer.warm_up()
+
+        cog_stats = classifier.run()
+        logger.info("Write rpsblast search result")
+        logger.info(f"=> {rpsblast_outfile}")
+        if cog_stats.is_partial:
+            processed_query = outdir / "query_processed.faa"
+            shutil.copyfile(cog_stats.query_file, processed_query)
+            logger.info("Write processed query fasta of partial result")
+            logger.info(f"=> {processed_query}")
+
+        manifest = RunManifest.load(outdir)
+        manifest_lock = threading.Lock()
+
+        def run_stage(stage: str, func: Callable[[], Any]) -> bool:
+            key, names = stage2outputs[stage]
+            with manifest_lock:
+                is_up_to_date = manifest.is_up_to_date(stage, key, outdir, names)
+            if not force and is_up_to_date:
+                logger.info(f"Skip {stage} stage (Outputs are up to date)")
+                CACHE_HITS.inc(cache=stage)
+                return False
+            with profile_stage(classifier.profiler, f"output_{stage}"):
+                func()
+            # Partial result by time limit is not memoized
+            if not cog_stats.is_partial:
+                with manifest_lock:
+                    manifest.record(stage, key, outdir, names)
+                    manifest.save(outdir)
+            return True
+
+        # Lazy summary shared by output stages is computed before threading
+        count_summary_df = cog_stats.count_summary_df
+        stage2func: dict[str, Callable[[], Any]] = {
+            "classify": lambda: write_classify_results(
+                cog_stats, outdir, compress=compress, thread_num=thread_num
+            ),
+        }
+        if export_fasta is not None:
+            stage2func["export_fasta"] = lambda: export_classify_fasta(
+                cog_stats, outdir, by=export_fasta
+            )
+        if is_sampling:
+            stage2func["proportion"] = lambda: write_proportion_estimates(
+                cog_stats, outdir, seed=sample_seed
+            )
+        if not no_plot:
+            stage2func["plot"] = lambda: plot_count_charts(
+                count_summary_df, outdir, renderer=renderer
+            )
+        # Output stages (TSV writing, fasta & chart export) run concurrently
+        # (Sequentially run if profiled, since profilers cannot be overlapped)
+        max_workers = 1 if classifier.profiler is not None else len(stage2func)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            stage2future = {
+                stage: executor.submit(run_stage, stage, func)
+                for stage, func in stage2func.items()
+            }
+            stage2run = {stage: f.result() for stage, f in stage2future.items()}
+
+        if cog_stats.is_partial and store_file is not None:
+            logger.warning("Partial result by time limit is not added to result store")
+        elif store_file is not None and (
+            stage2run["classify"] or not _is_stored(store_file, genome)
+        ):
+            with CogResultStore(store_file) as store:
+                store.add(genome, cog_stats, overwrite=True)
+            logger.info(f"Add classification results of '{genome}' to result store")
+            logger.info(f"=> {store_file}")
+        # Close memory-mapped query fasta of classification results
+        cog_stats.close()
+    finally:
+        if renderer is not None:
+            renderer.close()
+        if metrics_file is not None:
+            REGISTRY.write_textfile(metrics_file)
+            logger.info(f"Write run metrics => {metrics_file}")
+        if server is not None:
+            server.shutdown()
+
+
+def _split_csv(value: Optional[str]) -> Optional[list[str]]:
+    """Split comma separated option value (None if not set)"""
+    if value is None:
+        return None
+    return [v.strip() for v in value.split(",") if v.strip() != ""]
+
+
+def _is_stored(store_file: Optional[Path], genome: str) -> bool:
+    """Check if genome is already stored in result store (True if no store)"""
+    if store_file is None:
+        return True
+    if not store_file.exists():
+        return False
+    with CogResultStore(store_file) as store:
+        return genome in store
 
 
 if __name__ == "__main__":
@@ -0,0 +1,255 @@
+import logging
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Annotated, Optional
+
+import typer
+from typer import Argument, Option, Typer
+
+from cogclassifier import const
+from cogclassifier.compress import COMPRESS_FORMATS
+from cogclassifier.logger import init_logger
+from cogclassifier.metrics import REGISTRY
+from cogclassifier.shard import (
+    MANIFEST_FILENAME,
+    merge_shards,
+    plan_shards,
+    run_shard,
+    run_shard_worker,
+)
+from cogclassifier.utils import exit_handler, logging_timeit
+
+Option = partial(Option, metavar="")
+
+app = Typer(
+    add_completion=False,
+    no_args_is_help=True,
+    context_settings=dict(help_option_names=["-h", "--help"]),
+    help="Multi-node scatter/gather workflow of COGclassifier (plan -> work -> merge)",
+)
+
+
+@app.command(no_args_is_help=True)
+@logging_timeit
+@exit_handler
+def plan(
+    infiles: Annotated[
+        list[Path],
+        Argument(help="Input query protein fasta files", show_default=False),
+    ],
+    workdir: Annotated[
+        Path,
+        Option(
+            "-w",
+            "--workdir",
+            help="Shard working directory (Shared by all nodes)",
+            show_default=False,
+        ),
+    ],
+    shard_size: Annotated[
+        int,
+        Option("-s", "--shard_size", help="Max number of query sequences per shard"),
+    ] = 1000,
+    evalue: Annotated[
+        float,
+        Option("-e", "--evalue", help="RPS-BLAST e-value parameter"),
+    ] = 1e-2,
+    multi_domain: Annotated[
+        bool,
+        Option(
+            "--multi_domain",
+            help="Classify all non-overlapping domain hits per query",
+        ),
+    ] = False,
+    quiet: Annotated[
+        bool,
+        Option("-q", "--quiet", help="No print log on screen"),
+    ] = False,
+) -> None:
+    """Split query fasta files into shards & write shard manifest"""
+    init_logger(quiet=quiet)
+    plan_shards(
+        infiles,  # type: ignore
+        workdir,
+        shard_size=shard_size,
+        evalue=evalue,
+        multi_domain=multi_domain,
+    )
+
+
+@app.command(no_args_is_help=True)
+@logging_timeit
+@exit_handler
+def work(
+    manifest_file: Annotated[
+        Path,
+        Option(
+            "-m",
+            "--manifest",
+            help=f"Shard manifest file ('{MANIFEST_FILENAME}')",
+            show_default=False,
+        ),
+    ],
+    shard_id: Annotated[
+        Optional[str],
+        Option(
+            "--shard_id",
+            help="Target shard ID (If not set, run all pending shards)",
+            show_default=False,
+        ),
+    ] = None,
+    download_dir: Annotated[
+        Path,
+        Option("-d", "--download_dir", help="Download COG & CDD resources directory"),
+    ] = const.CACHE_DIR,
+    thread_num: Annotated[
+        int,
+        Option("-t", "--thread_num", help="RPS-BLAST num_thread parameter"),
+    ] = const.DEFAULT_CPU,
+    workers: Annotated[
+        int,
+        Option("--workers", help="Number of local workers running pending shards"),
+    ] = 1,
+    force: Annotated[
+        bool,
+        Option("--force", help="Re-run already completed shard (with --shard_id)"),
+    ] = False,
+    metrics_file: Annotated[
+        Optional[Path],
+        Option(
+            "--metrics_file",
+            help="Output OpenMetrics text file of run metrics",
+            show_default=False,
+        ),
+    ] = None,
+    metrics_port: Annotated[
+        Optional[int],
+        Option(
+            "--metrics_port",
+            help="Expose run metrics by HTTP endpoint ('/metrics') on this port",
+            show_default=False,
+        ),
+    ] = None,
+    quiet: Annotated[
+        bool,
+        Option("-q", "--quiet", help="No print log on screen"),
+    ] = False,
+) -> None:
+    """Run RPS-BLAST search of single shard or all pending shards"""
+    init_logger(quiet=quiet)
+    logger = logging.getLogger(__name__)
+    if metrics_file is not None:
+        REGISTRY.enable_export()
+    server = None
+    if metrics_port is not None:
+        server = REGISTRY.start_http_server(metrics_port)
+        logger.info(
+            f"Expose run metrics => http://{socket.getfqdn()}:{metrics_port}/metrics"
+        )
+    try:
+        if shard_id is not None:
+            run_shard(
+                manifest_file,
+                shard_id,
+                download_dir=download_dir,
+                thread_num=thread_num,
+                force=force,
+            )
+            return
+
+        worker = partial(
+            run_shard_worker,
+            manifest_file,
+            download_dir=download_dir,
+            thread_num=thread_num,
+        )
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(worker) for _ in range(workers)]
+            completed_count = sum(len(future.result()) for future in futures)
+        logger.info(f"{completed_count} shards are completed by {workers} workers")
+    finally:
+        if metrics_file is not None:
+            REGISTRY.write_textfile(metrics_file)
+        if server is not None:
+            server.shutdown()
+
+
+@app.command(no_args_is_help=True)
+@logging_timeit
+@exit_handler
+def merge(
+    manifest_file: Annotated[
+        Path,
+        Option(
+            "-m",
+            "--manifest",
+            help=f"Shard manifest file ('{MANIFEST_FILENAME}')",
+            show_default=False,
+        ),
+    ],
+    outdir: Annotated[
+        Path,
+        Option(
+            "-o",
+            "--outdir",
+            help="Output directory (Outputs are written in 'outdir/{genome}/')",
+            show_default=False,
+        ),
+    ],
+    download_dir: Annotated[
+        Path,
+        Option("-d", "--download_dir", help="Download COG & CDD resources directory"),
+    ] = const.CACHE_DIR,
+    no_plot: Annotated[
+        bool,
+        Option("--no_plot", help="No plot COG count barchart & piechart figures"),
+    ] = False,
+    compress: Annotated[
+        Optional[str],
+        Option(
+            "--compress",
+            help="Compress tsv outputs in 'gz' or 'zst' format",
+            show_default=False,
+        ),
+    ] = None,
+    thread_num: Annotated[
+        int,
+        Option("-t", "--thread_num", help="Number of loading & compression threads"),
+    ] = const.DEFAULT_CPU,
+    metrics_file: Annotated[
+        Optional[Path],
+        Option(
+            "--metrics_file",
+            help="Output OpenMetrics text file of run metrics",
+            show_default=False,
+        ),
+    ] = None,
+    quiet: Annotated[
+        bool,
+        Option("-q", "--quiet", help="No print log on screen"),
+    ] = False,
+) -> None:
+    """Merge shard results into per genome COGclassifier outputs"""
+    if compress is not None and compress not in COMPRESS_FORMATS:
+        raise typer.BadParameter(f"--compress must be one of {COMPRESS_FORMATS}")
+    init_logger(quiet=quiet)
+    if metrics_file is not None:
+        REGISTRY.enable_export()
+    try:
+        merge_shards(
+            manifest_file,
+            outdir,
+            download_dir=download_dir,
+            plot=not no_plot,
+            compress=compress,
+            thread_num=thread_num,
+        )
+    finally:
+        if metrics_file is not None:
+            REGISTRY.write_textfile(metrics_file)
+
+
+if __name__ == "__main__":
+    app()
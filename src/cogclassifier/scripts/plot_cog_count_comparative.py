@@ -0,0 +1,103 @@
+from functools import partial
+from pathlib import Path
+from typing import Annotated, Optional
+
+import typer
+from typer import Argument, Option, Typer
+
+from cogclassifier.matrix import load_cog_count_files
+from cogclassifier.plot import COMPARATIVE_STYLES, plot_cog_count_comparative_chart
+
+Option = partial(Option, metavar="")
+
+app = Typer(add_completion=False)
+
+
+@app.command(
+    no_args_is_help=True,
+    epilog=None,
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+def cli(
+    outfile: Annotated[
+        Path,
+        Option(
+            "-o",
+            "--outfile",
+            help="Output comparative chart figure file (*.png|*.svg|*.html)",
+            show_default=False,
+        ),
+    ],
+    infiles: Annotated[
+        Optional[list[Path]],
+        Argument(
+            help="Input COG count result files ('cog_count.tsv')",
+            show_default=False,
+        ),
+    ] = None,
+    matrix_file: Annotated[
+        Optional[Path],
+        Option(
+            "-m",
+            "--matrix",
+            help="Input COG count matrix file ('cog_count_matrix' output)",
+            show_default=False,
+        ),
+    ] = None,
+    style: Annotated[
+        str,
+        Option("--style", help=f"Chart style ({'|'.join(COMPARATIVE_STYLES)})"),
+    ] = "stacked",
+    width: Annotated[
+        Optional[int],
+        Option(
+            "--width",
+            help="Figure (or panel) pixel width (Auto if not set)",
+            show_default=False,
+        ),
+    ] = None,
+    height: Annotated[
+        Optional[int],
+        Option(
+            "--height",
+            help="Figure (or panel) pixel height (Auto if not set)",
+            show_default=False,
+        ),
+    ] = None,
+    columns: Annotated[
+        int,
+        Option("--columns", help="Number of panel columns (faceted style)"),
+    ] = 4,
+    percent_style: Annotated[
+        bool,
+        Option("--percent_style", help="Plot percent style instead of number count"),
+    ] = False,
+    dpi: Annotated[
+        int,
+        Option("--dpi", help="Figure DPI"),
+    ] = 100,
+) -> None:
+    """Plot COG count comparative chart of multiple genomes"""
+    if style not in COMPARATIVE_STYLES:
+        raise typer.BadParameter(f"{style=} is invalid ({COMPARATIVE_STYLES=})")
+    if (infiles is None or len(infiles) == 0) == (matrix_file is None):
+        raise typer.BadParameter("Set either input count files or --matrix option")
+
+    if matrix_file is not None:
+        data = matrix_file
+    else:
+        data = load_cog_count_files(infiles)  # type: ignore
+    plot_cog_count_comparative_chart(
+        data,
+        outfile,
+        style=style,
+        fig_width=width,
+        fig_height=height,
+        columns=columns,
+        percent_style=percent_style,
+        dpi=dpi,
+    )
+
+
+if __name__ == "__main__":
+    app()
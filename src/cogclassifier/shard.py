@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import socket
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from cogclassifier import const, utils
+from cogclassifier.blast import BlastAlignmentRecord, RpsBlast
+from cogclassifier.cog import (
+    CogCddIdTable,
+    CogClassifyStats,
+    CogDefinitionRecord,
+    CogFuncCategoryRecord,
+)
+from cogclassifier.compress import compressed_name, xopen
+from cogclassifier.fasta import chunk_fasta_records, format_fasta_record
+from cogclassifier.main import CogClassifier
+from cogclassifier.metrics import CACHE_HITS, SHARDS_COMPLETED, record_classify_stats
+from cogclassifier.output import plot_count_charts, write_classify_results
+
+if TYPE_CHECKING:
+    from cogclassifier.plot import ChartRenderer
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+class Shard(BaseModel):
+    """Query Shard Class"""
+
+    id: str
+    genome: str
+    fasta_file: str
+    query_count: int
+
+
+class ShardGenome(BaseModel):
+    """Sharded Genome Class"""
+
+    name: str
+    query_file: str
+    shard_ids: list[str]
+
+
+class ShardManifest(BaseModel):
+    """Shard Manifest Class
+
+    Manifest is written once by `plan` and never updated by `work` & `merge`.
+    Shard completion is tracked by presence of each shard result file, so that
+    workers on different nodes never write to a shared manifest file.
+    """
+
+    evalue: float
+    multi_domain: bool
+    genomes: list[ShardGenome]
+    shards: list[Shard]
+
+    @classmethod
+    def load(cls, manifest_file: str | Path) -> ShardManifest:
+        """Load shard manifest file"""
+        with open(manifest_file, encoding="utf-8") as f:
+            return cls.model_validate_json(f.read())
+
+    def save(self, manifest_file: str | Path) -> None:
+        """Save shard manifest file"""
+        _atomic_write(manifest_file, self.model_dump_json(indent=2))
+
+    def get_shard(self, shard_id: str) -> Shard:
+        """Get target ID shard"""
+        for shard in self.shards:
+            if shard.id == shard_id:
+                return shard
+        raise ValueError(f"{shard_id=} is not found in shard manifest")
+
+
+def plan_shards(
+    queries: list[str | Path],
+    workdir: str | Path,
+    *,
+    shard_size: int = 1000,
+    evalue: float = 1e-2,
+    multi_domain: bool = False,
+) -> Path:
+    """Split query fasta files into shards & write shard manifest
+
+    Parameters
+    ----------
+    queries : list[str | Path]
+        Query protein fasta files (Genome name = file name without suffix)
+    workdir : str | Path
+        Shard working directory (Shared by all nodes)
+    shard_size : int, optional
+        Max number of query sequences per shard
+    evalue : float, optional
+        RPS-BLAST e-value parameter
+    multi_domain : bool, optional
+        If True, classify all non-overlapping domain hits per query
+
+    Returns
+    -------
+    manifest_file : Path
+        Shard manifest file
+    """
+    if shard_size < 1:
+        raise ValueError(f"{shard_size=} must be larger than 0")
+    workdir = Path(workdir)
+    shard_dir = workdir / "shards"
+    os.makedirs(shard_dir, exist_ok=True)
+
+    genomes: list[ShardGenome] = []
+    shards: list[Shard] = []
+    for query in queries:
+        query = Path(query).resolve()
+        name = query.name.split(".")[0]
+        if name in [genome.name for genome in genomes]:
+            raise ValueError(f"Duplicate genome name '{name}' ({query})")
+
+        shard_ids: list[str] = []
+        for idx, records in enumerate(chunk_fasta_records(query, shard_size)):
+            shard_id = f"{name}_{idx:05d}"
+            shard_fasta_file = shard_dir / f"{shard_id}.faa"
+            data = b"".join(format_fasta_record(*record) for record in records)
+            _atomic_write(shard_fasta_file, data)
+            shards.append(
+                Shard(
+                    id=shard_id,
+                    genome=name,
+                    fasta_file=str(shard_fasta_file.resolve()),
+                    query_count=len(records),
+                )
+            )
+            shard_ids.append(shard_id)
+        genome = ShardGenome(name=name, query_file=str(query), shard_ids=shard_ids)
+        genomes.append(genome)
+
+    manifest = ShardManifest(
+        evalue=evalue,
+        multi_domain=multi_domain,
+        genomes=genomes,
+        shards=shards,
+    )
+    manifest_file = workdir / MANIFEST_FILENAME
+    manifest.save(manifest_file)
+
+    logger = logging.getLogger(__name__)
+    logger.info(f"Plan {len(shards)} shards of {len(genomes)} genomes")
+    logger.info(f"=> {manifest_file}")
+    return manifest_file
+
+
+def shard_result_file(shard: Shard) -> Path:
+    """RPS-BLAST result file of shard"""
+    return Path(shard.fasta_file).with_suffix(".rpsblast.tsv")
+
+
+def run_shard(
+    manifest_file: str | Path,
+    shard_id: str,
+    *,
+    download_dir: str | Path | None = None,
+    thread_num: int | None = None,
+    force: bool = False,
+) -> Path:
+    """Run RPS-BLAST search of single shard
+
+    Shard result file is written atomically (temporary file & rename),
+    so a partially written result is never regarded as completed.
+
+    Parameters
+    ----------
+    manifest_file : str | Path
+        Shard manifest file
+    shard_id : str
+        Target shard ID
+    download_dir : str | Path | None, optional
+        Download COG & CDD resources directory
+    thread_num : int | None, optional
+        RPS-BLAST num_thread parameter
+    force : bool, optional
+        If True, re-run already completed shard
+
+    Returns
+    -------
+    shard_result_file : Path
+        Shard RPS-BLAST result file
+    """
+    download_dir = const.CACHE_DIR if download_dir is None else download_dir
+    thread_num = const.DEFAULT_CPU if thread_num is None else thread_num
+    logger = logging.getLogger(__name__)
+
+    manifest = ShardManifest.load(manifest_file)
+    shard = manifest.get_shard(shard_id)
+    result_file = shard_result_file(shard)
+    if result_file.exists() and not force:
+        logger.info(f"Shard '{shard_id}' is already completed ({result_file})")
+        CACHE_HITS.inc(cache="shard")
+        return result_file
+
+    _, rpsblast_db = CogClassifier.download_resources(download_dir)
+    tmp_result_file = result_file.with_name(
+        f".{result_file.name}.{socket.gethostname()}.{os.getpid()}.tmp"
+    )
+    logger.info(f"Run shard '{shard_id}' ({shard.query_count} queries)")
+    RpsBlast(
+        shard.fasta_file,
+        rpsblast_db,
+        outfile=tmp_result_file,
+        evalue=manifest.evalue,
+        thread_num=thread_num,
+    ).run()
+    os.replace(tmp_result_file, result_file)
+    SHARDS_COMPLETED.inc()
+    logger.info(f"=> {result_file}")
+    return result_file
+
+
+def run_shard_worker(
+    manifest_file: str | Path,
+    *,
+    download_dir: str | Path | None = None,
+    thread_num: int | None = None,
+) -> list[str]:
+    """Run pending shards one by one until no pending shard remains
+
+    Each shard is claimed by exclusively creating a lock file, so multiple
+    workers (on the same node or on different nodes) can run concurrently.
+    A lock file left by a crashed worker must be removed manually to re-run it.
+
+    Parameters
+    ----------
+    manifest_file : str | Path
+        Shard manifest file
+    download_dir : str | Path | None, optional
+        Download COG & CDD resources directory
+    thread_num : int | None, optional
+        RPS-BLAST num_thread parameter
+
+    Returns
+    -------
+    completed_shard_ids : list[str]
+        Shard IDs completed by this worker
+    """
+    manifest = ShardManifest.load(manifest_file)
+    completed_shard_ids = []
+    for shard in manifest.shards:
+        if shard_result_file(shard).exists():
+            continue
+        lock_file = Path(shard.fasta_file).with_suffix(".lock")
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(f"{socket.gethostname()}\t{os.getpid()}\n")
+        try:
+            # Shard may be completed by other worker before lock is acquired
+            if shard_result_file(shard).exists():
+                continue
+            run_shard(
+                manifest_file,
+                shard.id,
+                download_dir=download_dir,
+                thread_num=thread_num,
+            )
+            completed_shard_ids.append(shard.id)
+        finally:
+            lock_file.unlink(missing_ok=True)
+    return completed_shard_ids
+
+
+def merge_shards(
+    manifest_file: str | Path,
+    outdir: str | Path,
+    *,
+    download_dir: str | Path | None = None,
+    plot: bool = True,
+    compress: str | None = None,
+    thread_num: int | None = None,
+) -> dict[str, CogClassifyStats]:
+    """Merge shard results into per genome COGclassifier outputs
+
+    Shard results are concatenated in manifest shard order, so merged outputs are
+    deterministic and re-running merge produces identical outputs.
+
+    Parameters
+    ----------
+    manifest_file : str | Path
+        Shard manifest file
+    outdir : str | Path
+        Output directory (Outputs are written in `outdir/{genome}/`)
+    download_dir : str | Path | None, optional
+        Download COG & CDD resources directory
+    plot : bool, optional
+        If True, plot COG count barchart & piechart figures
+    compress : str | None, optional
+        Compression format of tsv outputs (`gz`|`zst`)
+    thread_num : int | None, optional
+        Number of threads of result loading & zstd compression
+
+    Returns
+    -------
+    genome2stats : dict[str, CogClassifyStats]
+        Genome name & COG classification result statistics dict
+    """
+    download_dir = const.CACHE_DIR if download_dir is None else download_dir
+    thread_num = const.DEFAULT_CPU if thread_num is None else thread_num
+
+    manifest = ShardManifest.load(manifest_file)
+    pending_shard_ids = [
+        shard.id for shard in manifest.shards if not shard_result_file(shard).exists()
+    ]
+    if len(pending_shard_ids) > 0:
+        raise RuntimeError(f"Pending shards exist ({pending_shard_ids=})")
+
+    cddid_tbl_gzfile = utils.ftp_download(const.CDDID_TBL_FTP, download_dir)
+    cog_fc_rec, cog_def_rec, cog_cdd_id_table = CogClassifier.load_resources(
+        cddid_tbl_gzfile
+    )
+
+    renderer = None
+    if plot:
+        # Reuse single chart renderer for all genomes
+        from cogclassifier.plot import ChartRenderer
+
+        renderer = ChartRenderer()
+
+    genome2stats: dict[str, CogClassifyStats] = {}
+    try:
+        for genome in manifest.genomes:
+            genome2stats[genome.name] = _merge_genome_shards(
+                manifest,
+                genome,
+                Path(outdir) / genome.name,
+                cog_fc_rec,
+                cog_def_rec,
+                cog_cdd_id_table,
+                renderer=renderer,
+                compress=compress,
+                thread_num=thread_num,
+            )
+    finally:
+        if renderer is not None:
+            renderer.close()
+    return genome2stats
+
+
+def _merge_genome_shards(
+    manifest: ShardManifest,
+    genome: ShardGenome,
+    genome_outdir: Path,
+    cog_fc_rec: CogFuncCategoryRecord,
+    cog_def_rec: CogDefinitionRecord,
+    cog_cdd_id_table: CogCddIdTable,
+    *,
+    renderer: ChartRenderer | None = None,
+    compress: str | None = None,
+    thread_num: int = 1,
+) -> CogClassifyStats:
+    """Merge shard results of single genome & write outputs"""
+    logger = logging.getLogger(__name__)
+    os.makedirs(genome_outdir, exist_ok=True)
+    rpsblast_file = genome_outdir / compressed_name("rpsblast.tsv", compress)
+    # Keep compression suffix in temporary file name
+    tmp_rpsblast_file = genome_outdir / f".{os.getpid()}.{rpsblast_file.name}"
+    with xopen(tmp_rpsblast_file, "wb", threads=thread_num) as fw:
+        for shard_id in genome.shard_ids:
+            shard = manifest.get_shard(shard_id)
+            with open(shard_result_file(shard), "rb") as fr:
+                shutil.copyfileobj(fr, fw)
+    os.replace(tmp_rpsblast_file, rpsblast_file)
+    logger.info(f"Merge {len(genome.shard_ids)} shards of '{genome.name}'")
+    logger.info(f"=> {rpsblast_file}")
+
+    stats = CogClassifyStats(
+        genome.query_file,
+        BlastAlignmentRecord.bulk_load(rpsblast_file, workers=thread_num),
+        cog_fc_rec,
+        cog_def_rec,
+        cog_cdd_id_table,
+        multi_domain=manifest.multi_domain,
+    )
+    with stats:
+        write_classify_results(
+            stats, genome_outdir, compress=compress, thread_num=thread_num
+        )
+        record_classify_stats(stats)
+        if renderer is not None:
+            plot_count_charts(stats.count_summary_df, genome_outdir, renderer=renderer)
+    return stats
+
+
+def _atomic_write(outfile: str | Path, data: str | bytes) -> None:
+    """Write text or bytes to temporary file & rename to output file"""
+    outfile = Path(outfile)
+    tmp_file = outfile.with_name(f".{outfile.name}.{os.getpid()}.tmp")
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    with open(tmp_file, "wb") as f:
+        f.write(data)
+    os.replace(tmp_file, outfile)
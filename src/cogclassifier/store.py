@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import csv
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Iterable
+
+from cogclassifier.cog import CLASSIFY_COLUMNS, CogClassification, CogClassifyStats
+from cogclassifier.compress import xopen
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS genome (
+    genome_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    query_count INTEGER,
+    multi_domain INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS category (
+    letter TEXT PRIMARY KEY,
+    description TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS classification (
+    genome_id INTEGER NOT NULL REFERENCES genome(genome_id) ON DELETE CASCADE,
+    query_id TEXT NOT NULL,
+    cog_id TEXT NOT NULL,
+    cdd_id TEXT NOT NULL,
+    evalue REAL NOT NULL,
+    identity REAL NOT NULL,
+    gene_name TEXT NOT NULL,
+    cog_name TEXT NOT NULL,
+    cog_letter TEXT NOT NULL,
+    qstart INTEGER,
+    qend INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_classification_genome
+    ON classification(genome_id);
+CREATE INDEX IF NOT EXISTS idx_classification_query
+    ON classification(query_id);
+CREATE INDEX IF NOT EXISTS idx_classification_cog
+    ON classification(cog_id, genome_id);
+CREATE INDEX IF NOT EXISTS idx_classification_letter
+    ON classification(cog_letter, genome_id);
+"""
+
+
+class CogResultStore:
+    """COG Classification Result Store Class (SQLite)
+
+    Classification results of many genomes are kept in a single SQLite file,
+    indexed by genome, query ID, COG ID and COG letter, so that cross-genome
+    lookups (e.g. genomes which have COG0001) never scan `cog_classify.tsv` files.
+    Each genome is inserted in a single transaction.
+    """
+
+    def __init__(self, db_file: str | Path):
+        """
+        Parameters
+        ----------
+        db_file : str | Path
+            Result store SQLite file (Created if not exists)
+        """
+        self._db_file = Path(db_file)
+        self._db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self._db_file)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    @property
+    def db_file(self) -> Path:
+        """Result store SQLite file"""
+        return self._db_file
+
+    @property
+    def genomes(self) -> list[str]:
+        """Stored genome names"""
+        rows = self._conn.execute("SELECT name FROM genome ORDER BY genome_id")
+        return [name for (name,) in rows]
+
+    def add(
+        self,
+        genome: str,
+        stats: CogClassifyStats,
+        *,
+        overwrite: bool = False,
+    ) -> bool:
+        """Add genome COG classification results to store
+
+        Parameters
+        ----------
+        genome : str
+            Genome name
+        stats : CogClassifyStats
+            COG classification result statistics
+        overwrite : bool, optional
+            If True, overwrite already stored genome results
+
+        Returns
+        -------
+        added : bool
+            If False, genome is already stored and skipped
+        """
+        return self._add_classifications(
+            genome,
+            stats.classifications,
+            query_count=stats.query_count,
+            multi_domain=stats.multi_domain,
+            overwrite=overwrite,
+        )
+
+    def add_files(
+        self,
+        classify_files: list[str | Path],
+        *,
+        overwrite: bool = False,
+    ) -> list[str]:
+        """Add multiple COG classification result files (`cog_classify.tsv`)
+
+        Genome name is taken from the output directory name of `cog_classify.tsv`
+        (e.g. `ecoli/cog_classify.tsv[.gz]` -> `ecoli`), otherwise from the file stem.
+
+        Parameters
+        ----------
+        classify_files : list[str | Path]
+            COG classification result files
+        overwrite : bool, optional
+            If True, overwrite already stored genome results
+
+        Returns
+        -------
+        added_genomes : list[str]
+            Newly added genome names
+        """
+        added_genomes = []
+        for classify_file in classify_files:
+            genome = self.genome_name(classify_file)
+            classifications, multi_domain = _read_classify_file(classify_file)
+            if self._add_classifications(
+                genome,
+                classifications,
+                query_count=None,
+                multi_domain=multi_domain,
+                overwrite=overwrite,
+            ):
+                added_genomes.append(genome)
+        return added_genomes
+
+    def remove(self, genome: str) -> bool:
+        """Remove genome results from store (False if genome is not stored)"""
+        with self._conn:
+            cur = self._conn.execute("DELETE FROM genome WHERE name = ?", (genome,))
+        return cur.rowcount > 0
+
+    def find_genomes(
+        self,
+        *,
+        genome: str | None = None,
+        query_id: str | None = None,
+        cog_id: str | None = None,
+        letter: str | None = None,
+    ) -> dict[str, int]:
+        """Find genomes which have target COG ID or COG letter
+
+        Parameters
+        ----------
+        genome : str | None, optional
+            Target genome name
+        query_id : str | None, optional
+            Target query ID
+        cog_id : str | None, optional
+            Target COG ID (e.g. `COG0001`)
+        letter : str | None, optional
+            Target COG functional category letter (e.g. `J`)
+
+        Returns
+        -------
+        genome2count : dict[str, int]
+            Genome name & number of classified queries dict
+        """
+        where, params = _where_clause(
+            genome=genome, query_id=query_id, cog_id=cog_id, letter=letter
+        )
+        rows = self._conn.execute(
+            "SELECT g.name, COUNT(DISTINCT c.query_id) FROM classification AS c "
+            f"JOIN genome AS g USING (genome_id) {where} "
+            "GROUP BY c.genome_id ORDER BY c.genome_id",
+            params,
+        )
+        return dict(rows.fetchall())
+
+    def find(
+        self,
+        *,
+        genome: str | None = None,
+        query_id: str | None = None,
+        cog_id: str | None = None,
+        letter: str | None = None,
+    ) -> list[tuple[str, CogClassification]]:
+        """Find COG classification results by genome, query ID, COG ID or letter
+
+        Parameters
+        ----------
+        genome : str | None, optional
+            Target genome name
+        query_id : str | None, optional
+            Target query ID
+        cog_id : str | None, optional
+            Target COG ID
+        letter : str | None, optional
+            Target COG functional category letter
+
+        Returns
+        -------
+        results : list[tuple[str, CogClassification]]
+            Genome name & COG classification result list
+        """
+        where, params = _where_clause(
+            genome=genome, query_id=query_id, cog_id=cog_id, letter=letter
+        )
+        rows = self._conn.execute(
+            "SELECT g.name, c.query_id, c.cog_id, c.cdd_id, c.evalue, c.identity, "
+            "c.gene_name, c.cog_name, c.cog_letter, t.description, c.qstart, c.qend "
+            "FROM classification AS c JOIN genome AS g USING (genome_id) "
+            f"JOIN category AS t ON t.letter = c.cog_letter {where} "
+            "ORDER BY c.genome_id, c.rowid",
+            params,
+        )
+        return [(row[0], CogClassification(*row[1:])) for row in rows]
+
+    def close(self) -> None:
+        """Close result store"""
+        self._conn.close()
+
+    @staticmethod
+    def genome_name(classify_file: str | Path) -> str:
+        """Genome name of COG classification result file"""
+        classify_file = Path(classify_file)
+        is_classify_file = classify_file.name.split(".")[:2] == ["cog_classify", "tsv"]
+        if is_classify_file and classify_file.parent.name != "":
+            return classify_file.resolve().parent.name
+        return classify_file.name.split(".")[0]
+
+    def _add_classifications(
+        self,
+        genome: str,
+        classifications: Iterable[CogClassification],
+        *,
+        query_count: int | None,
+        multi_domain: bool,
+        overwrite: bool,
+    ) -> bool:
+        """Insert genome classifications in a single transaction"""
+        with self._conn:
+            if genome in self:
+                if not overwrite:
+                    return False
+                self._conn.execute("DELETE FROM genome WHERE name = ?", (genome,))
+            cur = self._conn.execute(
+                "INSERT INTO genome (name, query_count, multi_domain) VALUES (?, ?, ?)",
+                (genome, query_count, int(multi_domain)),
+            )
+            genome_id = cur.lastrowid
+            letter2desc: dict[str, str] = {}
+            rows = []
+            for c in classifications:
+                letter2desc[c.cog_letter] = c.cog_description
+                rows.append(
+                    (
+                        genome_id,
+                        c.query_id,
+                        c.cog_id,
+                        c.cdd_id,
+                        c.evalue,
+                        c.identity,
+                        c.gene_name,
+                        c.cog_name,
+                        c.cog_letter,
+                        c.qstart if multi_domain else None,
+                        c.qend if multi_domain else None,
+                    )
+                )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO category (letter, description) VALUES (?, ?)",
+                letter2desc.items(),
+            )
+            self._conn.executemany(
+                "INSERT INTO classification VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        logger = logging.getLogger(__name__)
+        logger.debug(f"Add {len(rows)} classifications of '{genome}' to store")
+        return True
+
+    def __enter__(self) -> CogResultStore:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM genome").fetchone()[0]
+
+    def __contains__(self, genome: str) -> bool:
+        row = self._conn.execute("SELECT 1 FROM genome WHERE name = ?", (genome,))
+        return row.fetchone() is not None
+
+
+def _where_clause(**name2value: str | None) -> tuple[str, list[str]]:
+    """Build SQL WHERE clause of classification query (None value is ignored)"""
+    name2column = dict(
+        genome="g.name",
+        query_id="c.query_id",
+        cog_id="c.cog_id",
+        letter="c.cog_letter",
+    )
+    conditions, params = [], []
+    for name, value in name2value.items():
+        if value is not None:
+            conditions.append(f"{name2column[name]} = ?")
+            params.append(value)
+    if len(conditions) == 0:
+        return "", []
+    return f"WHERE {' AND '.join(conditions)}", params
+
+
+def _read_classify_file(
+    classify_file: str | Path,
+) -> tuple[list[CogClassification], bool]:
+    """Read COG classification result file (`cog_classify.tsv`)"""
+    with xopen(classify_file, "rt") as f:
+        reader = csv.reader(f, delimiter="\t")
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"Empty classify result file {classify_file}")
+        multi_domain = header == list(CLASSIFY_COLUMNS)
+        if header != list(CLASSIFY_COLUMNS[: len(header)]):
+            raise ValueError(f"Unexpected header of {classify_file} ({header=})")
+        classifications = []
+        for row in reader:
+            if len(row) == 0:
+                continue
+            qstart, qend = (int(row[9]), int(row[10])) if multi_domain else (0, 0)
+            classifications.append(
+                CogClassification(
+                    *row[:3],
+                    float(row[3]),
+                    float(row[4]),
+                    *row[5:9],
+                    qstart,
+                    qend,
+                )
+            )
+    return classifications, multi_domain
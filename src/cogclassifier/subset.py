@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import shlex
+import shutil
+import subprocess as sp
+import tarfile
+import tempfile
+from pathlib import Path
+
+from cogclassifier import const, utils
+
+COG_SMP_PATTERN = re.compile(r"^COG\d+\.smp$")
+SMP_COLUMNS_PATTERN = re.compile(rb"numColumns\s+(\d+)")
+# Full COG database size (Total profile length) file in subset database directory
+DBSIZE_FILENAME = "dbsize.txt"
+# Derived data of `cdd.tar.gz` in download directory (Removed if archive is changed)
+CDD_DERIVED = ("Cog_smp", "Cog_subset")
+
+
+class MakeProfileDb:
+    """makeprofiledb Run Class (Build RPS-BLAST database from PSSM files)"""
+
+    def __init__(self, smp_files: list[str | Path], db: str | Path):
+        """
+        Parameters
+        ----------
+        smp_files : list[str | Path]
+            PSSM profile files (`*.smp`)
+        db : str | Path
+            Output RPS-BLAST database prefix
+        """
+        self._smp_files = [Path(f).resolve() for f in smp_files]
+        self._db = Path(db)
+
+    def run(self) -> Path:
+        """Run makeprofiledb
+
+        Parameters are the same as those of NCBI CDD RPS-BLAST databases.
+
+        Returns
+        -------
+        db : Path
+            RPS-BLAST database prefix
+        """
+        self.check_installation()
+        logger = logging.getLogger(__name__)
+        pn_file = self._db.with_suffix(".pn")
+        with open(pn_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(map(str, self._smp_files)) + "\n")
+        cmd = f"makeprofiledb -in {pn_file} -out {self._db} -title {self._db.name} -threshold 9.82 -scale 100.0 -dbtype rps -index true"  # noqa: E501
+        logger.info(f"$ {cmd}")
+        cmd_res = sp.run(shlex.split(cmd), capture_output=True, text=True)
+        if cmd_res.returncode != 0:
+            logger.error(f"Failed to run command below ({cmd_res.returncode=})")
+            logger.error(f"$ {cmd}")
+            for line in (cmd_res.stdout + cmd_res.stderr).splitlines():
+                logger.error(f"> {line}")
+            cmd_res.check_returncode()
+        return self._db
+
+    @classmethod
+    def check_installation(cls, raise_error: bool = True) -> bool:
+        """Check tool installation"""
+        if utils.which("makeprofiledb") is None:
+            if raise_error:
+                raise RuntimeError("makeprofiledb is not installed!!")
+            return False
+        return True
+
+
+def extract_cog_profiles(download_dir: str | Path, *, update: bool = False) -> Path:
+    """Download CDD profiles (`cdd.tar.gz`) & extract COG profiles (`COG*.smp`)
+
+    Only COG profiles are extracted from the archive stream into a temporary
+    directory, which is renamed to `{download_dir}/Cog_smp` when completed.
+
+    Parameters
+    ----------
+    download_dir : str | Path
+        Download COG & CDD resources directory
+    update : bool, optional
+        If True, re-download changed `cdd.tar.gz` (by HTTP HEAD request)
+
+    Returns
+    -------
+    cog_smp_dir : Path
+        COG profiles directory
+    """
+    download_dir = Path(download_dir)
+    cog_smp_dir = download_dir / "Cog_smp"
+    if cog_smp_dir.exists():
+        return cog_smp_dir
+
+    logger = logging.getLogger(__name__)
+    cdd_targz_file = utils.ftp_download(
+        const.CDD_FTP, download_dir, update=update, derived=CDD_DERIVED
+    )
+    logger.info(f"Extract COG profiles {cdd_targz_file} => {cog_smp_dir}")
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".Cog_smp.", dir=download_dir))
+    try:
+        smp_count = 0
+        with tarfile.open(cdd_targz_file, mode="r|gz") as tar:
+            for member in tar:
+                name = Path(member.name).name
+                if not member.isfile() or not COG_SMP_PATTERN.match(name):
+                    continue
+                fr = tar.extractfile(member)
+                with open(tmp_dir / name, "wb") as fw:
+                    shutil.copyfileobj(fr, fw)  # type: ignore
+                smp_count += 1
+        if smp_count == 0:
+            raise ValueError(f"COG profiles are not found in {cdd_targz_file}")
+        os.replace(tmp_dir, cog_smp_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    logger.info(f"=> {smp_count} COG profiles are extracted")
+    return cog_smp_dir
+
+
+def build_subset_db(
+    cog_ids: list[str],
+    download_dir: str | Path,
+    *,
+    update: bool = False,
+) -> Path:
+    """Build RPS-BLAST database of COG profiles subset (Cached by COG ID set)
+
+    Subset database is built in `{download_dir}/Cog_subset/{COG ID set hash}/`,
+    and reused if the same COG ID set is requested again.
+    Total profile length of all COG profiles is recorded as full database size
+    (`dbsize.txt`), which `RpsBlast` passes to rpsblast `-dbsize` so that
+    e-values of subset database search are those of full database search.
+
+    Parameters
+    ----------
+    cog_ids : list[str]
+        Target COG IDs (e.g. `CogDefinitionRecord.select_ids(letters=["V"])`)
+    download_dir : str | Path
+        Download COG & CDD resources directory
+    update : bool, optional
+        If True and `cdd.tar.gz` is changed (by HTTP HEAD request), extracted
+        COG profiles & all cached subset databases are removed & re-built
+
+    Returns
+    -------
+    subset_db : Path
+        RPS-BLAST database of COG profiles subset (`Cog_subset/{hash}/Cog`)
+    """
+    cog_ids = sorted(set(cog_ids))
+    if len(cog_ids) == 0:
+        raise ValueError("No target COG IDs for subset database")
+    logger = logging.getLogger(__name__)
+    download_dir = Path(download_dir)
+    cdd_targz_file = download_dir / Path(const.CDD_FTP).name
+    if update and utils.is_remote_updated(const.CDD_FTP, cdd_targz_file):
+        utils.remove_derived(download_dir, CDD_DERIVED)
+    subset_key = hashlib.sha256(",".join(cog_ids).encode()).hexdigest()[:16]
+    subset_dir = download_dir / "Cog_subset" / subset_key
+    if subset_dir.exists():
+        logger.info(f"Use cached COG subset database ({subset_dir})")
+        return subset_dir / "Cog"
+
+    cog_smp_dir = extract_cog_profiles(download_dir, update=update)
+    smp_files = [cog_smp_dir / f"{cog_id}.smp" for cog_id in cog_ids]
+    missing_ids = [f.stem for f in smp_files if not f.exists()]
+    if len(missing_ids) > 0:
+        logger.warning(
+            f"{len(missing_ids)} COG profiles are not found (e.g. {missing_ids[:5]})"
+        )
+    smp_files = [f for f in smp_files if f.exists()]
+    if len(smp_files) == 0:
+        raise ValueError("No COG profiles are found for subset database")
+
+    logger.info(f"Build COG subset database of {len(smp_files)} profiles")
+    subset_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{subset_key}.", dir=subset_dir.parent))
+    try:
+        MakeProfileDb(smp_files, tmp_dir / "Cog").run()
+        with open(tmp_dir / "cog_ids.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(f.stem for f in smp_files) + "\n")
+        full_db_size = cog_profiles_size(cog_smp_dir)
+        if full_db_size > 0:
+            (tmp_dir / DBSIZE_FILENAME).write_text(f"{full_db_size}\n")
+        else:
+            logger.warning(f"Failed to get full COG database size ({cog_smp_dir})")
+        os.replace(tmp_dir, subset_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    logger.info(f"=> {subset_dir / 'Cog'}")
+    return subset_dir / "Cog"
+
+
+def cog_profiles_size(cog_smp_dir: str | Path) -> int:
+    """Total profile length (`numColumns`) of all COG profiles in directory"""
+    total_size = 0
+    for smp_file in Path(cog_smp_dir).iterdir():
+        if not COG_SMP_PATTERN.match(smp_file.name):
+            continue
+        # Profile length is written in the header of PSSM file
+        with open(smp_file, "rb") as f:
+            match = SMP_COLUMNS_PATTERN.search(f.read(4096))
+        if match is not None:
+            total_size += int(match.group(1))
+    return total_size
+
+
+def full_db_size(db: str | Path) -> int | None:
+    """Full COG database size of subset database (None if not recorded)"""
+    dbsize_file = Path(db).parent / DBSIZE_FILENAME
+    if not dbsize_file.exists():
+        return None
+    return int(dbsize_file.read_text().strip())
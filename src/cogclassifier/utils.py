@@ -1,24 +1,41 @@
 from __future__ import annotations
 
+import cProfile
+import io
+import json
 import logging
 import os
+import shutil
 import signal
 import sys
+import tarfile
+import tempfile
 import time
-from functools import partial, wraps
+import tracemalloc
+from contextlib import ExitStack, contextmanager, nullcontext
+from email.utils import parsedate_to_datetime
+from functools import lru_cache, partial, wraps
 from pathlib import Path
-from typing import Callable
+from typing import IO, Callable, ContextManager, Iterator, Mapping
 
 import requests
 
+from cogclassifier.metrics import CACHE_HITS, DOWNLOAD_BYTES
+
 
 def ftp_download(
     url: str,
     outdir: str | Path,
     overwrite: bool = False,
+    *,
+    update: bool = False,
+    derived: tuple[str, ...] = (),
 ) -> Path:
     """Download file from FTP site
 
+    Download metadata (`ETag`, `Last-Modified`) is stored in `{filename}.download.json`
+    of output directory, which is used for freshness check in update mode.
+
     Parameters
     ----------
     url : str
@@ -27,6 +44,12 @@ def ftp_download(
         Output directory
     overwrite : bool, optional
         Overwrite or not
+    update : bool, optional
+        If True and file already exists, check freshness of remote file by
+        HTTP HEAD request & re-download only if remote file is changed
+    derived : tuple[str, ...], optional
+        Derived file or directory names in output directory (e.g. unpacked
+        database), which are removed when file is (re-)downloaded
 
     Returns
     -------
@@ -39,12 +62,29 @@ def ftp_download(
     logger.info(f"Download {url}")
 
     if download_file.exists() and not overwrite:
-        logger.info(f"=> Already file exists {download_file}")
-        return download_file
+        if not update:
+            logger.info(f"=> Already file exists {download_file}")
+            CACHE_HITS.inc(cache="download")
+            return download_file
+        if not is_remote_updated(url, download_file):
+            logger.info(f"=> Already file is up to date {download_file}")
+            CACHE_HITS.inc(cache="download")
+            return download_file
+        logger.info(f"=> Remote file is updated, re-download {download_file}")
     try:
         res = requests.get(url, stream=True)
-        with open(download_file, "wb") as f:
-            f.write(res.content)
+        res.raise_for_status()
+        tmp_file = download_file.with_name(f".{download_file.name}.{os.getpid()}")
+        try:
+            with open(tmp_file, "wb") as f:
+                for chunk in res.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+                    DOWNLOAD_BYTES.inc(len(chunk))
+            os.replace(tmp_file, download_file)
+        finally:
+            tmp_file.unlink(missing_ok=True)
+        save_download_meta(download_file, url, res.headers)
+        remove_derived(outdir, derived)
         logger.info(f"=> Successfully downloaded {download_file}")
         return download_file
     except requests.exceptions.ConnectionError:
@@ -52,6 +92,209 @@ def ftp_download(
         raise
 
 
+def download_extract(
+    url: str,
+    extract_dir: str | Path,
+    *,
+    keep_archive: bool = False,
+) -> Path:
+    """Download tar.gz archive from FTP site & extract it while downloading
+
+    HTTP response body is streamed through gzip & tarfile into a temporary
+    directory, which is renamed to `extract_dir` when completed. If `extract_dir`
+    already exists (e.g. renamed by concurrent process), it is used as is. Archive is
+    neither written to disk nor re-read unless `keep_archive=True`.
+    Download metadata is stored for freshness check even if archive is not kept.
+
+    Parameters
+    ----------
+    url : str
+        FTP site url of tar.gz archive
+    extract_dir : str | Path
+        Extract directory (e.g. `{download_dir}/Cog_LE`)
+    keep_archive : bool, optional
+        If True, also write archive in parent directory of `extract_dir`
+
+    Returns
+    -------
+    extract_dir : Path
+        Extract directory
+    """
+    extract_dir = Path(extract_dir)
+    outdir = extract_dir.parent
+    os.makedirs(outdir, exist_ok=True)
+    archive_file = outdir / Path(url).name
+    logger = logging.getLogger(__name__)
+    logger.info(f"Download & extract {url} => {extract_dir}")
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{extract_dir.name}.", dir=outdir))
+    tmp_archive_file = outdir / f".{archive_file.name}.{os.getpid()}"
+    try:
+        res = requests.get(url, stream=True)
+        res.raise_for_status()
+        # Raw bytes as sent are read (Transport `Content-Encoding: gzip` is not
+        # decoded), so kept archive is the same as remote file & gzip is decoded
+        # by tarfile
+        res.raw.decode_content = False
+        with ExitStack() as stack:
+            archive = None
+            if keep_archive:
+                archive = stack.enter_context(open(tmp_archive_file, "wb"))
+            stream = _TeeReader(res.raw, archive)
+            with tarfile.open(fileobj=stream, mode="r|gz") as tar:
+                if hasattr(tarfile, "data_filter"):
+                    tar.extractall(tmp_dir, filter="data")
+                else:
+                    tar.extractall(tmp_dir)
+            # Read remaining bytes after end of tar archive (e.g. zero padding)
+            while stream.read(1024 * 1024):
+                pass
+        try:
+            os.replace(tmp_dir, extract_dir)
+        except OSError:
+            if not extract_dir.exists():
+                raise
+            # Already extracted by concurrent process (e.g. cold cache shard workers)
+            logger.info(f"=> {extract_dir} is extracted by another process")
+        if keep_archive:
+            os.replace(tmp_archive_file, archive_file)
+        save_download_meta(archive_file, url, res.headers)
+    except requests.exceptions.ConnectionError:
+        logger.exception("Failed to download file. Please check network connection.")
+        raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_archive_file.unlink(missing_ok=True)
+    logger.info(f"=> Successfully extracted {extract_dir}")
+    return extract_dir
+
+
+class _TeeReader(io.RawIOBase):
+    """Readable stream counting download bytes & copying them to file"""
+
+    def __init__(self, fr: IO[bytes], fw: IO[bytes] | None = None):
+        self._fr = fr
+        self._fw = fw
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fr.read(size)
+        if data:
+            DOWNLOAD_BYTES.inc(len(data))
+            if self._fw is not None:
+                self._fw.write(data)
+        return data
+
+
+def is_remote_updated(url: str, download_file: str | Path) -> bool:
+    """Check if remote file is updated from downloaded file by HTTP HEAD request
+
+    If download metadata is stored, conditional request (`If-None-Match`,
+    `If-Modified-Since`) is sent & `ETag`/`Last-Modified` are compared.
+    Otherwise, `Content-Length` & `Last-Modified` are compared with size & mtime
+    of downloaded file, and metadata is stored if not updated.
+
+    Parameters
+    ----------
+    url : str
+        FTP site url of remote file
+    download_file : str | Path
+        Downloaded file (Only metadata is required if file is removed)
+
+    Returns
+    -------
+    is_updated : bool
+        If True, remote file is updated
+    """
+    download_file = Path(download_file)
+    meta = load_download_meta(download_file)
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    res = requests.head(url, headers=headers, allow_redirects=True)
+    if res.status_code == 304:
+        return False
+    res.raise_for_status()
+
+    etag = res.headers.get("ETag")
+    last_modified = res.headers.get("Last-Modified")
+    if meta.get("etag") and etag:
+        return etag != meta["etag"]
+    if meta.get("last_modified") and last_modified:
+        return last_modified != meta["last_modified"]
+    if len(meta) > 0 or not download_file.exists():
+        return True
+
+    # No download metadata (e.g. downloaded by older version)
+    st = download_file.stat()
+    content_length = res.headers.get("Content-Length")
+    if content_length is None or int(content_length) != st.st_size:
+        return True
+    if last_modified is None:
+        return True
+    if parsedate_to_datetime(last_modified).timestamp() > st.st_mtime:
+        return True
+    save_download_meta(download_file, url, res.headers)
+    return False
+
+
+def load_download_meta(download_file: str | Path) -> dict[str, str]:
+    """Load download metadata of downloaded file (Empty dict if not stored)"""
+    meta_file = _download_meta_file(download_file)
+    if not meta_file.exists():
+        return {}
+    with open(meta_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_download_meta(
+    download_file: str | Path,
+    url: str,
+    headers: Mapping[str, str],
+) -> None:
+    """Save download metadata (`ETag`, `Last-Modified`) of downloaded file"""
+    meta = dict(
+        url=url,
+        etag=headers.get("ETag"),
+        last_modified=headers.get("Last-Modified"),
+        content_length=headers.get("Content-Length"),
+    )
+    meta = {k: v for k, v in meta.items() if v is not None}
+    meta_file = _download_meta_file(download_file)
+    tmp_file = meta_file.with_name(f".{meta_file.name}.{os.getpid()}")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_file, meta_file)
+
+
+def remove_derived(outdir: str | Path, derived: tuple[str, ...]) -> None:
+    """Remove derived files or directories of downloaded file"""
+    logger = logging.getLogger(__name__)
+    for name in derived:
+        path = Path(outdir) / name
+        if path.is_dir():
+            logger.info(f"Remove outdated derived data {path}")
+            shutil.rmtree(path)
+        elif path.exists():
+            logger.info(f"Remove outdated derived data {path}")
+            path.unlink()
+
+
+def _download_meta_file(download_file: str | Path) -> Path:
+    download_file = Path(download_file)
+    return download_file.with_name(f"{download_file.name}.download.json")
+
+
+@lru_cache(maxsize=None)
+def which(tool: str) -> str | None:
+    """Find tool path (Probed once per process & cached, `which.cache_clear()`)"""
+    return shutil.which(tool)
+
+
 def logging_timeit(
     func: Callable | None = None,
     /,
@@ -91,6 +334,95 @@ def logging_timeit(
     return wrapper
 
 
+class StageProfiler:
+    """Stage Profiler Class (cProfile & tracemalloc per pipeline stage)
+
+    Each profiled stage writes `{stage}.pstats` (cProfile stats, e.g. view by
+    `python -m pstats` or snakeviz) and `{stage}.alloc.txt` (top memory
+    allocation lines by tracemalloc) in profile output directory.
+    Stages must not be nested.
+    """
+
+    def __init__(self, outdir: str | Path, *, top_n: int = 30):
+        """
+        Parameters
+        ----------
+        outdir : str | Path
+            Profile output directory
+        top_n : int, optional
+            Number of top allocation lines in allocation report
+        """
+        self._outdir = Path(outdir)
+        self._top_n = top_n
+
+    @property
+    def outdir(self) -> Path:
+        """Profile output directory"""
+        return self._outdir
+
+    @contextmanager
+    def profile(self, stage: str) -> Iterator[None]:
+        """Profile `with` block as target stage"""
+        os.makedirs(self._outdir, exist_ok=True)
+        profiler = cProfile.Profile()
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed_time = time.perf_counter() - start_time
+            snapshot = tracemalloc.take_snapshot()
+            _, peak_size = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            pstats_file = self._outdir / f"{stage}.pstats"
+            profiler.dump_stats(pstats_file)
+            alloc_file = self._outdir / f"{stage}.alloc.txt"
+            self._write_alloc_report(alloc_file, snapshot, stage, peak_size)
+            logger = logging.getLogger(__name__)
+            logger.info(
+                f"Profile {stage} stage (elapsed time: {elapsed_time:.2f}[s], "
+                f"peak memory: {peak_size / 1024**2:.1f}[MiB])"
+            )
+            logger.info(f"=> {pstats_file}, {alloc_file}")
+
+    def _write_alloc_report(
+        self,
+        alloc_file: Path,
+        snapshot: tracemalloc.Snapshot,
+        stage: str,
+        peak_size: int,
+    ) -> None:
+        """Write top memory allocation lines report"""
+        snapshot = snapshot.filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+        stats = snapshot.statistics("lineno")
+        with open(alloc_file, "w", encoding="utf-8") as f:
+            f.write(f"# Stage: {stage}\n")
+            f.write(f"# Peak traced memory: {peak_size / 1024**2:.1f} MiB\n")
+            total_size = sum(stat.size for stat in stats)
+            f.write(f"# Remaining traced memory: {total_size / 1024**2:.1f} MiB\n")
+            f.write(f"# Top {self._top_n} allocation lines\n")
+            for rank, stat in enumerate(stats[: self._top_n], 1):
+                frame = stat.traceback[0]
+                f.write(
+                    f"{rank}\t{stat.size / 1024:.1f} KiB\t{stat.count} blocks\t"
+                    f"{frame.filename}:{frame.lineno}\n"
+                )
+
+
+def profile_stage(profiler: StageProfiler | None, stage: str) -> ContextManager:
+    """Profile stage if profiler is set (No-op context without overhead if None)"""
+    return nullcontext() if profiler is None else profiler.profile(stage)
+
+
 def exit_handler(func):
     """Exit handling decorator on exception
 
@@ -1,3 +1,4 @@
+import gzip
 from pathlib import Path
 
 import pytest
@@ -27,3 +28,25 @@ def cog_download_dir(data_dir: Path) -> Path:
     cog_download_dir = data_dir / "cog_download"
     cog_download_dir.mkdir(exist_ok=True)
     return cog_download_dir
+
+
+@pytest.fixture(scope="session")
+def rpsblast_file(data_dir: Path) -> Path:
+    """rpsblast.tsv file fixture"""
+    return data_dir / "rpsblast.tsv"
+
+
+@pytest.fixture(scope="session")
+def cddid_table_file(data_dir: Path) -> Path:
+    """cddid.tbl file fixture (Subset of COG entries in rpsblast.tsv)"""
+    return data_dir / "cddid.tbl"
+
+
+@pytest.fixture()
+def cddid_download_dir(cddid_table_file: Path, tmp_path: Path) -> Path:
+    """Download directory fixture with cddid.tbl.gz (No RPS-BLAST database)"""
+    download_dir = tmp_path / "download"
+    download_dir.mkdir()
+    with gzip.open(download_dir / "cddid.tbl.gz", "wb") as f:
+        f.write(cddid_table_file.read_bytes())
+    return download_dir
@@ -0,0 +1,24 @@
+import shlex
+import subprocess as sp
+from pathlib import Path
+
+
+def test_cli(cog_count_file: Path, tmp_path: Path):
+    """Test cog_count_matrix CLI"""
+    outfile = tmp_path / "cog_count_matrix.tsv"
+    norm_outfile = tmp_path / "cog_count_matrix_ratio.tsv"
+    cmd = f"cog_count_matrix {cog_count_file} -o {outfile} --norm_outfile {norm_outfile} --norm_method ratio"  # noqa: E501
+    cmd_args = shlex.split(cmd)
+    result = sp.run(cmd_args)
+    assert result.returncode == 0
+    assert outfile.exists()
+    assert norm_outfile.exists()
+
+
+def test_cli_invalid_norm_method(cog_count_file: Path, tmp_path: Path):
+    """Test cog_count_matrix CLI fails on invalid normalize method before build"""
+    outfile = tmp_path / "cog_count_matrix.tsv"
+    cmd = f"cog_count_matrix {cog_count_file} -o {outfile} --norm_outfile {tmp_path / 'norm.tsv'} --norm_method invalid"  # noqa: E501
+    result = sp.run(shlex.split(cmd))
+    assert result.returncode != 0
+    assert not outfile.exists()
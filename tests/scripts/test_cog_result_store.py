@@ -0,0 +1,26 @@
+import shlex
+import subprocess as sp
+from pathlib import Path
+
+
+def test_cli(tmp_path: Path):
+    """Test cog_result_store CLI"""
+    classify_file = tmp_path / "ecoli" / "cog_classify.tsv"
+    classify_file.parent.mkdir()
+    classify_file.write_text(
+        "QUERY_ID\tCOG_ID\tCDD_ID\tEVALUE\tIDENTITY\tGENE_NAME\tCOG_NAME\tCOG_LETTER\tCOG_DESCRIPTION\n"  # noqa: E501
+        "NP_414544.1\tCOG0083\t223161\t2.5e-150\t45.806\tThrB\tHomoserine kinase\tE\tAmino acid transport and metabolism\n"  # noqa: E501
+    )
+    store_file = tmp_path / "store.db"
+    cmd = f"cog_result_store add {classify_file} -s {store_file}"
+    assert sp.run(shlex.split(cmd)).returncode == 0
+
+    cmd = f"cog_result_store query -s {store_file} --cog_id COG0083 --genome_only"
+    result = sp.run(shlex.split(cmd), capture_output=True, text=True)
+    assert result.returncode == 0
+    assert result.stdout == "GENOME\tQUERY_COUNT\necoli\t1\n"
+
+    cmd = f"cog_result_store query -s {store_file} --genome other --genome_only"
+    result = sp.run(shlex.split(cmd), capture_output=True, text=True)
+    assert result.returncode == 0
+    assert result.stdout == "GENOME\tQUERY_COUNT\n"
@@ -20,3 +20,51 @@ def test_cli(example_fasta_file: Path, tmp_path: Path):
     for outfile_name in outfile_names:
         outfile = tmp_path / outfile_name
         assert outfile.exists()
+
+
+def test_cli_reclassify(
+    example_fasta_file: Path,
+    rpsblast_file: Path,
+    cddid_download_dir: Path,
+    tmp_path: Path,
+):
+    """Test COGclassifier CLI reclassify from existing RPS-BLAST result"""
+    outdir = tmp_path / "outdir"
+    metrics_file = tmp_path / "cogclassifier.prom"
+    cmd = f"COGclassifier -i {example_fasta_file} -o {outdir} -d {cddid_download_dir} --rpsblast_file {rpsblast_file} --no_plot --metrics_file {metrics_file}"  # noqa: E501
+    result = sp.run(shlex.split(cmd))
+    assert result.returncode == 0
+    assert not (cddid_download_dir / "Cog_LE").exists()
+    metrics = metrics_file.read_text()
+    assert "cogclassifier_query_sequences_total 100\n" in metrics
+    assert 'cogclassifier_cache_hits_total{cache="download"} 1\n' in metrics
+    assert (outdir / "rpsblast.tsv").read_bytes() == rpsblast_file.read_bytes()
+    for outfile_name in ("cog_count.tsv", "cog_classify.tsv"):
+        assert (outdir / outfile_name).exists()
+
+
+def test_cli_memoize(
+    example_fasta_file: Path,
+    rpsblast_file: Path,
+    cddid_download_dir: Path,
+    tmp_path: Path,
+):
+    """Test COGclassifier CLI skip re-run if outputs are up to date"""
+    outdir = tmp_path / "outdir"
+    cmd = f"COGclassifier -i {example_fasta_file} -o {outdir} -d {cddid_download_dir} --rpsblast_file {rpsblast_file} --no_plot"  # noqa: E501
+    log_file = outdir / "cogclassifier.log"
+    assert sp.run(shlex.split(cmd)).returncode == 0
+    assert "up to date" not in log_file.read_text()
+
+    assert sp.run(shlex.split(cmd)).returncode == 0
+    assert "All outputs are up to date" in log_file.read_text()
+
+    # Re-run only changed stage
+    (outdir / "cog_count.tsv").unlink()
+    assert sp.run(shlex.split(cmd)).returncode == 0
+    log = log_file.read_text()
+    assert "Skip RPS-BLAST search" in log
+    assert (outdir / "cog_count.tsv").exists()
+
+    assert sp.run(shlex.split(f"{cmd} --force")).returncode == 0
+    assert "up to date" not in log_file.read_text()
@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import pytest
+
+from cogclassifier import CogClassifier, backend
+from cogclassifier.backend import (
+    SEARCH_BACKENDS,
+    FakeBackend,
+    PrecomputedBackend,
+    ShardedRpsBlastBackend,
+    get_backend,
+    register_backend,
+)
+from cogclassifier.blast import BlastAlignmentRecord, RpsBlastProgress
+from cogclassifier.fasta import iter_fasta_records
+
+
+def test_registry():
+    """Test search backend registry"""
+    assert {"rpsblast", "sharded", "precomputed", "fake"} <= set(SEARCH_BACKENDS)
+    assert isinstance(get_backend("fake"), FakeBackend)
+    assert get_backend("sharded", shard_num=2).requires_db
+    with pytest.raises(ValueError):
+        get_backend("invalid")
+    with pytest.raises(ValueError):
+        register_backend("fake")(FakeBackend)
+
+
+def test_fake_backend(example_fasta_file: Path, rpsblast_file: Path, tmp_path: Path):
+    """Test fake backend returns hits of query IDs only"""
+    query_file = tmp_path / "query.faa"
+    query_ids = [
+        line[1:].split()[0] for line in example_fasta_file.open() if line[0] == ">"
+    ]
+    query_file.write_text("".join(f">{query_id}\nMKR\n" for query_id in query_ids[:10]))
+    outfile = tmp_path / "rpsblast.tsv"
+    blast_rec = FakeBackend(rpsblast_file).search(query_file, None, outfile=outfile)
+    expected = [
+        aln
+        for aln in BlastAlignmentRecord(rpsblast_file).alignments
+        if aln.qaccver in query_ids[:10]
+    ]
+    assert blast_rec.alignments == expected
+    assert BlastAlignmentRecord(outfile).alignments == expected
+    assert FakeBackend().search(query_file, None).alignments == []
+
+
+def test_classifier_backend(
+    example_fasta_file: Path,
+    rpsblast_file: Path,
+    cddid_download_dir: Path,
+    tmp_path: Path,
+):
+    """Test COG classification by fake & precomputed backend (No RPS-BLAST)"""
+    fake_stats = CogClassifier(
+        example_fasta_file,
+        download_dir=cddid_download_dir,
+        rpsblast_outfile=tmp_path / "rpsblast.tsv",
+        backend=FakeBackend(rpsblast_file),
+    ).run()
+    precomputed_stats = CogClassifier(
+        example_fasta_file,
+        download_dir=cddid_download_dir,
+        backend=PrecomputedBackend(rpsblast_file),
+    ).run()
+    assert fake_stats.classify_count == precomputed_stats.classify_count > 0
+    assert fake_stats.classifications == precomputed_stats.classifications
+
+
+class _FakeRpsBlast:
+    """Fake RpsBlast writing hits of query IDs & reporting finished progress"""
+
+    def __init__(self, query, db, *, outfile, progress_callback=None, **kwargs):
+        self._query = query
+        self._outfile = outfile
+        self._progress_callback = progress_callback
+
+    @classmethod
+    def check_installation(cls, raise_error: bool = True) -> bool:
+        return True
+
+    def run(self) -> None:
+        records = list(iter_fasta_records(self._query))
+        count = len(records)
+        residue_count = sum(sum(map(len, seq_lines)) for _, seq_lines in records)
+        self._outfile.write_text("")
+        if self._progress_callback is not None:
+            self._progress_callback(
+                RpsBlastProgress(
+                    completed_query_count=count,
+                    total_query_count=count,
+                    completed_residue_count=residue_count,
+                    total_residue_count=residue_count,
+                    elapsed_seconds=0,
+                    idle_seconds=0,
+                    finished=True,
+                )
+            )
+
+
+def test_sharded_backend_progress(
+    example_fasta_file: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test search progress of shards is aggregated into whole query progress"""
+    monkeypatch.setattr(backend, "RpsBlast", _FakeRpsBlast)
+    progress_list: list[RpsBlastProgress] = []
+    ShardedRpsBlastBackend(shard_num=3).search(
+        example_fasta_file,
+        tmp_path / "db",
+        outfile=tmp_path / "rpsblast.tsv",
+        progress_callback=progress_list.append,
+    )
+    assert len(progress_list) == 3
+    assert all(p.total_query_count == 100 for p in progress_list)
+    assert 0 < progress_list[0].completed_query_count < 100
+    assert progress_list[-1].completed_query_count == 100
+    assert progress_list[-1].completed_residue_count == (
+        progress_list[-1].total_residue_count
+    )
+    assert [p.finished for p in progress_list] == [False, False, True]
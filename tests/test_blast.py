@@ -0,0 +1,131 @@
+import gzip
+import logging
+import subprocess as sp
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from cogclassifier.blast import BlastAlignmentRecord, RpsBlast, RpsBlastProgressMonitor
+
+
+class TestBlastAlignmentRecord:
+    def test_write(self, rpsblast_file: Path, tmp_path: Path):
+        """Test write method (Copy original blast result file as is)"""
+        blast_rec = BlastAlignmentRecord(rpsblast_file)
+        outfile = tmp_path / "rpsblast.tsv"
+        blast_rec.write(outfile)
+        assert outfile.read_bytes() == rpsblast_file.read_bytes()
+
+    def test_write_top_hit_only(self, rpsblast_file: Path, tmp_path: Path):
+        """Test write method (Top hit only)"""
+        blast_rec = BlastAlignmentRecord(rpsblast_file)
+        outfile = tmp_path / "rpsblast_top_hit.tsv"
+        blast_rec.write(outfile, top_hit_only=True)
+        top_hit_rec = BlastAlignmentRecord(outfile)
+        assert top_hit_rec.alignments == blast_rec.top_hit_alignments
+
+    def test_write_without_source_file(self, rpsblast_file: Path, tmp_path: Path):
+        """Test write method (Stream alignments if source file not exists)"""
+        src_file = tmp_path / "src_rpsblast.tsv"
+        src_file.write_bytes(rpsblast_file.read_bytes())
+        blast_rec = BlastAlignmentRecord(src_file)
+        # Alignments are parsed lazily on first access
+        alignments = blast_rec.alignments
+        src_file.unlink()
+        outfile = tmp_path / "rpsblast.tsv"
+        blast_rec.write(outfile)
+        assert BlastAlignmentRecord(outfile).alignments == alignments
+
+    def test_tmpdir_lifetime(self, rpsblast_file: Path, tmp_path: Path):
+        """Test temporary blast result file is kept alive with record"""
+        tmpdir = tempfile.TemporaryDirectory()
+        src_file = Path(tmpdir.name) / "rpsblast.tsv"
+        src_file.write_bytes(rpsblast_file.read_bytes())
+        blast_rec = BlastAlignmentRecord(src_file, tmpdir=tmpdir)
+        del tmpdir
+        outfile = tmp_path / "rpsblast.tsv"
+        blast_rec.write(outfile)
+        assert outfile.read_bytes() == rpsblast_file.read_bytes()
+        del blast_rec
+        assert not src_file.exists()
+
+    def test_bulk_load(self, rpsblast_file: Path, tmp_path: Path):
+        """Test bulk load (Parallel parse of line aligned byte ranges)"""
+        src_file = tmp_path / "rpsblast.tsv"
+        src_file.write_text("# header line\n" + rpsblast_file.read_text())
+        blast_rec = BlastAlignmentRecord(src_file)
+        bulk_blast_rec = BlastAlignmentRecord.bulk_load(
+            src_file, workers=7, min_chunk_bytes=1
+        )
+        assert bulk_blast_rec.alignments == blast_rec.alignments
+        assert bulk_blast_rec.top_hit_alignments == blast_rec.top_hit_alignments
+        assert bulk_blast_rec.domain_hit_alignments == blast_rec.domain_hit_alignments
+
+        empty_file = tmp_path / "empty.tsv"
+        empty_file.write_text("")
+        assert BlastAlignmentRecord.bulk_load(empty_file).alignments == []
+
+    def test_compressed(self, rpsblast_file: Path, tmp_path: Path):
+        """Test write & load compressed blast result file transparently"""
+        blast_rec = BlastAlignmentRecord(rpsblast_file)
+        gz_file = tmp_path / "rpsblast.tsv.gz"
+        blast_rec.write(gz_file)
+        assert gzip.decompress(gz_file.read_bytes()) == rpsblast_file.read_bytes()
+        assert BlastAlignmentRecord(gz_file).alignments == blast_rec.alignments
+        bulk_blast_rec = BlastAlignmentRecord.bulk_load(
+            gz_file, workers=7, min_chunk_bytes=1
+        )
+        assert bulk_blast_rec.alignments == blast_rec.alignments
+
+        top_hit_file = tmp_path / "rpsblast_top_hit.tsv"
+        BlastAlignmentRecord(gz_file).write(top_hit_file, top_hit_only=True)
+        top_hit_blast_rec = BlastAlignmentRecord(top_hit_file)
+        assert top_hit_blast_rec.alignments == blast_rec.top_hit_alignments
+
+
+class TestRpsBlastProgressMonitor:
+    def test_poll(self, example_fasta_file: Path, rpsblast_file: Path, tmp_path):
+        """Test poll search progress from incrementally written output file"""
+        outfile = tmp_path / "rpsblast.tsv"
+        monitor = RpsBlastProgressMonitor(example_fasta_file, outfile)
+        progress = monitor.poll()
+        assert progress.completed_query_count == 0
+        assert progress.total_query_count == 100
+        assert progress.eta_seconds is None
+
+        lines = rpsblast_file.read_text().splitlines(keepends=True)
+        with open(outfile, "w") as f:
+            f.writelines(lines[:10])
+            # Partially written line is ignored
+            f.write(lines[10][:5])
+        progress = monitor.poll()
+        last_query_id = lines[9].split("\t")[0]
+        query_ids = [
+            line[1:].split()[0]
+            for line in example_fasta_file.read_text().splitlines()
+            if line.startswith(">")
+        ]
+        assert progress.completed_query_count == query_ids.index(last_query_id) + 1
+        assert 0 < progress.completed_residue_count < progress.total_residue_count
+
+        progress = monitor.poll(finished=True)
+        assert progress.completed_query_count == progress.total_query_count
+        assert progress.eta_seconds == 0
+
+
+class TestRpsBlast:
+    def test_run_cmd_forward_output(self, caplog, tmp_path: Path):
+        """Test run command with forwarding stderr lines to logger"""
+        rpsblast = RpsBlast("query.faa", "db")
+        logger = logging.getLogger(__name__)
+        cmd = f"{sys.executable} -c \"import sys; print('warn message', file=sys.stderr)\""  # noqa: E501
+        with caplog.at_level(logging.INFO):
+            rpsblast._run_cmd(cmd, logger)
+        assert "> warn message" in caplog.text
+
+        cmd = f"{sys.executable} -c \"import sys; sys.exit('error message')\""
+        with pytest.raises(sp.CalledProcessError) as e:
+            rpsblast._run_cmd(cmd, logger)
+        assert "error message" in e.value.stderr
@@ -1,7 +1,18 @@
 import re
+import subprocess as sp
+import sys
+from pathlib import Path
+
+import pytest
 
 from cogclassifier import const
-from cogclassifier.cog import CogDefinitionRecord, CogFuncCategoryRecord
+from cogclassifier.blast import BlastAlignmentRecord
+from cogclassifier.cog import (
+    CogCddIdTable,
+    CogClassifyStats,
+    CogDefinitionRecord,
+    CogFuncCategoryRecord,
+)
 
 
 class TestCogFuncCategoryRecord:
@@ -39,3 +50,125 @@ class TestCogDefinitionRecord:
         with open(const.COG_DEFINITION_FILE) as f:
             expected_str = _remove_trailing_tabs(f.read())
         assert _remove_trailing_tabs(str(cog_def_rec)) == expected_str
+
+
+class TestCogClassifyStats:
+    def _get_stats(self, query, rpsblast_file, cddid_table_file, **kwargs):
+        return CogClassifyStats(
+            query,
+            BlastAlignmentRecord(rpsblast_file),
+            CogFuncCategoryRecord(const.COG_FUNC_CATEGORY_FILE),
+            CogDefinitionRecord(const.COG_DEFINITION_FILE),
+            CogCddIdTable(cddid_table_file),
+            **kwargs,
+        )
+
+    def test_top_hit_classify(
+        self, example_fasta_file: Path, rpsblast_file: Path, cddid_table_file: Path
+    ):
+        """Test top hit classification"""
+        stats = self._get_stats(example_fasta_file, rpsblast_file, cddid_table_file)
+        assert stats.query_count == 100
+        assert stats.classify_count == len(stats.query_classify_df)
+        assert stats.count_summary_df["COUNT"].sum() == stats.classify_count
+
+    def test_multi_domain_classify(
+        self, example_fasta_file: Path, rpsblast_file: Path, cddid_table_file: Path
+    ):
+        """Test multi domain classification"""
+        stats = self._get_stats(example_fasta_file, rpsblast_file, cddid_table_file)
+        md_stats = self._get_stats(
+            example_fasta_file, rpsblast_file, cddid_table_file, multi_domain=True
+        )
+        df, md_df = stats.query_classify_df, md_stats.query_classify_df
+        assert len(md_df) > len(df)
+        assert md_stats.classify_count == stats.classify_count
+        # Top hit is always included
+        md_pairs = set(zip(md_df["QUERY_ID"], md_df["COG_ID"]))
+        assert set(zip(df["QUERY_ID"], df["COG_ID"])) <= md_pairs
+        # Domain regions are not overlapped
+        for _, query_df in md_df.groupby("QUERY_ID"):
+            regions = sorted(zip(query_df["QSTART"], query_df["QEND"]))
+            for (_, end), (next_start, _) in zip(regions, regions[1:]):
+                assert end < next_start
+        summary_df = md_stats.count_summary_df
+        assert summary_df["DOMAIN_COUNT"].sum() == len(md_df)
+        assert (summary_df["COUNT"] <= summary_df["DOMAIN_COUNT"]).all()
+
+    def test_pandas_free_result(
+        self, example_fasta_file: Path, rpsblast_file: Path, cddid_table_file: Path
+    ):
+        """Test classification results are available without importing pandas"""
+        code = f"""
+import sys
+from cogclassifier import CogClassifier
+from cogclassifier.blast import BlastAlignmentRecord
+from cogclassifier.cog import CogCddIdTable, CogClassifyStats
+fc_rec, def_rec, _ = CogClassifier.load_resources("{cddid_table_file}")
+stats = CogClassifyStats(
+    "{example_fasta_file}",
+    BlastAlignmentRecord("{rpsblast_file}"),
+    fc_rec,
+    def_rec,
+    CogCddIdTable("{cddid_table_file}"),
+)
+assert sum(stats.letter_counts.values()) == stats.classify_count
+assert len(list(stats)) == stats.classify_count
+assert "pandas" not in sys.modules
+"""
+        result = sp.run([sys.executable, "-c", code])
+        assert result.returncode == 0
+
+    def test_dataframe_views(
+        self, example_fasta_file: Path, rpsblast_file: Path, cddid_table_file: Path
+    ):
+        """Test dataframe views are consistent with classification results"""
+        stats = self._get_stats(example_fasta_file, rpsblast_file, cddid_table_file)
+        df = stats.query_classify_df
+        assert df["QUERY_ID"].to_list() == [c.query_id for c in stats]
+        summary_df = stats.count_summary_df
+        assert dict(zip(summary_df["LETTER"], summary_df["COUNT"])) == (
+            stats.letter_counts
+        )
+
+    def test_categorical_columns(
+        self, example_fasta_file: Path, rpsblast_file: Path, cddid_table_file: Path
+    ):
+        """Test categorical columns reduce memory usage with same tsv output"""
+        import pandas as pd
+
+        stats = self._get_stats(example_fasta_file, rpsblast_file, cddid_table_file)
+        df = stats.query_classify_df
+        object_df = df.astype(object)
+        assert df["COG_LETTER"].dtype == "category"
+        assert df.to_csv(sep="\t", index=False) == object_df.to_csv(
+            sep="\t", index=False
+        )
+        # Categories are fixed by definition tables (Same dtypes between results)
+        other_stats = self._get_stats(
+            example_fasta_file, rpsblast_file, cddid_table_file, multi_domain=True
+        )
+        other_df = other_stats.query_classify_df.iloc[:10]
+        concat_df = pd.concat([df, other_df] * 50, ignore_index=True)
+        for name in ("COG_ID", "COG_NAME", "GENE_NAME", "COG_LETTER"):
+            assert concat_df[name].dtype == df[name].dtype == "category"
+        # Categories overhead is amortized over whole genome size results
+        df, object_df = concat_df, concat_df.astype(object)
+        mem_usage = df.memory_usage(deep=True).sum()
+        object_mem_usage = object_df.memory_usage(deep=True).sum()
+        assert mem_usage < object_mem_usage
+
+    def test_estimate_proportions(
+        self, example_fasta_file: Path, rpsblast_file: Path, cddid_table_file: Path
+    ):
+        """Test COG letter proportions with bootstrap confidence intervals"""
+        stats = self._get_stats(example_fasta_file, rpsblast_file, cddid_table_file)
+        df = stats.estimate_proportions(bootstrap_num=200, seed=1)
+        assert df["LETTER"].to_list() == stats.cog_fc_rec.get_letters()
+        assert df["COUNT"].to_list() == list(stats.letter_counts.values())
+        assert df["PROPORTION"].sum() == pytest.approx(1.0)
+        assert (df["CI_LOWER"] <= df["PROPORTION"]).all()
+        assert (df["PROPORTION"] <= df["CI_UPPER"]).all()
+        assert (df["CI_UPPER"] > df["CI_LOWER"])[df["COUNT"] > 0].all()
+        # Reproducible by seed
+        assert df.equals(stats.estimate_proportions(bootstrap_num=200, seed=1))
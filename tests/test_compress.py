@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+from cogclassifier.compress import compress_format, compressed_name, xopen
+
+
+@pytest.mark.parametrize("compress", ["gz", "zst"])
+def test_xopen(compress: str, rpsblast_file: Path, tmp_path: Path):
+    """Test write & read compressed file transparently"""
+    if compress == "zst":
+        pytest.importorskip("zstandard")
+    outfile = tmp_path / compressed_name("rpsblast.tsv", compress)
+    assert compress_format(outfile) == compress
+    text = rpsblast_file.read_text()
+    with xopen(outfile, "wt", threads=2) as f:
+        for line in text.splitlines(keepends=True):
+            f.write(line)
+    assert outfile.stat().st_size < len(text)
+    with xopen(outfile, "rt") as f:
+        assert f.read() == text
+    with xopen(outfile, "rb") as f:
+        assert f.read() == text.encode()
+
+
+def test_xopen_plain(tmp_path: Path):
+    """Test plain file & invalid arguments"""
+    outfile = tmp_path / "test.tsv"
+    assert compress_format(outfile) is None
+    with xopen(outfile, "wt") as f:
+        f.write("a\tb\n")
+    assert outfile.read_text() == "a\tb\n"
+    with pytest.raises(ValueError):
+        xopen(outfile, "a")
+    with pytest.raises(ValueError):
+        compressed_name("test.tsv", "bz2")
@@ -0,0 +1,210 @@
+from pathlib import Path
+
+import pytest
+
+from cogclassifier import CogClassifier, const
+from cogclassifier.backend import FakeBackend
+from cogclassifier.blast import BlastAlignmentRecord
+from cogclassifier.cog import (
+    CogCddIdTable,
+    CogClassifyStats,
+    CogDefinitionRecord,
+    CogFuncCategoryRecord,
+)
+from cogclassifier.fasta import (
+    IndexedFasta,
+    export_cog_fasta,
+    sample_fasta,
+    split_fasta,
+    validate_fasta,
+)
+
+
+def _read_fasta(fasta_file: Path) -> dict[str, str]:
+    """Read fasta file as ID & sequence dict (Reference implementation)"""
+    id2seq: dict[str, str] = {}
+    seq_id = ""
+    with open(fasta_file) as f:
+        for line in f:
+            if line.startswith(">"):
+                seq_id = line[1:].split()[0]
+                id2seq[seq_id] = ""
+            else:
+                id2seq[seq_id] += line.strip()
+    return id2seq
+
+
+class TestIndexedFasta:
+    def test_fetch(self, example_fasta_file: Path):
+        """Test fetch sequences by ID"""
+        id2seq = _read_fasta(example_fasta_file)
+        with IndexedFasta(example_fasta_file) as fasta:
+            assert fasta.ids == list(id2seq.keys())
+            assert len(fasta) == fasta.record_count == len(id2seq)
+            for seq_id, seq in id2seq.items():
+                assert fasta.get_seq(seq_id) == seq
+                assert fasta.get_record(seq_id).startswith(f">{seq_id}".encode())
+
+    def test_irregular_fasta(self, tmp_path: Path):
+        """Test multi-line, duplicate ID, no trailing newline & empty fasta"""
+        fasta_file = tmp_path / "test.faa"
+        fasta_file.write_text(">a desc\nMKR\nIST\n>b\nMAA\n>a dup\nMCC\n>c\nMWW")
+        with IndexedFasta(fasta_file) as fasta:
+            assert fasta.ids == ["a", "b", "c"]
+            assert fasta.record_count == 4
+            assert fasta.get_seq("a") == "MKRIST"
+            assert fasta.get_record("c") == b">c\nMWW\n"
+            assert "b" in fasta and "d" not in fasta
+
+        empty_fasta_file = tmp_path / "empty.faa"
+        empty_fasta_file.write_text("")
+        with IndexedFasta(empty_fasta_file) as fasta:
+            assert len(fasta) == fasta.record_count == 0
+
+
+def test_export_cog_fasta(
+    example_fasta_file: Path,
+    rpsblast_file: Path,
+    cddid_table_file: Path,
+    tmp_path: Path,
+):
+    """Test export classified query sequences per letter & COG ID"""
+    stats = CogClassifyStats(
+        example_fasta_file,
+        BlastAlignmentRecord(rpsblast_file),
+        CogFuncCategoryRecord(const.COG_FUNC_CATEGORY_FILE),
+        CogDefinitionRecord(const.COG_DEFINITION_FILE),
+        CogCddIdTable(cddid_table_file),
+    )
+    id2seq = _read_fasta(example_fasta_file)
+
+    for by, key_attr in (("letter", "cog_letter"), ("cog_id", "cog_id")):
+        outfiles = export_cog_fasta(stats, tmp_path / by, by=by)
+        expected = {}
+        for c in stats.classifications:
+            expected.setdefault(getattr(c, key_attr), []).append(c.query_id)
+        assert {f.stem for f in outfiles} == set(expected)
+        for outfile in outfiles:
+            id2exported_seq = _read_fasta(outfile)
+            assert list(id2exported_seq) == expected[outfile.stem]
+            for seq_id, seq in id2exported_seq.items():
+                assert seq == id2seq[seq_id]
+
+    # Indexed query fasta is closed & re-opened on next access
+    fasta = stats.query_fasta
+    with stats:
+        assert stats.query_count == len(id2seq)
+    assert stats.query_fasta is not fasta
+    stats.close()
+
+
+def test_validate_fasta(example_fasta_file: Path, tmp_path: Path):
+    """Test validate & fix query fasta"""
+    validation = validate_fasta(example_fasta_file)
+    assert validation.is_valid
+    assert validation.seq_count == validation.record_count == 100
+    assert validation.residue_count == sum(
+        map(len, _read_fasta(example_fasta_file).values())
+    )
+
+    fasta_file = tmp_path / "invalid.faa"
+    fasta_file.write_text(
+        ">a desc\nMKR*\nI1T\n>\n>b\n\n>a dup\nMCC\n>sp|P1|X desc\nMWW\n"
+        f">n\n{'ACGT' * 25}\n>c\nMK\n>p\nGATTACA"
+    )
+    validation = validate_fasta(fasta_file)
+    assert not validation.is_valid and not validation.fixed
+    assert validation.record_count == 8
+    assert validation.issue_counts == dict(
+        invalid_residue=1,
+        empty_record=2,
+        duplicate_id=1,
+        pipe_header=1,
+        nucleotide_like=1,
+    )
+    assert validation.fatal_issues == ["duplicate_id", "nucleotide_like"]
+
+    fixed_fasta_file = tmp_path / "fixed.faa"
+    validation = validate_fasta(fasta_file, fix_outfile=fixed_fasta_file)
+    assert validation.fixed and validation.seq_count == 4
+    assert _read_fasta(fixed_fasta_file) == dict(
+        a="MKR*IT", sp_P1_X="MWW", c="MK", p="GATTACA"
+    )
+    assert validate_fasta(fixed_fasta_file).is_valid
+
+    # IUPAC `J` residue & non UTF-8 header
+    fasta_file.write_bytes(b">a\nMJKj\n>b|\xff\nMKR\n")
+    validation = validate_fasta(fasta_file)
+    assert validation.issue_counts == dict(pipe_header=1)
+    assert validation.issue_examples == dict(pipe_header=["b|\ufffd"])
+
+    # Duplicate ID is checked against original ID unless fixed
+    fasta_file.write_text(">a|b\nMKR\n>a_b\nMKR\n")
+    assert validate_fasta(fasta_file).issue_counts == dict(pipe_header=1)
+    validation = validate_fasta(fasta_file, fix_outfile=fixed_fasta_file)
+    assert validation.issue_counts == dict(pipe_header=1, duplicate_id=1)
+
+
+def test_invalid_query_fails_fast(tmp_path: Path):
+    """Test invalid query raises error before resource download & search"""
+    fasta_file = tmp_path / "invalid.faa"
+    fasta_file.write_text(">a\nMKR\n>a\nMCC\n")
+    classifier = CogClassifier(fasta_file, download_dir=tmp_path / "download")
+    with pytest.raises(ValueError, match="duplicate_id=1"):
+        classifier.run()
+    assert classifier.query_validation is not None
+    assert not (tmp_path / "download").exists()
+
+
+def test_tolerated_query_issues(
+    rpsblast_file: Path, cddid_download_dir: Path, tmp_path: Path
+):
+    """Test query issues tolerated by rpsblast are warned only"""
+    query_id = rpsblast_file.read_text().split("\t", 1)[0]
+    fasta_file = tmp_path / "query.faa"
+    fasta_file.write_text(f">{query_id}\nMKR\n>sp|P1|X\nMKR\n>empty\n")
+    stats = CogClassifier(
+        fasta_file,
+        download_dir=cddid_download_dir,
+        backend=FakeBackend(rpsblast_file),
+    ).run()
+    assert stats.query_count == 3 and stats.classify_count == 1
+
+
+def test_split_fasta(example_fasta_file: Path, tmp_path: Path):
+    """Test split fasta into contiguous chunks of nearly equal residue count"""
+    id2seq = _read_fasta(example_fasta_file)
+    chunk_files = split_fasta(example_fasta_file, tmp_path, 4)
+    assert len(chunk_files) == 4
+    merged_id2seq: dict[str, str] = {}
+    for chunk_file in chunk_files:
+        merged_id2seq.update(_read_fasta(chunk_file))
+    assert list(merged_id2seq.items()) == list(id2seq.items())
+    residue_counts = [sum(map(len, _read_fasta(f).values())) for f in chunk_files]
+    assert max(residue_counts) < sum(residue_counts) / 2
+
+    assert 1 < len(split_fasta(example_fasta_file, tmp_path / "many", 1000)) <= 100
+
+
+def test_sample_fasta(example_fasta_file: Path, tmp_path: Path):
+    """Test reproducible random sampling of fasta records"""
+    id2seq = _read_fasta(example_fasta_file)
+    sample_file = tmp_path / "sample.faa"
+    assert sample_fasta(example_fasta_file, sample_file, size=30, seed=1) == (30, 100)
+    sample_id2seq = _read_fasta(sample_file)
+    # Sampled records are the same as input & kept in input order
+    assert list(sample_id2seq.items()) == [
+        (seq_id, seq) for seq_id, seq in id2seq.items() if seq_id in sample_id2seq
+    ]
+    # Same seed => Same sample, Different seed => Different sample
+    sample_fasta(example_fasta_file, tmp_path / "same.faa", size=30, seed=1)
+    assert _read_fasta(tmp_path / "same.faa") == sample_id2seq
+    sample_fasta(example_fasta_file, tmp_path / "other.faa", size=30, seed=2)
+    assert _read_fasta(tmp_path / "other.faa") != sample_id2seq
+
+    assert sample_fasta(example_fasta_file, sample_file, size=1000) == (100, 100)
+    sample_count, _ = sample_fasta(example_fasta_file, sample_file, fraction=0.5)
+    assert 0 < sample_count < 100
+    assert len(_read_fasta(sample_file)) == sample_count
+    with pytest.raises(ValueError):
+        sample_fasta(example_fasta_file, sample_file, size=10, fraction=0.5)
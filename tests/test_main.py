@@ -0,0 +1,127 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from cogclassifier import CogClassifier
+from cogclassifier.backend import FakeBackend
+from cogclassifier.blast import BlastAlignmentRecord, RpsBlastProgress
+from cogclassifier.fasta import IndexedFasta
+
+
+def test_classifier_sampling(
+    example_fasta_file: Path,
+    rpsblast_file: Path,
+    cddid_download_dir: Path,
+    tmp_path: Path,
+):
+    """Test COG classification of randomly sampled query sequences"""
+    classifier = CogClassifier(
+        example_fasta_file,
+        download_dir=cddid_download_dir,
+        rpsblast_outfile=tmp_path / "rpsblast.tsv",
+        backend=FakeBackend(rpsblast_file),
+        sample_size=40,
+        sample_seed=1,
+    )
+    stats = classifier.run()
+    assert classifier.sample_counts == (40, 100)
+    assert stats.query_count == 40
+    sample_ids = {c.query_id for c in stats}
+    with IndexedFasta(tmp_path / "query_sample.faa") as fasta:
+        assert sample_ids <= set(fasta.ids)
+    df = stats.estimate_proportions(bootstrap_num=100)
+    assert df["PROPORTION"].sum() == pytest.approx(1.0)
+
+
+class _SlowFakeBackend(FakeBackend):
+    """Fake backend taking fixed time per search"""
+
+    def search(self, query, db, **kwargs) -> BlastAlignmentRecord:
+        time.sleep(0.2)
+        progress_callback = kwargs.get("progress_callback")
+        if progress_callback is not None:
+            with IndexedFasta(query) as fasta:
+                count = fasta.record_count
+            progress_callback(
+                RpsBlastProgress(
+                    completed_query_count=count,
+                    total_query_count=count,
+                    completed_residue_count=0,
+                    total_residue_count=0,
+                    elapsed_seconds=0.2,
+                    idle_seconds=0,
+                    finished=True,
+                )
+            )
+        return super().search(query, db, **kwargs)
+
+
+def test_classifier_time_limit(
+    example_fasta_file: Path,
+    rpsblast_file: Path,
+    cddid_download_dir: Path,
+    tmp_path: Path,
+):
+    """Test time limited classification returns partial result"""
+    stats = CogClassifier(
+        example_fasta_file,
+        download_dir=cddid_download_dir,
+        backend=_SlowFakeBackend(rpsblast_file),
+    ).run()
+
+    partial_stats = CogClassifier(
+        example_fasta_file,
+        download_dir=cddid_download_dir,
+        rpsblast_outfile=tmp_path / "rpsblast.tsv",
+        backend=_SlowFakeBackend(rpsblast_file),
+        time_limit=0.7,
+        chunk_size=10,
+    ).run()
+    assert partial_stats.is_partial
+    assert 0 < partial_stats.query_count < 100
+    assert partial_stats.query_count + partial_stats.skipped_query_count == 100
+    assert not (tmp_path / "query_processed.faa").exists()
+    processed_ids = set(partial_stats.query_fasta.ids)
+    assert partial_stats.classifications == [
+        c for c in stats if c.query_id in processed_ids
+    ]
+    assert not (tmp_path / "run_manifest.json").exists()
+
+    progress_list: list[RpsBlastProgress] = []
+    full_stats = CogClassifier(
+        example_fasta_file,
+        download_dir=cddid_download_dir,
+        backend=_SlowFakeBackend(rpsblast_file),
+        progress_callback=progress_list.append,
+        time_limit=60,
+        chunk_size=40,
+    ).run()
+    assert not full_stats.is_partial
+    assert full_stats.classifications == stats.classifications
+    # Progress is aggregated across chunks
+    assert all(p.total_query_count == 100 for p in progress_list)
+    assert [p.finished for p in progress_list] == [False, False, True]
+
+    # Exactly `chunk_size` sequences per chunk
+    completed_counts = [p.completed_query_count for p in progress_list]
+    assert completed_counts == [40, 80, 100]
+
+    with pytest.raises(ValueError):
+        CogClassifier(example_fasta_file, time_limit=60, chunk_size=0)
+
+
+def test_classifier_time_limit_exhausted(
+    example_fasta_file: Path,
+    rpsblast_file: Path,
+    cddid_download_dir: Path,
+):
+    """Test no chunk is searched if time limit is used up before search"""
+    stats = CogClassifier(
+        example_fasta_file,
+        download_dir=cddid_download_dir,
+        backend=_SlowFakeBackend(rpsblast_file),
+        time_limit=1e-6,
+    ).run()
+    assert stats.query_count == 0
+    assert stats.skipped_query_count == 100
@@ -0,0 +1,35 @@
+import os
+from pathlib import Path
+
+from cogclassifier.manifest import RunManifest, file_digest, fingerprint
+
+
+def test_run_manifest(tmp_path: Path):
+    """Test record & up-to-date check of run stage outputs"""
+    outfile = tmp_path / "result.tsv"
+    outfile.write_text("result")
+    key = fingerprint(file_digest(outfile), 1e-2)
+
+    manifest = RunManifest.load(tmp_path)
+    assert not manifest.is_up_to_date("search", key, tmp_path, [outfile.name])
+    manifest.record("search", key, tmp_path, [outfile.name])
+    manifest.save(tmp_path)
+
+    manifest = RunManifest.load(tmp_path)
+    assert manifest.is_up_to_date("search", key, tmp_path, [outfile.name])
+    # Changed stage key
+    other_key = fingerprint(file_digest(outfile), 1e-3)
+    assert not manifest.is_up_to_date("search", other_key, tmp_path, [outfile.name])
+    # Changed output file
+    st = outfile.stat()
+    os.utime(outfile, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert not manifest.is_up_to_date("search", key, tmp_path, [outfile.name])
+    # Removed output file
+    outfile.unlink()
+    assert not manifest.is_up_to_date("search", key, tmp_path, [outfile.name])
+
+
+def test_invalid_run_manifest(tmp_path: Path):
+    """Test load invalid run manifest as empty manifest"""
+    (tmp_path / "run_manifest.json").write_text("{invalid json")
+    assert RunManifest.load(tmp_path).stages == {}
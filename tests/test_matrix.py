@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from cogclassifier.matrix import CogCountMatrix, load_cog_count_files
+
+
+def test_add_and_reload(cog_count_file: Path, tmp_path: Path):
+    """Test incremental add & reload matrix file"""
+    matrix_file = tmp_path / "matrix.tsv"
+    matrix = CogCountMatrix(matrix_file)
+    assert matrix.add("genome1", cog_count_file)
+    assert matrix.add("genome2", cog_count_file)
+    # Already added genome is skipped
+    assert not matrix.add("genome1", cog_count_file)
+
+    reloaded_matrix = CogCountMatrix(matrix_file)
+    assert reloaded_matrix.genomes == ["genome1", "genome2"]
+    df = reloaded_matrix.to_dataframe()
+    expected_df = pd.read_csv(cog_count_file, sep="\t")
+    assert df.loc["genome1"].to_list() == expected_df["COUNT"].to_list()
+
+
+def test_add_to_empty_file(cog_count_file: Path, tmp_path: Path):
+    """Test header is written to existing empty matrix file"""
+    matrix_file = tmp_path / "matrix.tsv"
+    matrix_file.touch()
+    matrix = CogCountMatrix(matrix_file)
+    assert matrix.add("genome1", cog_count_file)
+    assert matrix_file.read_text().startswith("GENOME\t")
+    assert CogCountMatrix(matrix_file).genomes == ["genome1"]
+
+
+def test_overwrite_and_compact(cog_count_file: Path, tmp_path: Path):
+    """Test overwrite genome count & compact matrix file"""
+    matrix_file = tmp_path / "matrix.tsv"
+    matrix = CogCountMatrix(matrix_file)
+    matrix.add("genome1", cog_count_file)
+    zero_df = pd.read_csv(cog_count_file, sep="\t").assign(COUNT=0)
+    assert matrix.add("genome1", zero_df, overwrite=True)
+    assert len(matrix_file.read_text().splitlines()) == 3
+    matrix.compact()
+    assert len(matrix_file.read_text().splitlines()) == 2
+    assert CogCountMatrix(matrix_file).to_dataframe().to_numpy().sum() == 0
+
+
+def test_normalize(cog_count_file: Path, tmp_path: Path):
+    """Test normalize matrix"""
+    matrix = CogCountMatrix(tmp_path / "matrix.tsv")
+    df = pd.read_csv(cog_count_file, sep="\t")
+    matrix.add("genome1", df)
+    matrix.add("genome2", df.assign(COUNT=df["COUNT"] * 2))
+    matrix.add("genome3", df.assign(COUNT=0))
+
+    ratio_df = matrix.to_dataframe(normalize="ratio")
+    assert ratio_df.loc["genome1"].sum() == pytest.approx(1.0)
+    assert ratio_df.loc["genome1"].to_list() == ratio_df.loc["genome2"].to_list()
+    assert ratio_df.loc["genome3"].sum() == 0
+
+    zscore_df = matrix.to_dataframe(normalize="zscore")
+    assert zscore_df.mean(axis=0).abs().max() == pytest.approx(0.0)
+
+    with pytest.raises(ValueError):
+        matrix.to_dataframe(normalize="invalid")
+
+
+def test_load_cog_count_files(cog_count_file: Path, tmp_path: Path):
+    """Test load multiple COG count files into count dataframe"""
+    zero_count_file = tmp_path / "zero" / "cog_count.tsv"
+    zero_count_file.parent.mkdir()
+    pd.read_csv(cog_count_file, sep="\t").assign(COUNT=0).to_csv(
+        zero_count_file, sep="\t", index=False
+    )
+    df = load_cog_count_files(
+        [cog_count_file, zero_count_file, cog_count_file],
+        genomes=["genome1", "genome2", "genome2"],
+    )
+    # Same as count matrix (Last file wins for duplicated genome)
+    matrix = CogCountMatrix(tmp_path / "matrix.tsv")
+    matrix.add("genome1", cog_count_file)
+    matrix.add("genome2", cog_count_file)
+    pd.testing.assert_frame_equal(df, matrix.to_dataframe())
+
+    df = load_cog_count_files([zero_count_file])
+    assert df.index.to_list() == ["zero"]
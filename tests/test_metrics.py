@@ -0,0 +1,79 @@
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from cogclassifier.metrics import (
+    OPENMETRICS_CONTENT_TYPE,
+    QUERY_SEQUENCES,
+    REGISTRY,
+    MetricsRegistry,
+    record_classify_stats,
+)
+
+
+@pytest.fixture()
+def registry() -> MetricsRegistry:
+    """Metrics registry fixture with counter, gauge & histogram"""
+    registry = MetricsRegistry()
+    counter = registry.counter("test_sequences", "Number of sequences")
+    counter.inc(10)
+    counter.inc(cache="download")
+    registry.gauge("test_ratio", "Ratio").set(0.75)
+    histogram = registry.histogram("test_seconds", "Seconds", buckets=(1, 10))
+    histogram.observe(0.5)
+    histogram.observe(5)
+    return registry
+
+
+def test_render(registry: MetricsRegistry):
+    """Test render metrics in OpenMetrics text format"""
+    assert registry.render() == (
+        "# TYPE test_sequences counter\n"
+        "# HELP test_sequences Number of sequences\n"
+        "test_sequences_total 10\n"
+        'test_sequences_total{cache="download"} 1\n'
+        "# TYPE test_ratio gauge\n"
+        "# HELP test_ratio Ratio\n"
+        "test_ratio 0.75\n"
+        "# TYPE test_seconds histogram\n"
+        "# HELP test_seconds Seconds\n"
+        'test_seconds_bucket{le="1"} 1\n'
+        'test_seconds_bucket{le="10"} 2\n'
+        'test_seconds_bucket{le="+Inf"} 2\n'
+        "test_seconds_count 2\n"
+        "test_seconds_sum 5.5\n"
+        "# EOF\n"
+    )
+    with pytest.raises(ValueError):
+        registry.counter("test_sequences", "Duplicate metric")
+
+
+def test_write_textfile(registry: MetricsRegistry, tmp_path: Path):
+    """Test write metrics text file"""
+    outfile = tmp_path / "metrics.prom"
+    assert not registry.is_exported
+    registry.write_textfile(outfile)
+    assert registry.is_exported
+    assert outfile.read_text() == registry.render()
+
+
+def test_record_classify_stats_not_exported(monkeypatch: pytest.MonkeyPatch):
+    """Test classify stats are not counted (parsed) if metrics are not exported"""
+    monkeypatch.setattr(REGISTRY, "_is_exported", False)
+    query_count = QUERY_SEQUENCES.get()
+    record_classify_stats(None)  # type: ignore
+    assert QUERY_SEQUENCES.get() == query_count
+
+
+def test_http_server(registry: MetricsRegistry):
+    """Test expose metrics by HTTP endpoint"""
+    server = registry.start_http_server(0, addr="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as res:
+            assert res.headers["Content-Type"] == OPENMETRICS_CONTENT_TYPE
+            assert res.read().decode() == registry.render()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from cogclassifier.matrix import load_cog_count_files
+from cogclassifier.output import COUNT_CHART_FILENAMES, plot_count_charts
+from cogclassifier.plot import (
+    COMPARATIVE_STYLES,
+    ChartRenderer,
+    plot_cog_count_barchart,
+    plot_cog_count_comparative_chart,
+    plot_cog_count_piechart,
+)
+
+
+def test_plot_multiple_outfiles(cog_count_file: Path, tmp_path: Path):
+    """Test plot charts to multiple format outfiles with reusable renderer"""
+    with ChartRenderer() as renderer:
+        renderer.warm_up()
+        barchart_files = [tmp_path / "barchart.html", tmp_path / "barchart.png"]
+        plot_cog_count_barchart(cog_count_file, barchart_files, renderer=renderer)
+        piechart_files = [tmp_path / "piechart.svg", tmp_path / "piechart.png"]
+        plot_cog_count_piechart(cog_count_file, piechart_files, renderer=renderer)
+    for outfile in barchart_files + piechart_files:
+        assert outfile.exists()
+
+
+def test_plot_count_charts_concurrently(cog_count_file: Path, tmp_path: Path):
+    """Test plot barchart & piechart concurrently (Same as sequential plot)"""
+    count_summary_df = pd.read_csv(cog_count_file, sep="\t")
+    plot_count_charts(count_summary_df, tmp_path)
+    for filename in COUNT_CHART_FILENAMES:
+        assert (tmp_path / filename).exists()
+
+    barchart_file = tmp_path / "sequential_barchart.html"
+    plot_cog_count_barchart(count_summary_df, barchart_file)
+    expected_html = barchart_file.read_text()
+    assert (tmp_path / "cog_count_barchart.html").read_text() == expected_html
+
+
+@pytest.mark.parametrize("style", COMPARATIVE_STYLES)
+def test_plot_comparative_chart(cog_count_file: Path, tmp_path: Path, style: str):
+    """Test plot comparative chart of multiple genomes in a single chart"""
+    matrix_df = load_cog_count_files(
+        [cog_count_file] * 3, genomes=["genome1", "genome2", "genome3"]
+    )
+    outfiles = [tmp_path / "comparative.html", tmp_path / "comparative.png"]
+    plot_cog_count_comparative_chart(matrix_df, outfiles, style=style)
+    for outfile in outfiles:
+        assert outfile.exists()
@@ -0,0 +1,109 @@
+import gzip
+import threading
+from pathlib import Path
+
+import pytest
+
+from cogclassifier import shard
+from cogclassifier.shard import (
+    ShardManifest,
+    merge_shards,
+    plan_shards,
+    run_shard_worker,
+    shard_result_file,
+)
+
+
+def _write_shard_results(manifest_file: Path, rpsblast_file: Path) -> None:
+    """Write shard results from recorded rpsblast result (Instead of RPS-BLAST)"""
+    lines = rpsblast_file.read_text().splitlines(keepends=True)
+    for shard_item in ShardManifest.load(manifest_file).shards:
+        query_ids = {
+            line[1:].split()[0]
+            for line in Path(shard_item.fasta_file).read_text().splitlines()
+            if line.startswith(">")
+        }
+        shard_lines = [line for line in lines if line.split("\t")[0] in query_ids]
+        shard_result_file(shard_item).write_text("".join(shard_lines))
+
+
+def test_plan_shards(example_fasta_file: Path, tmp_path: Path):
+    """Test plan shards"""
+    manifest_file = plan_shards([example_fasta_file], tmp_path, shard_size=30)
+    manifest = ShardManifest.load(manifest_file)
+    assert [s.query_count for s in manifest.shards] == [30, 30, 30, 10]
+    shard_fasta_text = "".join(Path(s.fasta_file).read_text() for s in manifest.shards)
+    assert shard_fasta_text == example_fasta_file.read_text()
+
+
+def test_merge_shards(
+    example_fasta_file: Path,
+    rpsblast_file: Path,
+    cddid_download_dir: Path,
+    tmp_path: Path,
+):
+    """Test merge shards (deterministic & idempotent)"""
+    workdir, outdir = tmp_path / "work", tmp_path / "output"
+    manifest_file = plan_shards([example_fasta_file], workdir, shard_size=30)
+    with pytest.raises(RuntimeError):
+        merge_shards(manifest_file, outdir, download_dir=cddid_download_dir)
+
+    _write_shard_results(manifest_file, rpsblast_file)
+    genome2stats = merge_shards(
+        manifest_file, outdir, download_dir=cddid_download_dir, plot=False
+    )
+    genome_outdir = outdir / "example"
+    assert (genome_outdir / "rpsblast.tsv").read_text() == rpsblast_file.read_text()
+    assert genome2stats["example"].query_count == 100
+
+    outfile_names = ["rpsblast.tsv", "cog_classify.tsv", "cog_count.tsv"]
+    first_outputs = [(genome_outdir / name).read_bytes() for name in outfile_names]
+    merge_shards(manifest_file, outdir, download_dir=cddid_download_dir, plot=False)
+    second_outputs = [(genome_outdir / name).read_bytes() for name in outfile_names]
+    assert first_outputs == second_outputs
+
+    # Compressed outputs
+    gz_outdir = tmp_path / "output_gz"
+    merge_shards(
+        manifest_file,
+        gz_outdir,
+        download_dir=cddid_download_dir,
+        plot=False,
+        compress="gz",
+    )
+    gz_outputs = [
+        gzip.decompress((gz_outdir / "example" / f"{name}.gz").read_bytes())
+        for name in outfile_names
+    ]
+    assert gz_outputs == first_outputs
+
+
+def test_run_shard_worker(
+    example_fasta_file: Path,
+    rpsblast_file: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test multiple local workers run each pending shard only once"""
+    manifest_file = plan_shards([example_fasta_file], tmp_path, shard_size=10)
+    run_shard_ids = []
+
+    def fake_run_shard(manifest_file, shard_id, **kwargs):
+        run_shard_ids.append(shard_id)
+        result_file = shard_result_file(
+            ShardManifest.load(manifest_file).get_shard(shard_id)
+        )
+        result_file.write_text("")
+        return result_file
+
+    monkeypatch.setattr(shard, "run_shard", fake_run_shard)
+    threads = [
+        threading.Thread(target=run_shard_worker, args=(manifest_file,))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    manifest = ShardManifest.load(manifest_file)
+    assert sorted(run_shard_ids) == [s.id for s in manifest.shards]
@@ -0,0 +1,99 @@
+from pathlib import Path
+
+import pytest
+
+from cogclassifier import const
+from cogclassifier.blast import BlastAlignmentRecord
+from cogclassifier.cog import (
+    CogCddIdTable,
+    CogClassifyStats,
+    CogDefinitionRecord,
+    CogFuncCategoryRecord,
+)
+from cogclassifier.output import write_classify_results
+from cogclassifier.store import CogResultStore
+
+
+def _get_stats(
+    example_fasta_file: Path, rpsblast_file: Path, cddid_table_file: Path, **kwargs
+) -> CogClassifyStats:
+    return CogClassifyStats(
+        example_fasta_file,
+        BlastAlignmentRecord(rpsblast_file),
+        CogFuncCategoryRecord(const.COG_FUNC_CATEGORY_FILE),
+        CogDefinitionRecord(const.COG_DEFINITION_FILE),
+        CogCddIdTable(cddid_table_file),
+        **kwargs,
+    )
+
+
+def test_add_and_find(
+    example_fasta_file: Path,
+    rpsblast_file: Path,
+    cddid_table_file: Path,
+    tmp_path: Path,
+):
+    """Test add classification results & cross-genome lookups"""
+    stats = _get_stats(example_fasta_file, rpsblast_file, cddid_table_file)
+    store_file = tmp_path / "store.db"
+    with CogResultStore(store_file) as store:
+        assert store.add("genome1", stats)
+        assert store.add("genome2", stats)
+        # Already stored genome is skipped
+        assert not store.add("genome1", stats)
+
+    with CogResultStore(store_file) as store:
+        assert store.genomes == ["genome1", "genome2"]
+        c = stats.classifications[0]
+        results = store.find(genome="genome1", query_id=c.query_id)
+        assert [r for _, r in results] == [c._replace(qstart=None, qend=None)]
+
+        expected_count = len({c2.query_id for c2 in stats if c2.cog_id == c.cog_id})
+        genome2count = store.find_genomes(cog_id=c.cog_id)
+        assert genome2count == {"genome1": expected_count, "genome2": expected_count}
+        assert len(store.find(letter=c.cog_letter)) == 2 * sum(
+            c2.cog_letter == c.cog_letter for c2 in stats
+        )
+        assert store.find_genomes(cog_id="COG_NOT_FOUND") == {}
+        assert store.find_genomes(genome="genome1", query_id=c.query_id) == {
+            "genome1": 1
+        }
+
+        assert store.remove("genome2")
+        assert store.genomes == ["genome1"]
+        assert store.find(genome="genome2") == []
+
+
+def test_add_files(
+    example_fasta_file: Path,
+    rpsblast_file: Path,
+    cddid_table_file: Path,
+    tmp_path: Path,
+):
+    """Test add COG classification result files (Top hit & multi-domain)"""
+    for multi_domain in (False, True):
+        stats = _get_stats(
+            example_fasta_file,
+            rpsblast_file,
+            cddid_table_file,
+            multi_domain=multi_domain,
+        )
+        outdir = tmp_path / f"genome_{multi_domain}"
+        write_classify_results(stats, outdir)
+
+        with CogResultStore(tmp_path / "store.db") as store:
+            added_genomes = store.add_files([outdir / "cog_classify.tsv"])
+            assert added_genomes == [outdir.name]
+            results = [r for _, r in store.find(genome=outdir.name)]
+            if multi_domain:
+                assert results == stats.classifications
+            else:
+                expected = [c._replace(qstart=None, qend=None) for c in stats]
+                assert results == expected
+
+    empty_file = tmp_path / "empty" / "cog_classify.tsv"
+    empty_file.parent.mkdir()
+    empty_file.touch()
+    with CogResultStore(tmp_path / "store.db") as store:
+        with pytest.raises(ValueError, match="Empty classify result file"):
+            store.add_files([empty_file])
@@ -0,0 +1,70 @@
+import io
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from cogclassifier import const
+from cogclassifier.cog import CogDefinitionRecord
+from cogclassifier.subset import (
+    DBSIZE_FILENAME,
+    MakeProfileDb,
+    build_subset_db,
+    cog_profiles_size,
+    extract_cog_profiles,
+    full_db_size,
+)
+
+
+@pytest.fixture()
+def cdd_download_dir(tmp_path: Path) -> Path:
+    """Download directory fixture with dummy CDD profiles (`cdd.tar.gz`)"""
+    download_dir = tmp_path / "download"
+    download_dir.mkdir()
+    with tarfile.open(download_dir / "cdd.tar.gz", "w:gz") as tar:
+        for name in ("COG0001.smp", "COG0002.smp", "cd00001.smp", "Cog.pn"):
+            data = f"PssmWithParameters ::= {name} numColumns 100,".encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return download_dir
+
+
+def test_select_ids():
+    """Test select COG IDs by letters & COG IDs"""
+    cog_def_rec = CogDefinitionRecord(const.COG_DEFINITION_FILE)
+    v_ids = cog_def_rec.select_ids(letters=["V"])
+    assert len(v_ids) > 0
+    assert all(cog_def_rec[cog_id].one_letter == "V" for cog_id in v_ids)  # type: ignore
+    selected_ids = cog_def_rec.select_ids(letters=["V"], cog_ids=["COG0001"])
+    assert set(selected_ids) == {*v_ids, "COG0001"}
+    assert cog_def_rec.select_ids() == []
+
+
+def test_extract_cog_profiles(cdd_download_dir: Path):
+    """Test extract only COG profiles from CDD profiles archive"""
+    cog_smp_dir = extract_cog_profiles(cdd_download_dir)
+    assert sorted(f.name for f in cog_smp_dir.iterdir()) == [
+        "COG0001.smp",
+        "COG0002.smp",
+    ]
+    # Full COG database size is total length of all COG profiles
+    assert cog_profiles_size(cog_smp_dir) == 200
+
+
+@pytest.mark.skipif(
+    not MakeProfileDb.check_installation(raise_error=False),
+    reason="makeprofiledb is not installed",
+)
+def test_build_subset_db(cdd_download_dir: Path):
+    """Test build & reuse cached subset database"""
+    subset_db = build_subset_db(["COG0001"], cdd_download_dir)
+    assert (subset_db.parent / "cog_ids.txt").read_text() == "COG0001\n"
+    assert (subset_db.parent / DBSIZE_FILENAME).exists()
+    assert full_db_size(subset_db) == 200
+    assert build_subset_db(["COG0001"], cdd_download_dir) == subset_db
+
+
+def test_full_db_size(tmp_path: Path):
+    """Test full database size is not recorded for full COG database"""
+    assert full_db_size(tmp_path / "Cog_LE" / "Cog") is None
@@ -0,0 +1,210 @@
+import os
+import pstats
+import tarfile
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from cogclassifier import const
+from cogclassifier.main import CogClassifier
+from cogclassifier.utils import (
+    StageProfiler,
+    download_extract,
+    ftp_download,
+    is_remote_updated,
+    load_download_meta,
+    profile_stage,
+)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class _GzipEncodingHandler(_QuietHandler):
+    """Handler labeling gzip files with `Content-Encoding: gzip` header"""
+
+    def end_headers(self):
+        if self.path.endswith(".gz"):
+            self.send_header("Content-Encoding", "gzip")
+        super().end_headers()
+
+
+@pytest.fixture()
+def remote_dir(tmp_path: Path) -> Path:
+    """Remote directory fixture served by `remote_url` HTTP server"""
+    remote_dir = tmp_path / "remote"
+    remote_dir.mkdir()
+    return remote_dir
+
+
+@pytest.fixture()
+def remote_url(remote_dir: Path):
+    """Local HTTP server url fixture (Stand-in for NCBI FTP site)"""
+    with _serve(remote_dir, _QuietHandler) as url:
+        yield url
+
+
+@contextmanager
+def _serve(directory: Path, handler_class: type[SimpleHTTPRequestHandler]):
+    """Serve directory by local HTTP server & yield its url"""
+    handler = partial(handler_class, directory=str(directory))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_profile_stage(tmp_path: Path):
+    """Test profile stage writes pstats & allocation report"""
+    assert isinstance(profile_stage(None, "test"), nullcontext)
+
+    profiler = StageProfiler(tmp_path / "profile", top_n=5)
+    with profile_stage(profiler, "test"):
+        data = [list(range(100)) for _ in range(100)]
+    assert len(data) == 100
+
+    pstats_file = tmp_path / "profile" / "test.pstats"
+    assert pstats.Stats(str(pstats_file)).total_calls > 0
+    alloc_lines = (tmp_path / "profile" / "test.alloc.txt").read_text().splitlines()
+    assert alloc_lines[0] == "# Stage: test"
+    assert 0 < len([line for line in alloc_lines if not line.startswith("#")]) <= 5
+
+
+def test_ftp_download_update(remote_dir: Path, remote_url: str, tmp_path: Path):
+    """Test re-download only changed remote file & remove derived data"""
+    remote_file = remote_dir / "resource.tsv"
+    remote_file.write_text("version1\n")
+    os.utime(remote_file, (1_600_000_000, 1_600_000_000))
+    url = f"{remote_url}/resource.tsv"
+    download_dir = tmp_path / "download"
+
+    download_file = ftp_download(url, download_dir, derived=("derived",))
+    assert download_file.read_text() == "version1\n"
+    assert load_download_meta(download_file)["last_modified"] is not None
+    derived_dir = download_dir / "derived"
+    derived_dir.mkdir()
+
+    # Remote file is not changed => Not re-downloaded & derived data is kept
+    assert not is_remote_updated(url, download_file)
+    ftp_download(url, download_dir, update=True, derived=("derived",))
+    assert derived_dir.exists()
+
+    # Remote file is changed => Re-downloaded & derived data is removed
+    remote_file.write_text("version2\n")
+    os.utime(remote_file, (1_600_000_100, 1_600_000_100))
+    ftp_download(url, download_dir, derived=("derived",))
+    assert download_file.read_text() == "version1\n"
+    ftp_download(url, download_dir, update=True, derived=("derived",))
+    assert download_file.read_text() == "version2\n"
+    assert not derived_dir.exists()
+
+
+def test_is_remote_updated_without_meta(
+    remote_dir: Path, remote_url: str, tmp_path: Path
+):
+    """Test freshness check of file downloaded without metadata"""
+    remote_file = remote_dir / "resource.tsv"
+    remote_file.write_text("version1\n")
+    os.utime(remote_file, (1_600_000_000, 1_600_000_000))
+    url = f"{remote_url}/resource.tsv"
+
+    download_file = tmp_path / "resource.tsv"
+    download_file.write_text("version1\n")
+    assert not is_remote_updated(url, download_file)
+    assert load_download_meta(download_file)["url"] == url
+
+    download_file.unlink()
+    download_file.with_name("resource.tsv.download.json").unlink()
+    download_file.write_text("old\n")
+    assert is_remote_updated(url, download_file)
+
+
+def _write_targz(targz_file: Path, name2content: dict[str, bytes]) -> None:
+    """Write tar.gz archive of files"""
+    src_dir = targz_file.parent / "src"
+    src_dir.mkdir(exist_ok=True)
+    with tarfile.open(targz_file, "w:gz") as tar:
+        for name, content in name2content.items():
+            (src_dir / name).write_bytes(content)
+            tar.add(src_dir / name, arcname=name)
+
+
+@pytest.mark.parametrize("keep_archive", [False, True])
+def test_download_extract(
+    remote_dir: Path, remote_url: str, tmp_path: Path, keep_archive: bool
+):
+    """Test stream-extract tar.gz archive while downloading"""
+    remote_file = remote_dir / "Cog_LE.tar.gz"
+    _write_targz(remote_file, {"Cog.rps": b"rps", "Cog.aux": b"aux"})
+    url = f"{remote_url}/Cog_LE.tar.gz"
+
+    extract_dir = tmp_path / "download" / "Cog_LE"
+    download_extract(url, extract_dir, keep_archive=keep_archive)
+    assert sorted(p.name for p in extract_dir.iterdir()) == ["Cog.aux", "Cog.rps"]
+    archive_file = extract_dir.parent / "Cog_LE.tar.gz"
+    assert archive_file.exists() == keep_archive
+    if keep_archive:
+        assert archive_file.read_bytes() == remote_file.read_bytes()
+    # Download metadata is stored even if archive is not kept
+    assert not is_remote_updated(url, archive_file)
+    # No temporary files are left
+    assert (
+        sorted(p.name for p in extract_dir.parent.iterdir() if p.name[0] == ".") == []
+    )
+
+    # Extract directory renamed by concurrent process is kept as is
+    extract_dir = tmp_path / "concurrent" / "Cog_LE"
+    extract_dir.mkdir(parents=True)
+    (extract_dir / "Cog.rps").write_bytes(b"concurrent")
+    download_extract(url, extract_dir, keep_archive=keep_archive)
+    assert (extract_dir / "Cog.rps").read_bytes() == b"concurrent"
+    assert (
+        sorted(p.name for p in extract_dir.parent.iterdir() if p.name[0] == ".") == []
+    )
+
+    # Transport `Content-Encoding: gzip` is not decoded (Kept archive as remote)
+    with _serve(remote_dir, _GzipEncodingHandler) as gzip_remote_url:
+        extract_dir = tmp_path / "gzip_encoding" / "Cog_LE"
+        url = f"{gzip_remote_url}/Cog_LE.tar.gz"
+        download_extract(url, extract_dir, keep_archive=True)
+    assert sorted(p.name for p in extract_dir.iterdir()) == ["Cog.aux", "Cog.rps"]
+    archive_file = extract_dir.parent / "Cog_LE.tar.gz"
+    assert archive_file.read_bytes() == remote_file.read_bytes()
+
+
+def test_download_resources_update(
+    remote_dir: Path,
+    remote_url: str,
+    cddid_table_file: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test download resources & update only changed RPS-BLAST database"""
+    monkeypatch.setattr(const, "CDDID_TBL_FTP", f"{remote_url}/cddid.tbl.gz")
+    monkeypatch.setattr(const, "COG_LE_FTP", f"{remote_url}/Cog_LE.tar.gz")
+    (remote_dir / "cddid.tbl.gz").write_bytes(cddid_table_file.read_bytes())
+    cog_le_targz_file = remote_dir / "Cog_LE.tar.gz"
+    _write_targz(cog_le_targz_file, {"Cog.rps": b"version1"})
+    os.utime(cog_le_targz_file, (1_600_000_000, 1_600_000_000))
+
+    download_dir = tmp_path / "download"
+    _, rpsblast_db = CogClassifier.download_resources(download_dir)
+    assert (rpsblast_db.parent / "Cog.rps").read_bytes() == b"version1"
+    assert not (download_dir / "Cog_LE.tar.gz").exists()
+
+    _write_targz(cog_le_targz_file, {"Cog.rps": b"version2"})
+    os.utime(cog_le_targz_file, (1_600_000_100, 1_600_000_100))
+    CogClassifier.download_resources(download_dir)
+    assert (rpsblast_db.parent / "Cog.rps").read_bytes() == b"version1"
+    CogClassifier.download_resources(download_dir, update=True)
+    assert (rpsblast_db.parent / "Cog.rps").read_bytes() == b"version2"